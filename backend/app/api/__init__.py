@@ -1,9 +1,11 @@
 from .customers import router as customers_router
 from .auditors import router as auditors_router
 from .workflow import router as workflow_router
+from .exports import router as exports_router
 
 __all__ = [
     "customers_router",
     "auditors_router", 
-    "workflow_router"
+    "workflow_router",
+    "exports_router"
 ]
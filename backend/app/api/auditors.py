@@ -1,9 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from ..database import get_db
-from ..models.auditor import Auditor
-from ..schemas.auditor import AuditorLogin, TokenResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..database import get_write_db
+from ..schemas.auditor import AuditorLogin, AuditorPrincipal, TokenResponse
 from ..utils.auth import authenticate_auditor, create_access_token, get_current_auditor
+from ..utils.password import PasswordHasherBusy
 from datetime import timedelta
 
 router = APIRouter(prefix="/api/v1/auditors", tags=["auditors"])
@@ -11,10 +11,17 @@ router = APIRouter(prefix="/api/v1/auditors", tags=["auditors"])
 @router.post("/login", response_model=TokenResponse)
 async def login_auditor(
     auditor_data: AuditorLogin,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_write_db)
 ):
     """审核员登录"""
-    auditor = authenticate_auditor(db, auditor_data.username, auditor_data.password)
+    try:
+        auditor = await authenticate_auditor(db, auditor_data.username, auditor_data.password)
+    except PasswordHasherBusy:
+        raise HTTPException(
+            status_code=503,
+            detail="登录请求过多，请稍后重试",
+            headers={"Retry-After": "1"},
+        )
     if not auditor:
         raise HTTPException(
             status_code=401,
@@ -30,7 +37,7 @@ async def login_auditor(
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.get("/me")
-async def get_current_auditor_info(current_auditor: Auditor = Depends(get_current_auditor)):
+async def get_current_auditor_info(current_auditor: AuditorPrincipal = Depends(get_current_auditor)):
     """获取当前审核员信息"""
     return {
         "id": current_auditor.id,
@@ -1,57 +1,60 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from ..database import get_db
-from ..models.customer import Customer, CustomerStatus
+import logging
+from datetime import datetime
+from decimal import Decimal
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..database import get_read_db, get_write_db, release_failed_statement
+from ..models.customer import Customer, CustomerStatus, RiskLevel
 from ..models.workflow import RiskAssessment, InvestmentAdvice
-from ..schemas.customer import CustomerCreate, CustomerRegisterResponse, CustomerResponse
+from ..schemas.customer import CustomerCreate, CustomerBatchCreate, CustomerRegisterResponse, CustomerResponse
 from ..services.risk_assessment import RiskAssessmentService
 from ..services.investment_advice import InvestmentAdviceService
 from ..services.audit_workflow import AuditWorkflowService
+from ..services.customer_registration import CustomerRegistrationService
+from ..services.customer_listing import CustomerListingService, InvalidCursor
+from ..utils.advice_cache import advice_cache
+from ..utils.metrics import CUSTOMER_REGISTRATIONS
+from ..utils.registration_filter import registration_filter
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/v1/customers", tags=["customers"])
 
+# 批量注册与并发注册冲突时整批重新执行的次数
+BATCH_REGISTER_ATTEMPTS = 2
+
 @router.post("/register", response_model=CustomerRegisterResponse)
 async def register_customer(
     customer_data: CustomerCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_write_db)
 ):
     """客户注册和风险评估"""
     try:
-        # 检查手机号是否已存在
-        existing_customer = db.query(Customer).filter(Customer.phone == customer_data.phone).first()
-        if existing_customer:
-            raise HTTPException(status_code=400, detail="手机号已存在")
-        
-        # 检查身份证号是否已存在
-        existing_customer = db.query(Customer).filter(Customer.id_card == customer_data.id_card).first()
-        if existing_customer:
-            raise HTTPException(status_code=400, detail="身份证号已存在")
+        # 先插入，重复注册由唯一约束发现；预过滤判断可能重复时先查询一次，不做多余的计算和插入
+        if registration_filter.loaded and registration_filter.might_exist(customer_data.phone, customer_data.id_card):
+            duplicate = await CustomerRegistrationService.find_duplicate(db, customer_data.phone, customer_data.id_card)
+            if duplicate:
+                raise HTTPException(status_code=400, detail=duplicate)
         
         # 计算风险评分
         risk_score = RiskAssessmentService.calculate_risk_score(customer_data.assessment_data)
         risk_level = RiskAssessmentService.determine_risk_level(risk_score)
         
         # 创建客户记录
-        customer = Customer(
-            name=customer_data.name,
-            phone=customer_data.phone,
-            id_card=customer_data.id_card,
-            email=customer_data.email,
-            occupation=customer_data.occupation,
-            investment_amount=customer_data.investment_amount,
-            age_range=customer_data.assessment_data.age,
-            income_level=customer_data.assessment_data.income,
-            investment_experience=customer_data.assessment_data.experience,
-            risk_tolerance=customer_data.assessment_data.risk_tolerance,
-            investment_goal=customer_data.assessment_data.goal,
-            investment_period=customer_data.assessment_data.period,
-            risk_score=risk_score,
-            risk_level=risk_level,
-            status=CustomerStatus.pending
-        )
+        customer = CustomerRegistrationService.build_customer(customer_data, risk_score, risk_level)
         
         db.add(customer)
-        db.flush()  # 获取ID但不提交
+        try:
+            await db.flush()  # 获取ID但不提交
+        except IntegrityError as e:
+            release_failed_statement(e)
+            duplicate = CustomerRegistrationService.duplicate_message(e)
+            if duplicate is None:
+                raise
+            raise HTTPException(status_code=400, detail=duplicate)
         
         # 创建风险评估记录
         assessment = RiskAssessment(
@@ -79,49 +82,136 @@ async def register_customer(
         db.add(advice)
         
         # 创建审核流程
-        workflow_id = AuditWorkflowService.create_workflow(
+        workflow_id = await AuditWorkflowService.create_workflow(
             db, 
             customer.id, 
             risk_level.value, 
             float(customer_data.investment_amount)
         )
         
-        db.commit()
+        await db.commit()
+        registration_filter.add(customer_data.phone, customer_data.id_card)
+        CUSTOMER_REGISTRATIONS.labels(risk_level.value).inc()
         
         return CustomerRegisterResponse(
             message="注册成功",
             data={
                 "customer_id": customer.id,
+                "application_id": f"RA-{customer.application_no}",
                 "risk_score": risk_score,
                 "risk_level": risk_level.value,
                 "workflow_id": workflow_id
             }
         )
         
-    except Exception as e:
-        db.rollback()
-        raise HTTPException(status_code=500, detail=str(e))
+    except HTTPException:
+        await db.rollback()
+        raise
+    except Exception:
+        await db.rollback()
+        logger.exception("客户注册失败")
+        raise HTTPException(status_code=500, detail="注册失败，请稍后重试")
+
+@router.post("/register/batch", response_model=CustomerRegisterResponse)
+async def register_customers_batch(
+    batch_data: CustomerBatchCreate,
+    db: AsyncSession = Depends(get_write_db)
+):
+    """批量客户注册和风险评估（单事务批量插入）"""
+    for attempt in range(1, BATCH_REGISTER_ATTEMPTS + 1):
+        try:
+            results = await CustomerRegistrationService.register_batch(db, batch_data.customers)
+            await db.commit()
+            break
+        except IntegrityError as e:
+            # 查重之后其他请求注册了同一客户：回滚后重新执行，重复的行由查重查询返回逐行错误
+            release_failed_statement(e)
+            await db.rollback()
+            if CustomerRegistrationService.duplicate_message(e) is None:
+                logger.exception("批量注册失败")
+                raise HTTPException(status_code=500, detail="批量注册失败，请稍后重试")
+            if attempt == BATCH_REGISTER_ATTEMPTS:
+                raise HTTPException(status_code=409, detail="客户正在被同时注册，请稍后重试")
+        except Exception:
+            await db.rollback()
+            logger.exception("批量注册失败")
+            raise HTTPException(status_code=500, detail="批量注册失败，请稍后重试")
+    
+    for result in results:
+        if result["success"]:
+            row = batch_data.customers[result["index"]]
+            registration_filter.add(row["phone"], row["id_card"])
+            CUSTOMER_REGISTRATIONS.labels(result["risk_level"]).inc()
+    success_count = sum(1 for result in results if result["success"])
+    return CustomerRegisterResponse(
+        message="批量注册完成",
+        data={
+            "total": len(results),
+            "success_count": success_count,
+            "failed_count": len(results) - success_count,
+            "results": results
+        }
+    )
+
+@router.get("")
+async def list_customers(
+    status: Optional[CustomerStatus] = None,
+    risk_level: Optional[RiskLevel] = None,
+    min_amount: Optional[Decimal] = Query(None, ge=0, description="最低投资金额"),
+    max_amount: Optional[Decimal] = Query(None, ge=0, description="最高投资金额"),
+    created_from: Optional[datetime] = Query(None, description="注册时间起（包含）"),
+    created_to: Optional[datetime] = Query(None, description="注册时间止（不包含）"),
+    cursor: Optional[str] = Query(None, description="上一页返回的 next_cursor"),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """客户列表（按注册时间倒序，游标分页）"""
+    try:
+        page = await CustomerListingService.list_customers(
+            db,
+            limit=limit,
+            status=status,
+            risk_level=risk_level,
+            min_amount=min_amount,
+            max_amount=max_amount,
+            created_from=created_from,
+            created_to=created_to,
+            cursor=cursor
+        )
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return {"code": 200, "data": page}
 
 @router.get("/{customer_id}", response_model=CustomerResponse)
-async def get_customer(customer_id: int, db: Session = Depends(get_db)):
+async def get_customer(customer_id: int, db: AsyncSession = Depends(get_read_db)):
     """获取客户信息"""
-    customer = db.query(Customer).filter(Customer.id == customer_id).first()
+    customer = await db.get(Customer, customer_id)
     if not customer:
         raise HTTPException(status_code=404, detail="客户不存在")
     
     return customer
 
 @router.get("/{customer_id}/advice")
-async def get_customer_advice(customer_id: int, db: Session = Depends(get_db)):
-    """获取客户投资建议"""
-    customer = db.query(Customer).filter(Customer.id == customer_id).first()
+async def get_customer_advice(customer_id: int, db: AsyncSession = Depends(get_write_db)):
+    """
+    获取客户投资建议（读穿透缓存，审核结果提交后失效）
+
+    未命中时读取主库：审核提交后删除缓存，紧接着的请求如果读取尚未同步的只读副本，会把旧状态重新写入缓存。
+    """
+    cached = await advice_cache.get(customer_id)
+    if cached is not None:
+        return cached
+    version = await advice_cache.version(customer_id)
+    
+    customer = await db.get(Customer, customer_id)
     if not customer:
         raise HTTPException(status_code=404, detail="客户不存在")
     
-    assessment = db.query(RiskAssessment).filter(RiskAssessment.customer_id == customer_id).first()
-    advice = db.query(InvestmentAdvice).filter(InvestmentAdvice.customer_id == customer_id).first()
+    assessment = await db.scalar(select(RiskAssessment).where(RiskAssessment.customer_id == customer_id).limit(1))
+    advice = await db.scalar(select(InvestmentAdvice).where(InvestmentAdvice.customer_id == customer_id).limit(1))
     
-    return {
+    response = {
         "code": 200,
         "data": {
             "customer_info": {
@@ -140,8 +230,13 @@ async def get_customer_advice(customer_id: int, db: Session = Depends(get_db)):
                 "portfolio_type": advice.portfolio_type if advice else None,
                 "expected_return": f"{advice.expected_return_min}%-{advice.expected_return_max}%" if advice else None,
                 "portfolio_config": advice.portfolio_config if advice else None,
+                "allocation_amounts": InvestmentAdviceService.allocate_amounts(
+                    advice.portfolio_type, float(customer.investment_amount)
+                ) if advice else None,
                 "advice_content": advice.advice_content if advice else None
             },
             "audit_status": customer.status.value
         }
     }
+    await advice_cache.set(customer_id, response, version)
+    return response
@@ -0,0 +1,33 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from ..config import settings
+from ..schemas.auditor import AuditorPrincipal
+from ..services.data_export import DataExportService, EXPORT_TABLES, MEDIA_TYPES
+from ..utils.auth import get_current_auditor
+
+router = APIRouter(prefix="/api/v1/exports", tags=["exports"])
+
+async def get_export_auditor(current_auditor: AuditorPrincipal = Depends(get_current_auditor)) -> AuditorPrincipal:
+    """只有 export_allowed_roles 中的审核员级别可以导出（整表导出包含全部客户的手机号和身份证号）"""
+    allowed = {role.strip() for role in settings.export_allowed_roles.split(",") if role.strip()}
+    if current_auditor.role.value not in allowed:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="没有数据导出权限")
+    return current_auditor
+
+@router.get("/{table_name}")
+async def export_table(
+    table_name: str,
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$", description="导出格式：ndjson 或 csv"),
+    gzip: bool = Query(False, description="是否gzip压缩"),
+    current_auditor: AuditorPrincipal = Depends(get_export_auditor)
+):
+    """流式导出整表（customers、audit_records、audit_workflow），内存占用与表大小无关；只允许 export_allowed_roles 中的级别"""
+    if table_name not in EXPORT_TABLES:
+        raise HTTPException(status_code=404, detail="不支持导出该数据表")
+    
+    filename = f"{table_name}.{format}" + (".gz" if gzip else "")
+    return StreamingResponse(
+        DataExportService.iter_export(table_name, format, compress=gzip),
+        media_type="application/gzip" if gzip else MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
@@ -1,93 +1,136 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from ..database import get_db
-from ..models.auditor import Auditor
-from ..models.workflow import AuditWorkflow, AuditRecord, WorkflowStatus, AuditStatus
+import asyncio
+import logging
+import time
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..config import settings
+from ..database import get_read_db, get_write_db
+from ..models.workflow import AuditWorkflow, WorkflowStatus
 from ..models.customer import Customer, CustomerStatus
-from ..schemas.workflow import AuditRequest, AuditResponse, WorkflowResponse
-from ..services.audit_workflow import AuditWorkflowService
-from ..utils.auth import get_current_auditor
+from ..schemas.auditor import AuditorPrincipal
+from ..schemas.workflow import AuditRequest, AuditBatchRequest, AuditResponse, WorkflowResponse
+from ..services.audit_workflow import AuditWorkflowService, WorkflowConflictError
+from ..services.investment_rollup import InvestmentRollupService
+from ..utils.auth import StreamGrant, create_stream_ticket, get_current_auditor, get_stream_grant, get_token_expiry
+from ..utils.auditor_events import TooManySubscribers, auditor_events
 from ..utils.notification import NotificationService
+from ..utils.advice_cache import advice_cache
+from ..utils.metrics import AUDITS
 
 router = APIRouter(prefix="/api/v1/workflow", tags=["workflow"])
+logger = logging.getLogger(__name__)
 
 @router.get("/workflow", response_model=WorkflowResponse)
 async def get_workflow_dashboard(
-    current_auditor: Auditor = Depends(get_current_auditor),
-    db: Session = Depends(get_db)
+    current_auditor: AuditorPrincipal = Depends(get_current_auditor),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """获取审核工作台数据"""
-    # 统计待审核数量
-    pending_count = db.query(AuditWorkflow).filter(
-        AuditWorkflow.assigned_auditor_id == current_auditor.id,
-        AuditWorkflow.workflow_status.in_([WorkflowStatus.pending, WorkflowStatus.in_progress])
-    ).count()
+    # 一次聚合查询统计各项数量
+    counts = await AuditWorkflowService.get_dashboard_counts(db, current_auditor.id)
     
-    # 统计已通过数量
-    approved_count = db.query(AuditRecord).filter(
-        AuditRecord.auditor_id == current_auditor.id,
-        AuditRecord.audit_status == AuditStatus.approved
-    ).count()
-    
-    # 统计需复审数量
-    need_review_count = db.query(AuditRecord).filter(
-        AuditRecord.auditor_id == current_auditor.id,
-        AuditRecord.audit_status == AuditStatus.need_review
-    ).count()
-    
-    # 计算本月投资总额
-    total_investment = db.query(func.sum(Customer.investment_amount)).filter(
-        Customer.status == CustomerStatus.approved
-    ).scalar() or 0
-    
-    # 获取待审核列表
-    pending_workflows = AuditWorkflowService.get_pending_workflows(db, current_auditor.id)
-    pending_list = []
-    
-    for workflow in pending_workflows:
-        customer = db.query(Customer).filter(Customer.id == workflow.customer_id).first()
-        if customer:
-            pending_list.append({
-                "customer_id": customer.id,
-                "customer_name": customer.name,
-                "application_id": f"RA-{customer.id:03d}",
-                "investment_amount": float(customer.investment_amount),
-                "risk_level": customer.risk_level.value if customer.risk_level else "unknown",
-                "submitted_at": customer.created_at.isoformat(),
-                "priority": "high" if float(customer.investment_amount) > 1000000 else "normal"
-            })
+    # 一次联表查询获取待审核列表
+    pending_list = await AuditWorkflowService.get_pending_list(db, current_auditor.id)
     
     return WorkflowResponse(
         data={
-            "pending_count": pending_count,
-            "approved_count": approved_count,
-            "need_review_count": need_review_count,
-            "total_investment": float(total_investment),
+            **counts,
             "pending_list": pending_list
         }
     )
 
+@router.get("/investment/monthly", response_model=WorkflowResponse)
+async def get_monthly_investment(
+    start: Optional[str] = Query(None, pattern=r"^\d{4}-\d{2}$", description="起始月份（YYYY-MM，包含）"),
+    end: Optional[str] = Query(None, pattern=r"^\d{4}-\d{2}$", description="结束月份（YYYY-MM，包含）"),
+    current_auditor: AuditorPrincipal = Depends(get_current_auditor),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """月度投资汇总报表：每月通过的客户数和投资金额、拒绝的客户数，以及各风险等级的明细"""
+    return WorkflowResponse(data={"months": await InvestmentRollupService.get_monthly(db, start, end)})
+
+@router.post("/events/ticket", response_model=WorkflowResponse)
+async def issue_events_ticket(
+    current_auditor: AuditorPrincipal = Depends(get_current_auditor),
+    session_expires_at: int = Depends(get_token_expiry)
+):
+    """换取事件流票据：只能用于打开事件流，有效期 auditor_events_ticket_seconds 秒"""
+    return WorkflowResponse(data={
+        "ticket": create_stream_ticket(current_auditor.username, session_expires_at),
+        "expires_in": settings.auditor_events_ticket_seconds
+    })
+
+@router.get("/events")
+async def stream_auditor_events(grant: StreamGrant = Depends(get_stream_grant)):
+    """
+    工作台事件流（text/event-stream）
+
+    推送当前审核员的 task_assigned、task_completed、counters_changed 事件，
+    积压过多时推送 resync，客户端应重新加载工作台；空闲时定期发送保活注释。
+    浏览器 EventSource 不能设置请求头，先调用 POST /events/ticket 换取票据，通过查询参数 ticket 传递。
+    访问令牌过期时关闭连接，客户端需重新登录并换取票据。
+    """
+    current_auditor = grant.auditor
+    if auditor_events.full:
+        raise HTTPException(status_code=503, detail="事件流连接数已达上限，请稍后重试")
+
+    async def events():
+        # 在生成器中订阅，保证连接结束时（包括未开始发送就断开）一定取消订阅
+        try:
+            subscription = auditor_events.subscribe(current_auditor.id)
+        except TooManySubscribers:
+            return
+        try:
+            # 断线后客户端3秒后重连
+            yield "retry: 3000\n\n"
+            while True:
+                remaining = grant.expires_at - time.time()
+                if remaining <= 0:
+                    return
+                try:
+                    event_type, data = await asyncio.wait_for(
+                        subscription.queue.get(), min(settings.auditor_events_keepalive_seconds, remaining)
+                    )
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield auditor_events.format(event_type, data)
+        finally:
+            auditor_events.unsubscribe(subscription)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.post("/audit", response_model=AuditResponse)
 async def submit_audit(
     audit_request: AuditRequest,
-    current_auditor: Auditor = Depends(get_current_auditor),
-    db: Session = Depends(get_db)
+    current_auditor: AuditorPrincipal = Depends(get_current_auditor),
+    db: AsyncSession = Depends(get_write_db)
 ):
     """提交审核结果"""
     try:
         # 查找对应的工作流
-        workflow = db.query(AuditWorkflow).filter(
-            AuditWorkflow.customer_id == audit_request.customer_id,
-            AuditWorkflow.assigned_auditor_id == current_auditor.id,
-            AuditWorkflow.workflow_status.in_([WorkflowStatus.pending, WorkflowStatus.in_progress])
-        ).first()
+        result = await db.execute(
+            select(AuditWorkflow).where(
+                AuditWorkflow.customer_id == audit_request.customer_id,
+                AuditWorkflow.assigned_auditor_id == current_auditor.id,
+                AuditWorkflow.workflow_status.in_([WorkflowStatus.pending, WorkflowStatus.in_progress])
+            )
+        )
+        workflow = result.scalars().first()
         
         if not workflow:
             raise HTTPException(status_code=404, detail="未找到对应的审核任务")
+        audit_level = workflow.current_level
         
         # 处理审核结果
-        success = AuditWorkflowService.process_audit(
+        success = await AuditWorkflowService.process_audit(
             db, 
             workflow.id, 
             current_auditor.id, 
@@ -100,31 +143,85 @@ async def submit_audit(
         
         # 如果审核完成，更新客户状态并发送通知
         if workflow.workflow_status == WorkflowStatus.completed:
-            customer = db.query(Customer).filter(Customer.id == audit_request.customer_id).first()
+            customer = await db.get(Customer, audit_request.customer_id)
             if customer:
                 customer.status = CustomerStatus.approved
-                db.commit()
-                
-                # 发送通知
-                NotificationService.send_audit_completion_notification(
+                # 审核结果计入当月汇总，与客户状态在同一事务中提交
+                await InvestmentRollupService.record(
+                    db, [(customer.risk_level, CustomerStatus.approved, customer.investment_amount)]
+                )
+                auditor_events.defer_counters(db, None, total_investment=float(customer.investment_amount))
+                # 通知写入发件箱，与客户状态在同一事务中提交，由后台任务发送
+                await NotificationService.send_audit_completion_notification(
                     db, customer.id, customer.name, "approved"
                 )
         elif workflow.workflow_status == WorkflowStatus.rejected:
-            customer = db.query(Customer).filter(Customer.id == audit_request.customer_id).first()
+            customer = await db.get(Customer, audit_request.customer_id)
             if customer:
                 customer.status = CustomerStatus.rejected
-                db.commit()
-                
-                # 发送通知
-                NotificationService.send_audit_completion_notification(
+                await InvestmentRollupService.record(
+                    db, [(customer.risk_level, CustomerStatus.rejected, customer.investment_amount)]
+                )
+                # 通知写入发件箱，与客户状态在同一事务中提交，由后台任务发送
+                await NotificationService.send_audit_completion_notification(
                     db, customer.id, customer.name, "rejected"
                 )
         
+        # 流转、审核记录、客户状态、汇总和通知一次提交，任何一步失败整体回滚
+        await db.commit()
+        
+        AUDITS.labels(audit_level.value, audit_request.audit_status.value).inc()
+        
+        # 客户状态可能已变化，删除投资建议缓存
+        await advice_cache.invalidate(audit_request.customer_id)
+        
         return AuditResponse(
             message="审核提交成功",
             data={"workflow_id": workflow.id}
         )
         
-    except Exception as e:
-        db.rollback()
-        raise HTTPException(status_code=500, detail=str(e))
+    except HTTPException:
+        await db.rollback()
+        raise
+    except WorkflowConflictError as e:
+        # 同一任务被并发提交，只有一个请求成功
+        await db.rollback()
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception:
+        await db.rollback()
+        logger.exception("审核提交失败")
+        raise HTTPException(status_code=500, detail="审核提交失败，请稍后重试")
+
+@router.post("/audit/batch", response_model=AuditResponse)
+async def submit_audit_batch(
+    batch: AuditBatchRequest,
+    current_auditor: AuditorPrincipal = Depends(get_current_auditor),
+    db: AsyncSession = Depends(get_write_db)
+):
+    """批量提交审核结果（一次查询取出工作流，批量写入，一次提交），返回每一项的处理结果"""
+    try:
+        results = await AuditWorkflowService.process_audit_batch(db, current_auditor.id, batch.items)
+        await db.commit()
+    except WorkflowConflictError as e:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception:
+        await db.rollback()
+        logger.exception("批量审核提交失败")
+        raise HTTPException(status_code=500, detail="批量审核提交失败，请稍后重试")
+    
+    succeeded = [result for result in results if result["success"]]
+    for result in succeeded:
+        AUDITS.labels(result["audit_level"], result["audit_status"]).inc()
+        # 客户状态可能已变化，删除投资建议缓存
+        await advice_cache.invalidate(result["customer_id"])
+    
+    return AuditResponse(
+        message="批量审核提交完成",
+        data={
+            "total": len(results),
+            "success_count": len(succeeded),
+            "failed_count": len(results) - len(succeeded),
+            "results": results
+        }
+    )
@@ -4,12 +4,107 @@ from typing import Optional
 class Settings(BaseSettings):
     # SQLite数据库配置（用于快速测试）
     database_url: str = "sqlite:///./finance_athena.db"
+
+    # 应用启动时创建缺少的数据表（本地开发用，生产环境使用 database/init.sql 建表）
+    create_schema_on_startup: bool = False
+
+    # 连接池配置：pool_recycle 需小于MySQL的 wait_timeout，pool_pre_ping 在取出连接时检测断开的连接
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_pool_timeout: int = 30
+    db_pool_recycle: int = 3600
+    db_pool_pre_ping: bool = True
+
+    # 读写分离：只读副本的数据库URL（多个用逗号分隔，为空时读请求也使用主库），读请求轮询分配健康的副本；
+    # 后台定期执行 SELECT 1 检查副本，检查失败或连接断开的副本暂停分配，恢复后重新加入；
+    # read_your_writes 开启时，请求中提交过写入后，该请求之后的读取使用主库
+    database_replica_urls: str = ""
+    replica_health_check_interval_seconds: float = 5.0
+    replica_health_check_timeout_seconds: float = 2.0
+    read_your_writes: bool = True
+
+    # SQLite配置：连接池大小（不允许溢出）和每个连接建立时执行的PRAGMA
+    sqlite_pool_size: int = 5
+    sqlite_pragmas_enabled: bool = True
+    sqlite_journal_mode: str = "WAL"
+    sqlite_synchronous: str = "NORMAL"
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_cache_size_kb: int = 65536
+    sqlite_mmap_size: int = 268435456
+    sqlite_temp_store: str = "MEMORY"
     
     # JWT配置
     secret_key: str = "your-secret-key-change-in-production"
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
     
+    # 认证身份缓存配置：已解析的审核员身份缓存时间（秒）和最大条目数
+    auth_cache_ttl_seconds: int = 60
+    auth_cache_max_size: int = 1024
+    
+    # 密码计算池配置：bcrypt在独立线程/进程中执行，排队超过上限时返回503
+    password_hash_workers: int = 4
+    password_hash_max_pending: int = 64
+    password_hash_use_processes: bool = False
+    
+    # 审核员分配配置：内存中的审核员工作量定期从数据库校正的间隔（秒）
+    auditor_pool_refresh_seconds: int = 60
+
+    # 投资建议缓存配置：local 为进程内LRU，redis 为多实例共享（需安装 redis 包并配置 REDIS_URL）；
+    # 进程内缓存只能删除本进程的条目，其他worker在 advice_cache_local_ttl_seconds 内可能返回审核前的状态
+    advice_cache_backend: str = "local"
+    advice_cache_ttl_seconds: int = 300
+    advice_cache_local_ttl_seconds: int = 10
+    advice_cache_max_size: int = 10000
+    redis_url: Optional[str] = "redis://localhost:6379"
+
+    # 数据导出配置：服务端游标每批读取的行数，允许通过接口导出的审核员级别（逗号分隔，导出含客户手机号和身份证号）
+    export_batch_size: int = 5000
+    export_allowed_roles: str = "expert,committee"
+
+    # 通知发件箱配置：后台任务按批轮询待发送通知，失败后按指数退避重试，超过最大次数标记为失败
+    notification_dispatcher_enabled: bool = True
+    notification_transport: str = "local"
+    notification_batch_size: int = 100
+    notification_poll_interval_seconds: float = 1.0
+    notification_send_concurrency: int = 10
+    notification_max_attempts: int = 5
+    notification_retry_base_seconds: float = 2.0
+    notification_retry_max_seconds: float = 300.0
+    notification_lease_seconds: int = 60
+
+    # 监控配置：开启后记录请求指标，并在 /metrics 以Prometheus文本格式输出
+    metrics_enabled: bool = True
+
+    # SQL监控配置：统计每个请求的语句数和数据库耗时，记录慢查询，同一语句在一个请求内执行超过阈值次数时告警（N+1）
+    # sql_echo 输出全部SQL，只在排查问题时临时开启
+    sql_instrumentation_enabled: bool = True
+    slow_query_threshold_ms: float = 200
+    n_plus_one_threshold: int = 10
+    sql_echo: bool = False
+
+    # 注册查重预过滤：启动时把已注册的手机号和身份证号加载到进程内的布隆过滤器，
+    # 容量至少为现有客户数的两倍，误判率越低占用内存越多（容量1000万、1%误判率约占用23MB）
+    registration_filter_enabled: bool = True
+    registration_filter_capacity: int = 1000000
+    registration_filter_error_rate: float = 0.01
+
+    # 审核员事件推送（SSE）：每个连接的事件队列长度（积压超过时丢弃并通知客户端重新加载）、
+    # 每个进程的最大连接数、空闲时发送保活注释的间隔（秒）、建立连接用的票据有效期（秒）
+    auditor_events_queue_size: int = 100
+    auditor_events_max_connections: int = 10000
+    auditor_events_keepalive_seconds: float = 15.0
+    auditor_events_ticket_seconds: int = 60
+
+    # ID生成器配置：雪花ID的工作节点ID（0-1023），每个进程必须不同；
+    # 不设置时由主机名和进程号推导（可能冲突，只用于开发环境），DEBUG=false 时不设置则拒绝启动
+    worker_id: Optional[int] = None
+
+    # 时区：月度投资汇总按 timezone 的当前时间确定月份；
+    # database_timezone 为数据库时钟写入的时间（审核时间等）所在的时区，SQLite为UTC，MySQL为会话的 time_zone
+    timezone: str = "Asia/Shanghai"
+    database_timezone: str = "UTC"
+
     # 应用配置
     app_name: str = "银行投资风险审核系统"
     debug: bool = True
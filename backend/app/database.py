@@ -1,25 +1,373 @@
-from sqlalchemy import create_engine
+import asyncio
+import itertools
+import logging
+import traceback
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Tuple
+from fastapi import Depends
+from sqlalchemy import create_engine, event, inspect, make_url, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-from .config import settings
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from .config import Settings, settings
 
-# 创建数据库引擎
-engine = create_engine(
-    settings.database_url,
-    echo=settings.debug,
-    connect_args={"check_same_thread": False} if "sqlite" in settings.database_url else {}
-)
+logger = logging.getLogger(__name__)
 
-# 创建会话工厂
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# 同步驱动 -> 异步驱动映射
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+    "mysql": "mysql+aiomysql",
+    "mysql+pymysql": "mysql+aiomysql",
+}
+
+def get_async_database_url(database_url: str) -> str:
+    """将同步数据库URL转换为异步驱动URL"""
+    scheme, sep, rest = database_url.partition("://")
+    return f"{ASYNC_DRIVERS.get(scheme, scheme)}{sep}{rest}"
+
+def is_sqlite(database_url: str) -> bool:
+    return make_url(database_url).get_backend_name() == "sqlite"
+
+def sqlite_pragmas(app_settings: Settings = settings) -> List[Tuple[str, Any]]:
+    """每个SQLite连接建立时执行的PRAGMA（WAL模式下读写互不阻塞，写冲突时等待而不是立即报 database is locked）"""
+    return [
+        ("journal_mode", app_settings.sqlite_journal_mode),
+        ("synchronous", app_settings.sqlite_synchronous),
+        ("busy_timeout", app_settings.sqlite_busy_timeout_ms),
+        # 负数表示以KB为单位
+        ("cache_size", -app_settings.sqlite_cache_size_kb),
+        ("mmap_size", app_settings.sqlite_mmap_size),
+        ("temp_store", app_settings.sqlite_temp_store)
+    ]
+
+def apply_sqlite_pragmas(engine: Engine, pragmas: Optional[List[Tuple[str, Any]]] = None):
+    """在引擎的每个新连接上执行PRAGMA（异步引擎传入 async_engine.sync_engine）"""
+    pragmas = sqlite_pragmas() if pragmas is None else pragmas
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas:
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+def engine_options(database_url: str, is_async: bool = False, app_settings: Settings = settings) -> Dict[str, Any]:
+    """
+    创建引擎的参数
+
+    SQLite文件数据库也使用连接池（异步驱动默认不复用连接），避免每次请求重新建立连接和执行PRAGMA。
+    SQLite同一时刻只允许一个写事务，连接池不允许溢出：并发请求在连接池中排队，
+    而不是同时持有连接在数据库锁上轮询等待（大量连接同时写入时会超过busy_timeout报 database is locked）。
+    pool_recycle 和 pool_pre_ping 只对MySQL等服务端数据库有意义。
+    """
+    options: Dict[str, Any] = {"echo": app_settings.sql_echo, "pool_timeout": app_settings.db_pool_timeout}
+    if is_sqlite(database_url):
+        options["connect_args"] = {"check_same_thread": False}
+        if make_url(database_url).database in (None, "", ":memory:"):
+            del options["pool_timeout"]
+            return options
+        if is_async:
+            options["poolclass"] = AsyncAdaptedQueuePool
+        options["pool_size"] = app_settings.sqlite_pool_size
+        options["max_overflow"] = 0
+    else:
+        options["pool_size"] = app_settings.db_pool_size
+        options["max_overflow"] = app_settings.db_max_overflow
+        options["pool_recycle"] = app_settings.db_pool_recycle
+        options["pool_pre_ping"] = app_settings.db_pool_pre_ping
+    return options
+
+def parse_replica_urls(value: str) -> List[str]:
+    """解析逗号分隔的只读副本URL"""
+    return [url.strip() for url in value.split(",") if url.strip()]
 
 # 创建基础模型类
 Base = declarative_base()
 
-# 依赖注入函数
-def get_db():
-    db = SessionLocal()
-    try:
+# 当前请求是否已在主库提交过（读己之写）
+_request_committed: ContextVar[bool] = ContextVar("request_committed", default=False)
+
+class PrimarySession(Session):
+    """主库会话（提交后标记当前请求已写入）"""
+
+@event.listens_for(PrimarySession, "after_commit")
+def _mark_request_committed(session: Session):
+    _request_committed.set(True)
+
+class ReadSession(Session):
+    """
+    只读会话：语句发往创建时分配的只读副本
+
+    开启 read_your_writes 且当前请求已在主库提交过时改用主库，读到刚提交的数据。
+    每条语句执行前判断，会话在提交之前创建也能生效。
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        replica = self.info.get("replica")
+        if replica is not None and not (self.info.get("read_your_writes") and _request_committed.get()):
+            return replica
+        return super().get_bind(mapper=mapper, clause=clause, **kw)
+
+class ReplicaSet:
+    """
+    只读副本集合：轮询分配健康的副本，全部不可用时返回 None（由调用方改用主库）
+
+    后台任务定期对每个副本执行 SELECT 1，失败或超时的副本暂停分配，恢复后重新加入；
+    请求中遇到连接断开时立即标记为不可用，不必等到下次检查。
+    """
+
+    def __init__(self, urls: List[str], engines: List[AsyncEngine], check_interval: float = 5.0, check_timeout: float = 2.0):
+        self.urls = urls
+        self.engines = engines
+        self.check_interval = check_interval
+        self.check_timeout = check_timeout
+        self.healthy = [True] * len(engines)
+        self._counter = itertools.count()
+        self._task: Optional[asyncio.Task] = None
+        for index, engine in enumerate(engines):
+            event.listen(engine.sync_engine, "handle_error", self._disconnect_listener(index))
+
+    def _disconnect_listener(self, index: int):
+        def on_error(context):
+            if context.is_disconnect:
+                self.mark(index, False)
+        return on_error
+
+    def mark(self, index: int, healthy: bool):
+        if self.healthy[index] != healthy:
+            if healthy:
+                logger.info("只读副本 %d 已恢复", index)
+            else:
+                logger.warning("只读副本 %d 不可用，读请求暂时分配到其他副本或主库", index)
+        self.healthy[index] = healthy
+
+    def pick(self) -> Optional[AsyncEngine]:
+        """轮询选择下一个健康的副本"""
+        available = [engine for engine, healthy in zip(self.engines, self.healthy) if healthy]
+        if not available:
+            return None
+        return available[next(self._counter) % len(available)]
+
+    async def _ping(self, engine: AsyncEngine):
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    async def check(self):
+        """检查所有副本"""
+        for index, engine in enumerate(self.engines):
+            try:
+                await asyncio.wait_for(self._ping(engine), self.check_timeout)
+                healthy = True
+            except Exception:
+                healthy = False
+            self.mark(index, healthy)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.check_interval)
+            await self.check()
+
+    def start(self):
+        if self.engines and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def dispose(self):
+        await self.stop()
+        for engine in self.engines:
+            await engine.dispose()
+
+class Database:
+    """
+    数据库引擎和会话工厂
+
+    导入本模块不创建引擎：应用启动时由 lifespan 调用 configure 后创建，
+    脚本和测试中首次访问 engine / async_engine 等属性时按全局配置创建。
+    同步引擎只供初始化脚本等离线任务使用，API请求使用异步引擎（不阻塞事件循环）。
+    配置了只读副本时，read_session 创建的会话读取副本，其余会话都使用主库。
+    """
+
+    def __init__(self, app_settings: Settings = settings):
+        self.settings = app_settings
+        self._engine: Optional[Engine] = None
+        self._async_engine: Optional[AsyncEngine] = None
+        self._session_factory: Optional[sessionmaker] = None
+        self._async_session_factory: Optional[async_sessionmaker] = None
+        self._read_session_factory: Optional[async_sessionmaker] = None
+        self._replicas: Optional[ReplicaSet] = None
+
+    def configure(self, app_settings: Settings):
+        """使用指定配置（引擎已按其他数据库创建时报错）"""
+        if self.created and app_settings.database_url != self.settings.database_url:
+            raise RuntimeError("数据库引擎已按其他 DATABASE_URL 创建")
+        if self._replicas is not None and parse_replica_urls(app_settings.database_replica_urls) != self._replicas.urls:
+            raise RuntimeError("只读副本已按其他 DATABASE_REPLICA_URLS 创建")
+        self.settings = app_settings
+
+    @property
+    def created(self) -> bool:
+        return self._engine is not None or self._async_engine is not None
+
+    def _use_pragmas(self) -> bool:
+        return is_sqlite(self.settings.database_url) and self.settings.sqlite_pragmas_enabled
+
+    @property
+    def engine(self) -> Engine:
+        if self._engine is None:
+            database_url = self.settings.database_url
+            self._engine = create_engine(database_url, **engine_options(database_url, app_settings=self.settings))
+            if self._use_pragmas():
+                apply_sqlite_pragmas(self._engine, sqlite_pragmas(self.settings))
+        return self._engine
+
+    def _create_async_engine(self, database_url: str) -> AsyncEngine:
+        async_engine = create_async_engine(
+            get_async_database_url(database_url),
+            **engine_options(database_url, is_async=True, app_settings=self.settings)
+        )
+        if is_sqlite(database_url) and self.settings.sqlite_pragmas_enabled:
+            apply_sqlite_pragmas(async_engine.sync_engine, sqlite_pragmas(self.settings))
+        return async_engine
+
+    @property
+    def async_engine(self) -> AsyncEngine:
+        if self._async_engine is None:
+            self._async_engine = self._create_async_engine(self.settings.database_url)
+        return self._async_engine
+
+    @property
+    def replicas(self) -> ReplicaSet:
+        """只读副本（按 DATABASE_REPLICA_URLS 创建，未配置时为空）"""
+        if self._replicas is None:
+            urls = parse_replica_urls(self.settings.database_replica_urls)
+            self._replicas = ReplicaSet(
+                urls,
+                [self._create_async_engine(url) for url in urls],
+                check_interval=self.settings.replica_health_check_interval_seconds,
+                check_timeout=self.settings.replica_health_check_timeout_seconds
+            )
+        return self._replicas
+
+    @property
+    def session_factory(self) -> sessionmaker:
+        if self._session_factory is None:
+            self._session_factory = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        return self._session_factory
+
+    @property
+    def async_session_factory(self) -> async_sessionmaker:
+        if self._async_session_factory is None:
+            self._async_session_factory = async_sessionmaker(
+                self.async_engine,
+                class_=AsyncSession,
+                sync_session_class=PrimarySession,
+                autoflush=False,
+                expire_on_commit=False
+            )
+        return self._async_session_factory
+
+    @property
+    def read_session_factory(self) -> async_sessionmaker:
+        if self._read_session_factory is None:
+            self._read_session_factory = async_sessionmaker(
+                self.async_engine,
+                class_=AsyncSession,
+                sync_session_class=ReadSession,
+                autoflush=False,
+                expire_on_commit=False
+            )
+        return self._read_session_factory
+
+    def pick_replica(self) -> Optional[AsyncEngine]:
+        """轮询选择健康的只读副本，未配置副本或全部不可用时返回 None"""
+        return self.replicas.pick() if self.settings.database_replica_urls else None
+
+    def read_session(self, replica: Optional[AsyncEngine] = None) -> AsyncSession:
+        """只读会话：读取指定的（未指定时轮询分配健康的）只读副本，未配置副本或全部不可用时使用主库"""
+        if replica is None:
+            replica = self.pick_replica()
+        return self.read_session_factory(info={
+            "replica": replica.sync_engine if replica is not None else None,
+            "read_your_writes": self.settings.read_your_writes
+        })
+
+    async def create_schema(self):
+        """创建缺少的数据表（调用前需已导入全部模型）"""
+        async with self.async_engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+    async def missing_tables(self) -> List[str]:
+        """主库中缺少的数据表（调用前需已导入全部模型）"""
+        async with self.async_engine.connect() as conn:
+            existing = set(await conn.run_sync(lambda sync_conn: inspect(sync_conn).get_table_names()))
+        return [name for name in Base.metadata.tables if name not in existing]
+
+    async def dispose(self):
+        """关闭连接池中的连接（引擎仍可继续使用；只读副本停止检查并释放，下次使用时按配置重新创建）"""
+        if self._async_engine is not None:
+            await self._async_engine.dispose()
+        if self._engine is not None:
+            self._engine.dispose()
+        if self._replicas is not None:
+            await self._replicas.dispose()
+            self._replicas = None
+
+# 全局数据库
+database = Database()
+
+# 兼容旧的模块级名称：from app.database import engine, async_engine, SessionLocal, AsyncSessionLocal
+_LAZY_ATTRIBUTES = {
+    "engine": "engine",
+    "async_engine": "async_engine",
+    "SessionLocal": "session_factory",
+    "AsyncSessionLocal": "async_session_factory"
+}
+
+def __getattr__(name: str):
+    if name in _LAZY_ATTRIBUTES:
+        return getattr(database, _LAZY_ATTRIBUTES[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# 依赖注入函数（依赖在请求开始时解析，此时清除上一个请求在同一上下文中留下的写入标记）
+async def get_write_db():
+    """主库会话：写入以及需要读到最新数据的请求"""
+    _request_committed.set(False)
+    async with database.async_session_factory() as db:
         yield db
-    finally:
-        db.close()
+
+async def get_read_db(write_db: AsyncSession = Depends(get_write_db)):
+    """
+    只读会话：工作台、客户查询、导出等只读请求，读取只读副本
+
+    未配置副本或全部不可用时直接使用本请求的主库会话（同一请求中的依赖只解析一次），
+    不为同一个请求从主库连接池再取一个连接。主库会话在第一次执行语句时才取连接，读取副本时不占用主库连接。
+    """
+    replica = database.pick_replica()
+    if replica is None:
+        yield write_db
+        return
+    async with database.read_session(replica) as db:
+        yield db
+
+# 兼容旧名称
+get_db = get_write_db
+
+def release_failed_statement(error: Exception):
+    """
+    立即释放执行失败的语句（捕获数据库异常并继续处理请求时调用）
+
+    aiosqlite 执行失败时游标没有关闭，被异常回溯引用，之后由垃圾回收在事件循环线程中释放；
+    释放时需要等待该连接的锁，如果该连接正在等待写锁（busy_timeout），整个事件循环会被阻塞。
+    """
+    traceback.clear_frames(error.__traceback__)
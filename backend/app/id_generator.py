@@ -0,0 +1,109 @@
+import os
+import socket
+import threading
+import time
+import zlib
+from typing import Callable, List, Optional, Tuple
+from .config import settings
+
+# 自定义纪元 2024-01-01 00:00:00 UTC（毫秒），41位时间戳可用约69年
+EPOCH_MS = 1704067200000
+
+WORKER_ID_BITS = 10
+SEQUENCE_BITS = 12
+MAX_WORKER_ID = (1 << WORKER_ID_BITS) - 1
+MAX_SEQUENCE = (1 << SEQUENCE_BITS) - 1
+
+def _now_ms() -> int:
+    return time.time_ns() // 1_000_000
+
+def default_worker_id() -> int:
+    """
+    未配置 WORKER_ID 时的工作节点ID：由主机名和进程号哈希得到
+
+    容器中的进程号通常都是1，只用进程号时各容器必然冲突；加入主机名（容器ID）后不同容器一般不同，
+    但只有1024个取值，仍可能冲突，因此只用于开发环境和离线脚本，生产环境（DEBUG=false）启动时要求配置 WORKER_ID。
+    """
+    return zlib.crc32(f"{socket.gethostname()}:{os.getpid()}".encode()) & MAX_WORKER_ID
+
+class SnowflakeIdGenerator:
+    """
+    雪花算法ID生成器：41位毫秒时间戳 + 10位工作节点ID + 12位序列号，共63位（BIGINT正数）
+
+    同一工作节点每毫秒最多生成4096个ID，按生成时间递增（k-sortable），不依赖数据库自增，
+    不同工作节点（进程）的ID互不冲突。线程安全。
+    时钟回拨时沿用上一次的时间戳继续递增序列号，序列号用完时借用下一毫秒，ID始终递增，不会阻塞。
+
+    worker_id 未指定时由主机名和进程号推导（见 default_worker_id，fork 出的子进程自动重新取值），可能冲突；
+    部署时应通过 WORKER_ID 为每个进程配置不同的值。
+    """
+
+    def __init__(self, worker_id: Optional[int] = None, clock: Callable[[], int] = _now_ms):
+        self._configured_worker_id = self._validate(worker_id)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._reset()
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._reset)
+
+    @staticmethod
+    def _validate(worker_id: Optional[int]) -> Optional[int]:
+        if worker_id is not None and not 0 <= worker_id <= MAX_WORKER_ID:
+            raise ValueError(f"worker_id 必须在 0 到 {MAX_WORKER_ID} 之间")
+        return worker_id
+
+    @property
+    def configured(self) -> bool:
+        """是否显式配置了工作节点ID"""
+        return self._configured_worker_id is not None
+
+    def configure(self, worker_id: Optional[int]):
+        """使用指定的工作节点ID（应用启动时按配置调用）"""
+        worker_id = self._validate(worker_id)
+        with self._lock:
+            self._configured_worker_id = worker_id
+            self.worker_id = worker_id if worker_id is not None else default_worker_id()
+
+    def _reset(self):
+        self.worker_id = self._configured_worker_id
+        if self.worker_id is None:
+            self.worker_id = default_worker_id()
+        self._last_timestamp = -1
+        self._sequence = 0
+
+    def _next(self) -> int:
+        timestamp = max(self._clock() - EPOCH_MS, self._last_timestamp)
+        if timestamp == self._last_timestamp:
+            self._sequence = (self._sequence + 1) & MAX_SEQUENCE
+            if self._sequence == 0:
+                # 本毫秒的序列号已用完，借用下一毫秒
+                timestamp += 1
+        else:
+            self._sequence = 0
+        self._last_timestamp = timestamp
+        return (timestamp << (WORKER_ID_BITS + SEQUENCE_BITS)) | (self.worker_id << SEQUENCE_BITS) | self._sequence
+
+    def next_id(self) -> int:
+        """生成一个ID"""
+        with self._lock:
+            return self._next()
+
+    def next_ids(self, count: int) -> List[int]:
+        """批量生成ID（只加一次锁）"""
+        with self._lock:
+            return [self._next() for _ in range(count)]
+
+def parse_id(snowflake_id: int) -> Tuple[int, int, int]:
+    """拆分ID，返回 (Unix毫秒时间戳, 工作节点ID, 序列号)"""
+    return (
+        (snowflake_id >> (WORKER_ID_BITS + SEQUENCE_BITS)) + EPOCH_MS,
+        (snowflake_id >> SEQUENCE_BITS) & MAX_WORKER_ID,
+        snowflake_id & MAX_SEQUENCE
+    )
+
+# 全局ID生成器
+id_generator = SnowflakeIdGenerator(worker_id=settings.worker_id)
+
+def next_id() -> int:
+    """生成一个ID（用作模型字段的默认值）"""
+    return id_generator.next_id()
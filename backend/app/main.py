@@ -1,51 +1,175 @@
+import logging
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import List
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
-from .database import engine
-from .models import Base
-from .api import customers_router, auditors_router, workflow_router
-from .config import settings
-
-# 创建数据库表
-Base.metadata.create_all(bind=engine)
-
-# 创建FastAPI应用
-app = FastAPI(
-    title=settings.app_name,
-    description="银行投资风险审核系统API",
-    version="1.0.0"
+from fastapi.responses import FileResponse, Response
+from prometheus_client import CONTENT_TYPE_LATEST
+from .database import database
+from .api import customers_router, auditors_router, workflow_router, exports_router
+from .config import Settings, settings
+from .id_generator import id_generator
+from .services.auditor_scheduler import auditor_scheduler
+from .utils.auth import principal_cache
+from .utils.password import password_hasher
+from .utils.notification_dispatcher import notification_dispatcher
+from .utils.advice_cache import advice_cache
+from .utils.registration_filter import registration_filter
+from .utils.metrics import (
+    PrometheusMiddleware, PoolCollector, StatsCollector, instrument_engine, register_collector, render_metrics
 )
+from .utils.sql_instrumentation import SQLInstrumentationMiddleware, instrument_sql
 
-# 配置CORS
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],  # 生产环境中应该指定具体的前端域名
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+logger = logging.getLogger(__name__)
+
+# 前端页面目录（与启动时的工作目录无关）
+FRONTEND_DIR = Path(__file__).resolve().parents[2] / "frontend"
+
+# create_app 按传入配置生效的项：数据库（连接、连接池、SQLite、只读副本、SQL日志）、工作节点ID和功能开关。
+# 其余配置（JWT、认证缓存、密码计算池、投资建议缓存、通知发送、注册过滤器容量、事件推送、时区等）
+# 由模块级单例在导入时或调用时读取全局 settings（环境变量和 .env），传入不同的值不生效
+APP_SETTINGS_FIELDS = {
+    "database_url", "create_schema_on_startup", "sql_echo", "worker_id", "app_name", "debug",
+    "db_pool_size", "db_max_overflow", "db_pool_timeout", "db_pool_recycle", "db_pool_pre_ping",
+    "database_replica_urls", "replica_health_check_interval_seconds", "replica_health_check_timeout_seconds",
+    "read_your_writes",
+    "sqlite_pool_size", "sqlite_pragmas_enabled", "sqlite_journal_mode", "sqlite_synchronous",
+    "sqlite_busy_timeout_ms", "sqlite_cache_size_kb", "sqlite_mmap_size", "sqlite_temp_store",
+    "metrics_enabled", "sql_instrumentation_enabled", "slow_query_threshold_ms", "n_plus_one_threshold",
+    "notification_dispatcher_enabled", "registration_filter_enabled"
+}
+
+def ignored_settings(app_settings: Settings) -> List[str]:
+    """app_settings 中与全局配置不同、但 create_app 不会使用的配置项"""
+    return sorted(
+        name for name in Settings.model_fields
+        if name not in APP_SETTINGS_FIELDS and getattr(app_settings, name) != getattr(settings, name)
+    )
+
+def create_app(app_settings: Settings = settings) -> FastAPI:
+    """
+    创建FastAPI应用
+
+    创建应用时不连接数据库：引擎在应用启动（lifespan）时按 app_settings 创建，关闭时释放连接。
+    表结构不在启动时自动创建，需要时设置 CREATE_SCHEMA_ON_STARTUP=true（本地开发），
+    生产环境使用 database/init.sql 建表；缺少数据表时拒绝启动。
+    app_settings 只有 APP_SETTINGS_FIELDS 中的项生效，其他项与全局配置不同时记录警告。
+    """
+    ignored = ignored_settings(app_settings)
+    if ignored:
+        logger.warning("以下配置只读取全局 settings（环境变量），create_app 传入的值不生效: %s", ", ".join(ignored))
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        # 多实例部署时自动推导的雪花ID工作节点ID可能冲突，生产环境必须显式配置
+        if app_settings.worker_id is None and not app_settings.debug:
+            raise RuntimeError("未配置 WORKER_ID：DEBUG=false 时每个进程必须配置不同的雪花ID工作节点ID（0-1023）")
+        id_generator.configure(app_settings.worker_id)
+        database.configure(app_settings)
+        if app_settings.metrics_enabled:
+            instrument_engine(database.async_engine)
+        if app_settings.sql_instrumentation_enabled:
+            for async_engine in [database.async_engine] + database.replicas.engines:
+                instrument_sql(async_engine.sync_engine, app_settings.slow_query_threshold_ms)
+        if app_settings.create_schema_on_startup:
+            await database.create_schema()
+        else:
+            missing = await database.missing_tables()
+            if missing:
+                await database.dispose()
+                raise RuntimeError(
+                    f"数据库缺少数据表（{', '.join(missing)}）：先执行 database/init.sql 建表，"
+                    "或在本地开发时设置 CREATE_SCHEMA_ON_STARTUP=true"
+                )
+
+        # 从数据库构建审核员分配池
+        async with database.async_session_factory() as db:
+            await auditor_scheduler.rebuild(db)
+        # 启动通知发件箱后台任务
+        if app_settings.notification_dispatcher_enabled:
+            notification_dispatcher.start()
+        # 定期检查只读副本
+        database.replicas.start()
+        # 在后台加载注册查重过滤器
+        if app_settings.registration_filter_enabled:
+            registration_filter.start(database.async_session_factory)
+        try:
+            yield
+        finally:
+            await registration_filter.stop()
+            await notification_dispatcher.stop()
+            await advice_cache.close()
+            password_hasher.shutdown()
+            await database.dispose()
+
+    app = FastAPI(
+        title=app_settings.app_name,
+        description="银行投资风险审核系统API",
+        version="1.0.0",
+        lifespan=lifespan
+    )
+
+    # 配置CORS
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],  # 生产环境中应该指定具体的前端域名
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    # 请求指标和连接池指标
+    if app_settings.metrics_enabled:
+        app.add_middleware(PrometheusMiddleware)
+        register_collector("db_pool", PoolCollector(lambda: database.async_engine if database.created else None))
+        register_collector("stats", StatsCollector(advice_cache, notification_dispatcher, principal_cache))
+
+    # 每个请求的SQL统计、慢查询日志和N+1检测（调试模式下通过响应头返回统计）
+    if app_settings.sql_instrumentation_enabled:
+        app.add_middleware(
+            SQLInstrumentationMiddleware,
+            n_plus_one_threshold=app_settings.n_plus_one_threshold,
+            expose_headers=app_settings.debug
+        )
+
+    # 挂载静态文件（只部署后端时没有前端目录）
+    if FRONTEND_DIR.is_dir():
+        app.mount("/static", StaticFiles(directory=FRONTEND_DIR), name="static")
+
+    # 注册路由
+    app.include_router(customers_router)
+    app.include_router(auditors_router)
+    app.include_router(workflow_router)
+    app.include_router(exports_router)
+
+    @app.get("/")
+    async def root():
+        return FileResponse(FRONTEND_DIR / "index.html")
 
-# 挂载静态文件
-app.mount("/static", StaticFiles(directory="../frontend"), name="static")
+    @app.get("/customer.html")
+    async def customer_page():
+        return FileResponse(FRONTEND_DIR / "customer.html")
 
-# 注册路由
-app.include_router(customers_router)
-app.include_router(auditors_router)
-app.include_router(workflow_router)
+    @app.get("/auditor.html")
+    async def auditor_page():
+        return FileResponse(FRONTEND_DIR / "auditor.html")
 
-@app.get("/")
-async def root():
-    return FileResponse("../frontend/index.html")
+    @app.get("/health")
+    async def health_check():
+        return {"status": "healthy"}
 
-@app.get("/customer.html")
-async def customer_page():
-    return FileResponse("../frontend/customer.html")
+    if app_settings.metrics_enabled:
+        @app.get("/metrics", include_in_schema=False)
+        async def metrics():
+            """Prometheus指标"""
+            return Response(
+                await render_metrics(database.async_session_factory),
+                headers={"Content-Type": CONTENT_TYPE_LATEST}
+            )
 
-@app.get("/auditor.html")
-async def auditor_page():
-    return FileResponse("../frontend/auditor.html")
+    return app
 
-@app.get("/health")
-async def health_check():
-    return {"status": "healthy"}
+# uvicorn app.main:app 使用的默认应用（也可以 uvicorn --factory app.main:create_app）
+app = create_app()
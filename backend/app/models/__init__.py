@@ -1,6 +1,7 @@
 from .customer import Customer
 from .auditor import Auditor
 from .workflow import AuditWorkflow, AuditRecord, RiskAssessment, InvestmentAdvice, Notification
+from .investment_rollup import InvestmentRollup
 from ..database import Base
 
 __all__ = [
@@ -11,5 +12,6 @@ __all__ = [
     "AuditRecord",
     "RiskAssessment",
     "InvestmentAdvice",
-    "Notification"
+    "Notification",
+    "InvestmentRollup"
 ]
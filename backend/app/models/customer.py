@@ -1,7 +1,8 @@
-from sqlalchemy import Column, Integer, String, DECIMAL, Enum, DateTime, Text
+from sqlalchemy import Column, Integer, BigInteger, String, DECIMAL, Enum, DateTime, Text, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from ..database import Base
+from ..id_generator import next_id
 import enum
 
 class RiskLevel(enum.Enum):
@@ -16,8 +17,18 @@ class CustomerStatus(enum.Enum):
 
 class Customer(Base):
     __tablename__ = "customers"
+    __table_args__ = (
+        # 按状态筛选客户；包含投资金额，按状态汇总金额时只需扫描索引
+        Index("ix_customers_status_amount", "status", "investment_amount"),
+        # 客户列表游标分页：按 (created_at, id) 倒序，可选按状态或风险等级筛选
+        Index("ix_customers_created_id", "created_at", "id"),
+        Index("ix_customers_status_created_id", "status", "created_at", "id"),
+        Index("ix_customers_risk_level_created_id", "risk_level", "created_at", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
+    # 对外的申请编号（雪花ID），不依赖数据库自增主键
+    application_no = Column(BigInteger, nullable=False, unique=True, default=next_id, comment="申请编号")
     name = Column(String(50), nullable=False, comment="姓名")
     phone = Column(String(20), nullable=False, unique=True, comment="手机号")
     id_card = Column(String(18), nullable=False, unique=True, comment="身份证号")
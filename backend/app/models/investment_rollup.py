@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, String, DECIMAL, Enum, DateTime
+from sqlalchemy.sql import func
+from ..database import Base
+from .customer import RiskLevel
+
+class InvestmentRollup(Base):
+    """按月份和风险等级汇总的审核结果（审核完成时在同一事务中累加，可从客户和审核记录重建）"""
+    __tablename__ = "investment_rollups"
+    
+    # 月份按审核完成时应用时区（settings.timezone）的时间计算（YYYY-MM）
+    month = Column(String(7), primary_key=True, comment="月份")
+    risk_level = Column(Enum(RiskLevel), primary_key=True, comment="风险等级")
+    approved_count = Column(Integer, nullable=False, default=0, server_default="0", comment="通过客户数")
+    approved_amount = Column(DECIMAL(18, 2), nullable=False, default=0, server_default="0", comment="通过客户的投资金额")
+    rejected_count = Column(Integer, nullable=False, default=0, server_default="0", comment="拒绝客户数")
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
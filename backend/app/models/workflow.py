@@ -1,7 +1,8 @@
-from sqlalchemy import Column, Integer, String, DECIMAL, Enum, DateTime, Text, ForeignKey, JSON
+from sqlalchemy import Column, Integer, BigInteger, String, DECIMAL, Enum, DateTime, Text, ForeignKey, JSON, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from ..database import Base
+from ..id_generator import next_id
 import enum
 
 class AuditLevel(enum.Enum):
@@ -36,7 +37,7 @@ class RiskAssessment(Base):
     __tablename__ = "risk_assessments"
     
     id = Column(Integer, primary_key=True, index=True)
-    customer_id = Column(Integer, ForeignKey("customers.id"), nullable=False)
+    customer_id = Column(Integer, ForeignKey("customers.id"), nullable=False, index=True)
     assessment_data = Column(JSON, comment="评估问卷数据")
     risk_score = Column(Integer, nullable=False, comment="风险评分")
     risk_level = Column(String(20), nullable=False)
@@ -48,7 +49,7 @@ class InvestmentAdvice(Base):
     __tablename__ = "investment_advice"
     
     id = Column(Integer, primary_key=True, index=True)
-    customer_id = Column(Integer, ForeignKey("customers.id"), nullable=False)
+    customer_id = Column(Integer, ForeignKey("customers.id"), nullable=False, index=True)
     portfolio_type = Column(String(20), nullable=False)
     expected_return_min = Column(DECIMAL(5, 2), comment="预期最低收益")
     expected_return_max = Column(DECIMAL(5, 2), comment="预期最高收益")
@@ -60,13 +61,21 @@ class InvestmentAdvice(Base):
 
 class AuditWorkflow(Base):
     __tablename__ = "audit_workflow"
+    __table_args__ = (
+        # 审核员待办查询：get_pending_workflows、工作台统计
+        Index("ix_audit_workflow_auditor_status", "assigned_auditor_id", "workflow_status"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
-    customer_id = Column(Integer, ForeignKey("customers.id"), nullable=False)
+    # 对外的流程编号（雪花ID），注册时返回给客户
+    workflow_no = Column(BigInteger, nullable=False, unique=True, default=next_id, comment="流程编号")
+    customer_id = Column(Integer, ForeignKey("customers.id"), nullable=False, index=True)
     current_level = Column(Enum(AuditLevel), nullable=False)
     workflow_status = Column(Enum(WorkflowStatus), default=WorkflowStatus.pending)
     assigned_auditor_id = Column(Integer, ForeignKey("auditors.id"), comment="当前审核员ID")
     next_level = Column(Enum(AuditLevel), comment="下一级审核")
+    # 乐观锁：每次状态流转加一，流转以条件UPDATE执行
+    version = Column(Integer, nullable=False, default=1, server_default="1", comment="版本号")
     created_at = Column(DateTime, default=func.now())
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
     
@@ -75,6 +84,10 @@ class AuditWorkflow(Base):
 
 class AuditRecord(Base):
     __tablename__ = "audit_records"
+    __table_args__ = (
+        # 工作台按审核员和审核结果统计
+        Index("ix_audit_records_auditor_status", "auditor_id", "audit_status"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     customer_id = Column(Integer, ForeignKey("customers.id"), nullable=False)
@@ -89,13 +102,20 @@ class AuditRecord(Base):
 
 class Notification(Base):
     __tablename__ = "notifications"
+    __table_args__ = (
+        # 发件箱轮询：按状态取到期的待发送通知
+        Index("ix_notifications_status_next_attempt", "status", "next_attempt_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
-    customer_id = Column(Integer, ForeignKey("customers.id"), nullable=False)
+    customer_id = Column(Integer, ForeignKey("customers.id"), nullable=False, index=True)
     notification_type = Column(Enum(NotificationType), nullable=False)
     title = Column(String(200), comment="通知标题")
     content = Column(Text, nullable=False, comment="通知内容")
     status = Column(Enum(NotificationStatus), default=NotificationStatus.pending)
+    attempts = Column(Integer, default=0, nullable=False, comment="发送尝试次数")
+    next_attempt_at = Column(DateTime, nullable=True, comment="下次发送时间")
+    last_error = Column(Text, nullable=True, comment="最近一次发送失败原因")
     sent_at = Column(DateTime, nullable=True)
     created_at = Column(DateTime, default=func.now())
     
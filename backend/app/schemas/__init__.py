@@ -1,14 +1,17 @@
-from .customer import CustomerCreate, CustomerResponse, AssessmentData
-from .auditor import AuditorLogin, AuditorResponse
-from .workflow import AuditRequest, AuditResponse, WorkflowResponse
+from .customer import CustomerCreate, CustomerBatchCreate, CustomerResponse, AssessmentData
+from .auditor import AuditorLogin, AuditorResponse, AuditorPrincipal
+from .workflow import AuditRequest, AuditBatchRequest, AuditResponse, WorkflowResponse
 
 __all__ = [
     "CustomerCreate",
+    "CustomerBatchCreate",
     "CustomerResponse", 
     "AssessmentData",
     "AuditorLogin",
     "AuditorResponse",
+    "AuditorPrincipal",
     "AuditRequest",
+    "AuditBatchRequest",
     "AuditResponse",
     "WorkflowResponse"
 ]
@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from typing import Optional
-from ..models.auditor import AuditorRole
+from ..models.auditor import AuditorRole, AuditorStatus
 
 class AuditorLogin(BaseModel):
     username: str
@@ -17,6 +17,14 @@ class AuditorResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class AuditorPrincipal(AuditorResponse):
+    """已认证的审核员身份（只读快照，可在请求间缓存）"""
+    status: Optional[AuditorStatus] = None
+
+    class Config:
+        from_attributes = True
+        frozen = True
+
 class TokenResponse(BaseModel):
     access_token: str
     token_type: str = "bearer"
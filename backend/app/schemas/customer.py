@@ -1,5 +1,5 @@
-from pydantic import BaseModel, EmailStr
-from typing import Optional, Dict, Any
+from pydantic import BaseModel, EmailStr, Field
+from typing import Optional, Dict, Any, List
 from decimal import Decimal
 from ..models.customer import RiskLevel, CustomerStatus
 
@@ -20,6 +20,10 @@ class CustomerCreate(BaseModel):
     investment_amount: Decimal
     assessment_data: AssessmentData
 
+class CustomerBatchCreate(BaseModel):
+    # 逐行校验，单行格式错误不影响整批
+    customers: List[Dict[str, Any]] = Field(..., min_length=1, max_length=5000)
+
 class CustomerResponse(BaseModel):
     id: int
     name: str
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, List, Dict, Any
 from ..models.workflow import AuditLevel, AuditStatus
 
@@ -7,6 +7,10 @@ class AuditRequest(BaseModel):
     audit_status: AuditStatus
     audit_opinion: Optional[str] = None
 
+class AuditBatchRequest(BaseModel):
+    # 逐项处理，单项找不到审核任务不影响整批
+    items: List[AuditRequest] = Field(..., min_length=1, max_length=500)
+
 class AuditResponse(BaseModel):
     code: int = 200
     message: str
@@ -1,9 +1,22 @@
 from .risk_assessment import RiskAssessmentService
 from .investment_advice import InvestmentAdviceService
-from .audit_workflow import AuditWorkflowService
+from .audit_workflow import AuditWorkflowService, WorkflowConflictError
+from .customer_registration import CustomerRegistrationService
+from .customer_listing import CustomerListingService, InvalidCursor
+from .data_export import DataExportService
+from .auditor_scheduler import AuditorScheduler, auditor_scheduler
+from .investment_rollup import InvestmentRollupService
 
 __all__ = [
     "RiskAssessmentService",
     "InvestmentAdviceService", 
-    "AuditWorkflowService"
+    "AuditWorkflowService",
+    "WorkflowConflictError",
+    "CustomerRegistrationService",
+    "CustomerListingService",
+    "InvalidCursor",
+    "DataExportService",
+    "AuditorScheduler",
+    "auditor_scheduler",
+    "InvestmentRollupService"
 ]
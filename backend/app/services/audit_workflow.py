@@ -1,31 +1,54 @@
-from datetime import datetime
-from typing import List, Optional
-from sqlalchemy.orm import Session
+from typing import List, Optional, Tuple, Dict, Any
+from sqlalchemy import select, insert, update, func, case, bindparam, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
 from ..models.workflow import AuditWorkflow, AuditRecord, AuditLevel, WorkflowStatus, AuditStatus
-from ..models.auditor import Auditor, AuditorRole
+from ..models.customer import Customer, CustomerStatus
+from ..models.investment_rollup import InvestmentRollup
+from ..schemas.workflow import AuditRequest
+from ..id_generator import id_generator
+from ..utils.notification import NotificationService
+from ..utils.auditor_events import auditor_events
+from .auditor_scheduler import auditor_scheduler
+from .investment_rollup import InvestmentRollupService, current_month
+
+# 待审核（可以流转）的工作流状态
+OPEN_STATUSES = (WorkflowStatus.pending, WorkflowStatus.in_progress)
+
+# 计算流转需要的工作流字段
+_TRANSITION_STATE = ("id", "customer_id", "current_level", "next_level", "assigned_auditor_id", "workflow_status", "version")
+
+# 状态流转：只有版本号未变且仍待审核时才更新（Core语句，可按 executemany 执行，
+# executemany 不支持展开的 IN 参数，状态条件写成 OR）
+_TRANSITION_STATEMENT = update(AuditWorkflow.__table__).where(
+    AuditWorkflow.id == bindparam("b_id"),
+    AuditWorkflow.version == bindparam("b_version"),
+    or_(*(AuditWorkflow.workflow_status == status for status in OPEN_STATUSES))
+).values(
+    current_level=bindparam("b_current_level"),
+    assigned_auditor_id=bindparam("b_assigned_auditor_id"),
+    workflow_status=bindparam("b_workflow_status"),
+    version=AuditWorkflow.version + 1
+)
+
+class WorkflowConflictError(Exception):
+    """工作流已被其他请求处理（版本号或状态已变化）"""
 
 class AuditWorkflowService:
     @staticmethod
-    def create_workflow(db: Session, customer_id: int, risk_level: str, investment_amount: float) -> str:
+    async def create_workflow(db: AsyncSession, customer_id: int, risk_level: str, investment_amount: float) -> str:
         """创建审核流程"""
-        # 根据风险等级和投资金额确定审核流程
-        if risk_level == "conservative":
-            levels = [AuditLevel.junior]
-        elif risk_level == "moderate":
-            levels = [AuditLevel.junior, AuditLevel.senior]
-            if investment_amount > 1000000:  # 100万以上需要高级审核
-                levels.append(AuditLevel.expert)
-        else:  # aggressive
-            levels = [AuditLevel.junior, AuditLevel.senior, AuditLevel.expert, AuditLevel.committee]
+        levels = AuditWorkflowService.determine_levels(risk_level, investment_amount)
         
-        # 创建审核流程记录
-        workflow_id = f"WF{datetime.now().strftime('%Y%m%d%H%M%S')}"
+        # 流程编号（雪花ID），保存在流程记录中
+        workflow_no = id_generator.next_id()
         
         # 分配第一个审核员
-        first_auditor = AuditWorkflowService.assign_auditor(db, levels[0])
+        first_auditor = await AuditWorkflowService.assign_auditor(db, levels[0])
         
         # 创建工作流记录
         workflow = AuditWorkflow(
+            workflow_no=workflow_no,
             customer_id=customer_id,
             current_level=levels[0],
             workflow_status=WorkflowStatus.pending,
@@ -34,68 +57,353 @@ class AuditWorkflowService:
         )
         
         db.add(workflow)
-        db.commit()
+        AuditWorkflowService.notify_assigned(db, first_auditor, customer_id, levels[0])
+        await db.commit()
+        
+        return f"WF{workflow_no}"
+    
+    @staticmethod
+    def determine_levels(risk_level: str, investment_amount: float) -> List[AuditLevel]:
+        """根据风险等级和投资金额确定审核流程"""
+        if risk_level == "conservative":
+            levels = [AuditLevel.junior]
+        elif risk_level == "moderate":
+            levels = [AuditLevel.junior, AuditLevel.senior]
+            if investment_amount > 1000000:  # 100万以上需要高级审核
+                levels.append(AuditLevel.expert)
+        else:  # aggressive
+            levels = [AuditLevel.junior, AuditLevel.senior, AuditLevel.expert, AuditLevel.committee]
+        return levels
+    
+    @staticmethod
+    async def create_workflows_batch(db: AsyncSession, items: List[Tuple[int, str, float]]) -> List[str]:
+        """批量创建审核流程（只插入不提交，由调用方统一提交）"""
+        if not items:
+            return []
+        
+        workflow_nos = id_generator.next_ids(len(items))
+        rows = []
+        for (customer_id, risk_level, investment_amount), workflow_no in zip(items, workflow_nos):
+            levels = AuditWorkflowService.determine_levels(risk_level, investment_amount)
+            auditor_id = await AuditWorkflowService.assign_auditor(db, levels[0])
+            rows.append({
+                "workflow_no": workflow_no,
+                "customer_id": customer_id,
+                "current_level": levels[0],
+                "workflow_status": WorkflowStatus.pending,
+                "assigned_auditor_id": auditor_id,
+                "next_level": levels[1] if len(levels) > 1 else None
+            })
+            AuditWorkflowService.notify_assigned(db, auditor_id, customer_id, levels[0])
         
-        return workflow_id
+        # render_nulls：next_level 为空和不为空的行仍在同一条 executemany 中（否则按非空字段分组逐段插入）
+        await db.execute(insert(AuditWorkflow).execution_options(render_nulls=True), rows)
+        return [f"WF{workflow_no}" for workflow_no in workflow_nos]
     
     @staticmethod
-    def assign_auditor(db: Session, level: AuditLevel) -> Optional[int]:
-        """分配审核员"""
-        # 根据审核级别分配合适的审核员
-        role_mapping = {
-            AuditLevel.junior: AuditorRole.junior,
-            AuditLevel.senior: AuditorRole.senior,
-            AuditLevel.expert: AuditorRole.expert,
-            AuditLevel.committee: AuditorRole.committee
+    async def assign_auditor(db: AsyncSession, level: AuditLevel) -> Optional[int]:
+        """分配审核员（由调度器按工作量均衡分配，不访问数据库）"""
+        return await auditor_scheduler.assign(db, level)
+    
+    @staticmethod
+    def notify_assigned(db: AsyncSession, auditor_id: Optional[int], customer_id: int, level: AuditLevel):
+        """登记任务分配事件，提交后推送到审核员的工作台"""
+        if auditor_id is None:
+            return
+        auditor_events.defer(db, auditor_id, "task_assigned", {"customer_id": customer_id, "audit_level": level.value})
+        auditor_events.defer_counters(db, auditor_id, pending_count=1)
+    
+    @staticmethod
+    def notify_completed(db: AsyncSession, workflow: Dict[str, Any], audit_result: AuditStatus, values: Dict[str, Any]):
+        """登记审核完成事件和工作台计数变化（流转到下一级时同时登记下一级审核员的任务分配）"""
+        auditor_id = workflow["assigned_auditor_id"]
+        auditor_events.defer(db, auditor_id, "task_completed", {
+            "customer_id": workflow["customer_id"],
+            "audit_level": workflow["current_level"].value,
+            "audit_status": audit_result.value,
+            "workflow_status": values["workflow_status"].value
+        })
+        still_pending = values["workflow_status"] in OPEN_STATUSES and values["assigned_auditor_id"] == auditor_id
+        auditor_events.defer_counters(
+            db, auditor_id,
+            pending_count=0 if still_pending else -1,
+            approved_count=int(audit_result == AuditStatus.approved),
+            need_review_count=int(audit_result == AuditStatus.need_review)
+        )
+        if not still_pending and values["workflow_status"] in OPEN_STATUSES:
+            AuditWorkflowService.notify_assigned(
+                db, values["assigned_auditor_id"], workflow["customer_id"], values["current_level"]
+            )
+    
+    @staticmethod
+    async def plan_transition(db: AsyncSession, workflow: Dict[str, Any], audit_result: AuditStatus) -> Dict[str, Any]:
+        """
+        根据审核结果计算工作流流转后的 current_level、assigned_auditor_id、workflow_status
+
+        workflow 为工作流当前的字段值；流转到下一级时为下一级预留审核员。
+        需复审不改变工作流（仍会增加版本号）。
+        """
+        values = {
+            "current_level": workflow["current_level"],
+            "assigned_auditor_id": workflow["assigned_auditor_id"],
+            "workflow_status": workflow["workflow_status"]
         }
+        if audit_result == AuditStatus.rejected:
+            # 如果拒绝，结束流程
+            values["workflow_status"] = WorkflowStatus.rejected
+        elif audit_result == AuditStatus.approved:
+            if workflow["next_level"]:
+                # 流转到下一级
+                next_auditor = await AuditWorkflowService.assign_auditor(db, workflow["next_level"])
+                # 这里需要确定下一级，简化处理
+                values.update(
+                    current_level=workflow["next_level"],
+                    assigned_auditor_id=next_auditor,
+                    workflow_status=WorkflowStatus.in_progress
+                )
+            else:
+                # 完成所有审核
+                values["workflow_status"] = WorkflowStatus.completed
+        return values
+    
+    @staticmethod
+    async def transition(db: AsyncSession, transitions: List[Tuple[Dict[str, Any], AuditStatus]]) -> List[Dict[str, Any]]:
+        """
+        以条件UPDATE原子地执行一组工作流状态流转（乐观锁，不加行锁）
+
+        每个工作流按 id、读取时的 version 和待审核状态更新并把版本号加一，整组一条语句（executemany）；
+        更新行数不足说明有工作流已被其他请求处理，抛出 WorkflowConflictError，调用方回滚事务
+        （预留的审核员随回滚撤销）。成功后释放完成审核的审核员，登记审核员事件（提交后推送），返回每个工作流更新后的字段值。
+        """
+        planned = [
+            await AuditWorkflowService.plan_transition(db, workflow, audit_result)
+            for workflow, audit_result in transitions
+        ]
+        result = await db.execute(_TRANSITION_STATEMENT, [
+            {
+                "b_id": workflow["id"],
+                "b_version": workflow["version"],
+                "b_current_level": values["current_level"],
+                "b_assigned_auditor_id": values["assigned_auditor_id"],
+                "b_workflow_status": values["workflow_status"]
+            }
+            for (workflow, _), values in zip(transitions, planned)
+        ])
         
-        auditor = db.query(Auditor).filter(
-            Auditor.role == role_mapping[level],
-            Auditor.status == "active"
-        ).first()
+        if result.rowcount != len(transitions):
+            raise WorkflowConflictError("审核任务已被其他请求处理，请刷新后重试")
         
-        return auditor.id if auditor else None
+        for (workflow, audit_result), values in zip(transitions, planned):
+            if audit_result in (AuditStatus.approved, AuditStatus.rejected):
+                auditor_scheduler.release(db, workflow["assigned_auditor_id"])
+            values["version"] = workflow["version"] + 1
+            AuditWorkflowService.notify_completed(db, workflow, audit_result, values)
+        return planned
     
     @staticmethod
-    def process_audit(db: Session, workflow_id: int, auditor_id: int, 
-                     audit_result: AuditStatus, opinion: str) -> bool:
-        """处理审核结果"""
-        workflow = db.query(AuditWorkflow).filter(AuditWorkflow.id == workflow_id).first()
+    async def process_audit(db: AsyncSession, workflow_id: int, auditor_id: int, 
+                           audit_result: AuditStatus, opinion: str) -> bool:
+        """
+        处理审核结果（只写入不提交，由调用方与客户状态、汇总和通知一起提交）
+
+        工作流已被其他请求处理（版本号或状态已变化）时抛出 WorkflowConflictError，不写审核记录。
+        """
+        workflow = await db.get(AuditWorkflow, workflow_id)
         if not workflow:
             return False
         
+        state = {column: getattr(workflow, column) for column in _TRANSITION_STATE}
+        values, = await AuditWorkflowService.transition(db, [(state, audit_result)])
+        # 条件UPDATE已写入数据库，同步会话中的对象（不标记为已修改，避免再次UPDATE）
+        for key, value in values.items():
+            set_committed_value(workflow, key, value)
+        
         # 创建审核记录
         audit_record = AuditRecord(
             customer_id=workflow.customer_id,
             auditor_id=auditor_id,
-            audit_level=workflow.current_level,
+            audit_level=state["current_level"],
             audit_status=audit_result,
             audit_opinion=opinion
         )
         db.add(audit_record)
+        await db.flush()
+        return True
+    
+    @staticmethod
+    async def process_audit_batch(db: AsyncSession, auditor_id: int, items: List[AuditRequest]) -> List[Dict[str, Any]]:
+        """
+        批量处理审核结果（只写入不提交，由调用方统一提交）
+
+        一次查询取出当前审核员名下所有相关的待审核工作流，一条条件UPDATE完成整批流转，批量插入审核记录，
+        按主键批量更新客户状态，审核完成或拒绝的客户通知写入发件箱。
+        返回每一项的处理结果，找不到审核任务或同一客户重复提交的项不影响其他项；
+        其中有工作流已被其他请求处理时整批抛出 WorkflowConflictError。
+        """
+        result = await db.execute(
+            select(*(getattr(AuditWorkflow, column) for column in _TRANSITION_STATE)).where(
+                AuditWorkflow.customer_id.in_({item.customer_id for item in items}),
+                AuditWorkflow.assigned_auditor_id == auditor_id,
+                AuditWorkflow.workflow_status.in_(OPEN_STATUSES)
+            ).order_by(AuditWorkflow.id)
+        )
+        workflows: Dict[int, Dict[str, Any]] = {}
+        for row in result:
+            workflows.setdefault(row.customer_id, row._asdict())
         
-        if audit_result == AuditStatus.rejected:
-            # 如果拒绝，结束流程
-            workflow.workflow_status = WorkflowStatus.rejected
-        elif audit_result == AuditStatus.approved:
-            if workflow.next_level:
-                # 流转到下一级
-                next_auditor = AuditWorkflowService.assign_auditor(db, workflow.next_level)
-                workflow.current_level = workflow.next_level
-                workflow.assigned_auditor_id = next_auditor
-                # 这里需要确定下一级，简化处理
-                workflow.workflow_status = WorkflowStatus.in_progress
-            else:
-                # 完成所有审核
-                workflow.workflow_status = WorkflowStatus.completed
+        results: List[Optional[Dict[str, Any]]] = []
+        accepted: List[Tuple[int, AuditRequest]] = []
+        seen = set()
+        for index, item in enumerate(items):
+            if item.customer_id in seen:
+                results.append({"index": index, "customer_id": item.customer_id, "success": False,
+                                "error": "同一客户在本批中重复提交"})
+                continue
+            seen.add(item.customer_id)
+            if item.customer_id not in workflows:
+                results.append({"index": index, "customer_id": item.customer_id, "success": False,
+                                "error": "未找到对应的审核任务"})
+                continue
+            results.append(None)
+            accepted.append((index, item))
+        if not accepted:
+            return results
         
-        db.commit()
-        return True
+        planned = await AuditWorkflowService.transition(db, [
+            (workflows[item.customer_id], item.audit_status) for _, item in accepted
+        ])
+        
+        records: List[Dict[str, Any]] = []
+        finished: Dict[int, CustomerStatus] = {}
+        for (index, item), values in zip(accepted, planned):
+            workflow = workflows[item.customer_id]
+            records.append({
+                "customer_id": item.customer_id,
+                "auditor_id": auditor_id,
+                "audit_level": workflow["current_level"],
+                "audit_status": item.audit_status,
+                "audit_opinion": item.audit_opinion or ""
+            })
+            if values["workflow_status"] == WorkflowStatus.completed:
+                finished[item.customer_id] = CustomerStatus.approved
+            elif values["workflow_status"] == WorkflowStatus.rejected:
+                finished[item.customer_id] = CustomerStatus.rejected
+            results[index] = {
+                "index": index,
+                "customer_id": item.customer_id,
+                "success": True,
+                "workflow_id": workflow["id"],
+                "audit_level": workflow["current_level"].value,
+                "audit_status": item.audit_status.value,
+                "workflow_status": values["workflow_status"].value
+            }
+        
+        await db.execute(insert(AuditRecord), records)
+        if finished:
+            customers = {
+                row.id: row for row in await db.execute(
+                    select(Customer.id, Customer.name, Customer.investment_amount, Customer.risk_level).where(
+                        Customer.id.in_(finished)
+                    )
+                )
+            }
+            await db.execute(update(Customer), [
+                {"id": customer_id, "status": status} for customer_id, status in finished.items()
+            ])
+            # 通知写入发件箱，与客户状态在同一事务中提交，由后台任务发送
+            await NotificationService.send_audit_completion_notifications(db, [
+                (customer_id, customers[customer_id].name, status.value) for customer_id, status in finished.items()
+            ])
+            # 审核结果计入当月汇总，与客户状态在同一事务中提交
+            await InvestmentRollupService.record(db, [
+                (customers[customer_id].risk_level, status, customers[customer_id].investment_amount)
+                for customer_id, status in finished.items()
+            ])
+            # 通过的客户计入所有审核员工作台的投资总额
+            approved_amount = sum(
+                float(customers[customer_id].investment_amount)
+                for customer_id, status in finished.items() if status == CustomerStatus.approved
+            )
+            auditor_events.defer_counters(db, None, total_investment=approved_amount)
+        return results
     
     @staticmethod
-    def get_pending_workflows(db: Session, auditor_id: int) -> List[AuditWorkflow]:
+    async def get_pending_workflows(db: AsyncSession, auditor_id: int) -> List[AuditWorkflow]:
         """获取待审核的工作流"""
-        return db.query(AuditWorkflow).filter(
+        result = await db.execute(
+            select(AuditWorkflow).where(
+                AuditWorkflow.assigned_auditor_id == auditor_id,
+                AuditWorkflow.workflow_status.in_(OPEN_STATUSES)
+            )
+        )
+        return list(result.scalars().all())
+    
+    @staticmethod
+    def dashboard_counts_statement(auditor_id: int):
+        """工作台统计语句：待审核、已通过、需复审数量及本月投资总额合并为一条SELECT"""
+        pending_count = select(func.count(AuditWorkflow.id)).where(
             AuditWorkflow.assigned_auditor_id == auditor_id,
-            AuditWorkflow.workflow_status.in_([WorkflowStatus.pending, WorkflowStatus.in_progress])
-        ).all()
+            AuditWorkflow.workflow_status.in_(OPEN_STATUSES)
+        ).scalar_subquery()
+        
+        record_counts = select(
+            func.count(case((AuditRecord.audit_status == AuditStatus.approved, 1))).label("approved_count"),
+            func.count(case((AuditRecord.audit_status == AuditStatus.need_review, 1))).label("need_review_count")
+        ).where(AuditRecord.auditor_id == auditor_id).subquery()
+        
+        # 本月投资总额读取月度汇总（每个风险等级一行），不扫描客户表
+        total_investment = select(func.sum(InvestmentRollup.approved_amount)).where(
+            InvestmentRollup.month == current_month()
+        ).scalar_subquery()
+        
+        return select(
+            pending_count.label("pending_count"),
+            record_counts.c.approved_count,
+            record_counts.c.need_review_count,
+            total_investment.label("total_investment")
+        ).select_from(record_counts)
+    
+    @staticmethod
+    def pending_list_statement(auditor_id: int):
+        """待审核列表语句：联表查询，只取展示所需的列"""
+        return select(
+            Customer.id,
+            Customer.application_no,
+            Customer.name,
+            Customer.investment_amount,
+            Customer.risk_level,
+            Customer.created_at
+        ).join(AuditWorkflow, AuditWorkflow.customer_id == Customer.id).where(
+            AuditWorkflow.assigned_auditor_id == auditor_id,
+            AuditWorkflow.workflow_status.in_(OPEN_STATUSES)
+        ).order_by(AuditWorkflow.id)
+    
+    @staticmethod
+    async def get_dashboard_counts(db: AsyncSession, auditor_id: int) -> Dict[str, Any]:
+        """一条语句统计工作台数据（待审核、已通过、需复审数量及本月投资总额）"""
+        result = await db.execute(AuditWorkflowService.dashboard_counts_statement(auditor_id))
+        row = result.one()
+        return {
+            "pending_count": row.pending_count,
+            "approved_count": row.approved_count,
+            "need_review_count": row.need_review_count,
+            "total_investment": float(row.total_investment or 0)
+        }
+    
+    @staticmethod
+    async def get_pending_list(db: AsyncSession, auditor_id: int) -> List[Dict[str, Any]]:
+        """一次联表查询获取待审核列表（只取展示所需的列）"""
+        result = await db.execute(AuditWorkflowService.pending_list_statement(auditor_id))
+        
+        return [
+            {
+                "customer_id": row.id,
+                "customer_name": row.name,
+                "application_id": f"RA-{row.application_no}",
+                "investment_amount": float(row.investment_amount),
+                "risk_level": row.risk_level.value if row.risk_level else "unknown",
+                "submitted_at": row.created_at.isoformat(),
+                "priority": "high" if float(row.investment_amount) > 1000000 else "normal"
+            }
+            for row in result
+        ]
@@ -0,0 +1,116 @@
+import itertools
+import time
+from typing import Dict, Optional
+from sqlalchemy import event, select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from ..config import settings
+from ..models.auditor import Auditor, AuditorRole, AuditorStatus
+from ..models.workflow import AuditWorkflow, AuditLevel, WorkflowStatus
+
+# 会话 info 中本事务对审核员任务数的调整（事务回滚时撤销）
+_PENDING_LOAD = "auditor_load"
+
+class AuditorScheduler:
+    """
+    审核员分配调度器
+
+    在内存中按角色维护在岗审核员及其未完成任务数，分配时选择任务最少的审核员，
+    任务数相同时选择最久未被分配的（轮询），分配本身不访问数据库。
+    启动时从数据库构建，之后随分配和审核完成增量更新；计数在分配时立即调整（同一事务中后续的分配能看到），
+    同时登记在会话上，事务回滚时撤销，提交后保留。
+    多worker部署时各进程的计数会有偏差，按 auditor_pool_refresh_seconds 定期从数据库校正。
+    """
+
+    def __init__(self, refresh_seconds: int = 60):
+        self.refresh_seconds = refresh_seconds
+        self._pools: Dict[AuditorRole, Dict[int, int]] = {}
+        self._last_assigned: Dict[int, int] = {}
+        self._sequence = itertools.count(1)
+        self._loaded_at: Optional[float] = None
+        # 每次重建加一：重建后的计数已从数据库读取，之前事务登记的调整不再撤销
+        self._generation = 0
+
+    async def rebuild(self, db: AsyncSession):
+        """从数据库重建审核员池和未完成任务数"""
+        auditors = await db.execute(
+            select(Auditor.id, Auditor.role).where(Auditor.status == AuditorStatus.active)
+        )
+        open_tasks = await db.execute(
+            select(AuditWorkflow.assigned_auditor_id, func.count(AuditWorkflow.id)).where(
+                AuditWorkflow.workflow_status.in_([WorkflowStatus.pending, WorkflowStatus.in_progress])
+            ).group_by(AuditWorkflow.assigned_auditor_id)
+        )
+        workload = dict(open_tasks.all())
+
+        pools: Dict[AuditorRole, Dict[int, int]] = {role: {} for role in AuditorRole}
+        for auditor_id, role in auditors:
+            pools[role][auditor_id] = workload.get(auditor_id, 0)
+
+        self._pools = pools
+        self._loaded_at = time.monotonic()
+        self._generation += 1
+
+    def invalidate(self):
+        """标记审核员池过期，下次分配时重建（审核员被停用或修改后调用）"""
+        self._loaded_at = None
+
+    async def assign(self, db: AsyncSession, level: AuditLevel) -> Optional[int]:
+        """为指定审核级别分配任务最少的审核员"""
+        if self._loaded_at is None or time.monotonic() - self._loaded_at > self.refresh_seconds:
+            await self.rebuild(db)
+
+        pool = self._pools.get(AuditorRole(level.value))
+        if not pool:
+            return None
+
+        auditor_id = min(pool, key=lambda candidate: (pool[candidate], self._last_assigned.get(candidate, 0)))
+        self._last_assigned[auditor_id] = next(self._sequence)
+        self._adjust(db, auditor_id, 1)
+        return auditor_id
+
+    def release(self, db: AsyncSession, auditor_id: Optional[int]):
+        """审核员完成一项任务（流转到下一级或流程结束）"""
+        if auditor_id is not None:
+            self._adjust(db, auditor_id, -1)
+
+    def _adjust(self, db: AsyncSession, auditor_id: int, delta: int):
+        # 会话还没有开始事务时先开始（不会建立连接），保证之后的提交或回滚一定会结算这次调整
+        session = db.sync_session
+        if not session.in_transaction():
+            session.begin()
+        # 登记实际生效的调整量（计数不小于0，减少的量可能小于 delta），回滚时按它撤销
+        applied = self._apply(auditor_id, delta)
+        session.info.setdefault(_PENDING_LOAD, []).append((self, self._generation, auditor_id, applied))
+
+    def _apply(self, auditor_id: int, delta: int) -> int:
+        """调整审核员的任务数（不小于0），返回实际调整的量"""
+        for pool in self._pools.values():
+            if auditor_id in pool:
+                current = pool[auditor_id]
+                pool[auditor_id] = max(0, current + delta)
+                return pool[auditor_id] - current
+        return 0
+
+    def _revert(self, generation: int, auditor_id: int, applied: int):
+        """撤销回滚事务做过的调整（期间已从数据库重建时不撤销）"""
+        if generation == self._generation:
+            self._apply(auditor_id, -applied)
+
+    def snapshot(self) -> Dict[str, Dict[int, int]]:
+        """当前各角色审核员的未完成任务数"""
+        return {role.value: dict(pool) for role, pool in self._pools.items()}
+
+# 全局调度器实例
+auditor_scheduler = AuditorScheduler(refresh_seconds=settings.auditor_pool_refresh_seconds)
+
+@event.listens_for(Session, "after_commit")
+def _keep_after_commit(session: Session):
+    session.info.pop(_PENDING_LOAD, None)
+
+@event.listens_for(Session, "after_transaction_end")
+def _revert_after_rollback(session: Session, transaction):
+    # 提交时已在 after_commit 中移除，剩下的是回滚或未提交就关闭的事务做过的调整
+    if transaction.parent is None:
+        for scheduler, generation, auditor_id, applied in reversed(session.info.pop(_PENDING_LOAD, [])):
+            scheduler._revert(generation, auditor_id, applied)
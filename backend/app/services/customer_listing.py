@@ -0,0 +1,111 @@
+import base64
+import binascii
+import json
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import select, or_, String, type_coerce
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..models.customer import Customer, CustomerStatus, RiskLevel
+
+# created_at 按数据库中的原始值比较：SQLite中服务端默认值存为不带微秒的文本，
+# 如果按 DateTime 类型绑定参数（带 .000000）会导致相等的时间比较结果不一致
+CREATED_AT_KEY = type_coerce(Customer.created_at, String)
+
+class InvalidCursor(ValueError):
+    """分页游标无法解析"""
+
+class CustomerListingService:
+    """
+    客户列表查询（游标分页）
+
+    按 (created_at, id) 倒序排列，下一页从上一页最后一条记录之后继续，
+    配合 (created_at, id)、(status, created_at, id)、(risk_level, created_at, id) 索引，
+    无论翻到第几页都只扫描一页的数据，不使用 OFFSET。
+    """
+
+    @staticmethod
+    def datetime_key(value: datetime) -> str:
+        """将时间转换为与数据库存储格式一致的比较值（UTC，无微秒时不带小数部分）"""
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value.isoformat(sep=" ")
+
+    @staticmethod
+    def encode_cursor(created_at_key: Any, customer_id: int) -> str:
+        """生成下一页游标"""
+        payload = json.dumps([str(created_at_key), customer_id], separators=(",", ":"))
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> Tuple[str, int]:
+        """解析游标，返回 (created_at比较值, id)"""
+        try:
+            created_at_key, customer_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            if not isinstance(created_at_key, str) or not isinstance(customer_id, int):
+                raise ValueError
+        except (ValueError, TypeError, binascii.Error):
+            raise InvalidCursor("无效的分页游标")
+        return created_at_key, customer_id
+
+    @staticmethod
+    def list_statement(
+        status: Optional[CustomerStatus] = None,
+        risk_level: Optional[RiskLevel] = None,
+        min_amount: Optional[Decimal] = None,
+        max_amount: Optional[Decimal] = None,
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None,
+        cursor: Optional[str] = None,
+        limit: int = 20
+    ):
+        """构建一页客户列表的查询（多取一条用于判断是否还有下一页）"""
+        conditions = []
+        if status is not None:
+            conditions.append(Customer.status == status)
+        if risk_level is not None:
+            conditions.append(Customer.risk_level == risk_level)
+        if min_amount is not None:
+            conditions.append(Customer.investment_amount >= min_amount)
+        if max_amount is not None:
+            conditions.append(Customer.investment_amount <= max_amount)
+        if created_from is not None:
+            conditions.append(CREATED_AT_KEY >= CustomerListingService.datetime_key(created_from))
+        if created_to is not None:
+            conditions.append(CREATED_AT_KEY < CustomerListingService.datetime_key(created_to))
+        if cursor is not None:
+            created_at_key, customer_id = CustomerListingService.decode_cursor(cursor)
+            # 等价于 (created_at, id) < (:created_at, :id)，拆开写以便走索引范围扫描
+            conditions.append(CREATED_AT_KEY <= created_at_key)
+            conditions.append(or_(CREATED_AT_KEY < created_at_key, Customer.id < customer_id))
+
+        return select(Customer, CREATED_AT_KEY.label("created_at_key")).where(*conditions).order_by(
+            Customer.created_at.desc(), Customer.id.desc()
+        ).limit(limit + 1)
+
+    @staticmethod
+    async def list_customers(db: AsyncSession, limit: int = 20, **filters) -> Dict[str, Any]:
+        """查询一页客户，返回 items 和 next_cursor（没有下一页时为None）"""
+        result = await db.execute(CustomerListingService.list_statement(limit=limit, **filters))
+        rows = result.all()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last_customer, last_key = rows[-1]
+            next_cursor = CustomerListingService.encode_cursor(last_key, last_customer.id)
+
+        items: List[Dict[str, Any]] = [
+            {
+                "id": customer.id,
+                "name": customer.name,
+                "phone": customer.phone,
+                "investment_amount": float(customer.investment_amount) if customer.investment_amount is not None else None,
+                "risk_score": customer.risk_score,
+                "risk_level": customer.risk_level.value if customer.risk_level else None,
+                "status": customer.status.value,
+                "created_at": customer.created_at.isoformat() if customer.created_at else None
+            }
+            for customer, _ in rows
+        ]
+        return {"items": items, "next_cursor": next_cursor}
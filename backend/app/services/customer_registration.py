@@ -0,0 +1,192 @@
+from typing import List, Dict, Any, Optional, Set, Tuple
+from pydantic import ValidationError
+from sqlalchemy import select, insert, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..models.customer import Customer, CustomerStatus, RiskLevel
+from ..models.workflow import RiskAssessment, InvestmentAdvice
+from ..schemas.customer import CustomerCreate
+from ..id_generator import id_generator
+from .risk_assessment import RiskAssessmentService
+from .investment_advice import InvestmentAdviceService
+from .audit_workflow import AuditWorkflowService
+
+class CustomerRegistrationService:
+    @staticmethod
+    def customer_values(customer_data: CustomerCreate, risk_score: int, risk_level: RiskLevel) -> Dict[str, Any]:
+        """根据注册信息生成客户记录的字段值"""
+        return {
+            "name": customer_data.name,
+            "phone": customer_data.phone,
+            "id_card": customer_data.id_card,
+            "email": customer_data.email,
+            "occupation": customer_data.occupation,
+            "investment_amount": customer_data.investment_amount,
+            "age_range": customer_data.assessment_data.age,
+            "income_level": customer_data.assessment_data.income,
+            "investment_experience": customer_data.assessment_data.experience,
+            "risk_tolerance": customer_data.assessment_data.risk_tolerance,
+            "investment_goal": customer_data.assessment_data.goal,
+            "investment_period": customer_data.assessment_data.period,
+            "risk_score": risk_score,
+            "risk_level": risk_level,
+            "status": CustomerStatus.pending
+        }
+
+    @staticmethod
+    def build_customer(customer_data: CustomerCreate, risk_score: int, risk_level: RiskLevel) -> Customer:
+        """根据注册信息构建客户记录"""
+        return Customer(**CustomerRegistrationService.customer_values(customer_data, risk_score, risk_level))
+
+    @staticmethod
+    async def find_duplicate(db: AsyncSession, phone: str, id_card: str) -> Optional[str]:
+        """一次查询检查手机号和身份证号是否已存在，返回对应的错误信息"""
+        result = await db.execute(
+            select(Customer.phone).where(or_(Customer.phone == phone, Customer.id_card == id_card)).limit(2)
+        )
+        existing_phones = set(result.scalars())
+        if phone in existing_phones:
+            return "手机号已存在"
+        if existing_phones:
+            return "身份证号已存在"
+        return None
+
+    @staticmethod
+    async def find_existing(db: AsyncSession, customers: List[CustomerCreate]) -> Tuple[Set[str], Set[str]]:
+        """一次集合查询取出已注册的手机号和身份证号"""
+        existing_phones: Set[str] = set()
+        existing_id_cards: Set[str] = set()
+        if customers:
+            result = await db.execute(
+                select(Customer.phone, Customer.id_card).where(or_(
+                    Customer.phone.in_({customer_data.phone for customer_data in customers}),
+                    Customer.id_card.in_({customer_data.id_card for customer_data in customers})
+                ))
+            )
+            for phone, id_card in result:
+                existing_phones.add(phone)
+                existing_id_cards.add(id_card)
+        return existing_phones, existing_id_cards
+
+    @staticmethod
+    def duplicate_message(error: IntegrityError) -> Optional[str]:
+        """根据唯一约束冲突的字段返回错误信息，不是手机号或身份证号冲突时返回 None"""
+        message = str(error.orig)
+        if "phone" in message:
+            return "手机号已存在"
+        if "id_card" in message:
+            return "身份证号已存在"
+        return None
+
+    @staticmethod
+    def format_validation_error(error: ValidationError) -> str:
+        """将校验错误压缩为一行文字"""
+        return "; ".join(
+            f"{'.'.join(str(loc) for loc in item['loc'])}: {item['msg']}" for item in error.errors()
+        )
+
+    @staticmethod
+    async def register_batch(db: AsyncSession, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        批量注册客户（只插入不提交，由调用方在同一事务中提交）
+
+        每批都查询一次数据库查重，不使用注册预过滤（过滤器不包含其他进程注册的客户）。
+        查询之后其他请求注册了同一客户时，插入因唯一约束抛出 IntegrityError，由调用方回滚后重新执行整批。
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(rows)
+
+        # 逐行校验，单行错误不影响整批
+        valid = []
+        for index, row in enumerate(rows):
+            try:
+                valid.append((index, CustomerCreate.model_validate(row)))
+            except ValidationError as e:
+                results[index] = {
+                    "index": index,
+                    "success": False,
+                    "error": CustomerRegistrationService.format_validation_error(e)
+                }
+
+        # 一次集合查询检查手机号和身份证号是否已存在
+        existing_phones, existing_id_cards = await CustomerRegistrationService.find_existing(
+            db, [customer_data for _, customer_data in valid]
+        )
+
+        # 批次内部重复的记录以第一次出现为准
+        accepted = []
+        for index, customer_data in valid:
+            if customer_data.phone in existing_phones:
+                results[index] = {"index": index, "success": False, "error": "手机号已存在"}
+            elif customer_data.id_card in existing_id_cards:
+                results[index] = {"index": index, "success": False, "error": "身份证号已存在"}
+            else:
+                existing_phones.add(customer_data.phone)
+                existing_id_cards.add(customer_data.id_card)
+                accepted.append((index, customer_data))
+
+        if not accepted:
+            return results
+
+        # 向量化计算风险评分并批量插入客户
+        risk_scores = RiskAssessmentService.calculate_risk_scores_batch(
+            [customer_data.assessment_data for _, customer_data in accepted]
+        )
+        risk_levels = RiskAssessmentService.determine_risk_levels_batch(risk_scores)
+        scored = [(int(risk_score), risk_level) for risk_score, risk_level in zip(risk_scores, risk_levels)]
+        # 申请编号预先生成，客户以一条 executemany 插入后按申请编号取回ID
+        # （ORM 逐个 flush 在 SQLite 上需要逐行 INSERT ... RETURNING 才能对应自增ID）
+        application_nos = id_generator.next_ids(len(accepted))
+        await db.execute(insert(Customer.__table__), [
+            {
+                **CustomerRegistrationService.customer_values(customer_data, risk_score, risk_level),
+                "application_no": application_no
+            }
+            for (_, customer_data), (risk_score, risk_level), application_no in zip(accepted, scored, application_nos)
+        ])
+        customer_ids = dict((await db.execute(
+            select(Customer.application_no, Customer.id).where(Customer.application_no.in_(application_nos))
+        )).all())
+
+        # 批量插入风险评估和投资建议
+        assessment_rows = []
+        advice_rows = []
+        workflow_items = []
+        for (index, customer_data), (risk_score, risk_level), application_no in zip(accepted, scored, application_nos):
+            customer_id = customer_ids[application_no]
+            assessment_rows.append({
+                "customer_id": customer_id,
+                "assessment_data": customer_data.assessment_data.dict(),
+                "risk_score": risk_score,
+                "risk_level": risk_level.value
+            })
+            template = InvestmentAdviceService.get_template(risk_level)
+            advice_rows.append({
+                "customer_id": customer_id,
+                "portfolio_type": risk_level.value,
+                "expected_return_min": template.expected_return_min,
+                "expected_return_max": template.expected_return_max,
+                "portfolio_config": dict(template.portfolio_config),
+                "advice_content": template.advice_content
+            })
+            workflow_items.append((customer_id, risk_level.value, float(customer_data.investment_amount)))
+
+        await db.execute(insert(RiskAssessment), assessment_rows)
+        await db.execute(insert(InvestmentAdvice), advice_rows)
+
+        # 批量创建审核流程
+        workflow_ids = await AuditWorkflowService.create_workflows_batch(db, workflow_items)
+
+        for (index, _), (risk_score, risk_level), application_no, workflow_id in zip(
+            accepted, scored, application_nos, workflow_ids
+        ):
+            results[index] = {
+                "index": index,
+                "success": True,
+                "customer_id": customer_ids[application_no],
+                "application_id": f"RA-{application_no}",
+                "risk_score": risk_score,
+                "risk_level": risk_level.value,
+                "workflow_id": workflow_id
+            }
+
+        return results
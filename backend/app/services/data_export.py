@@ -0,0 +1,158 @@
+import asyncio
+import csv
+import enum
+import io
+import json
+import zlib
+from datetime import date, datetime
+from decimal import Decimal
+from types import MappingProxyType
+from typing import Any, AsyncIterator, Callable, List, Mapping, Optional, Sequence
+from sqlalchemy import Date, DateTime, Enum, JSON, Numeric, Table, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..config import settings
+from ..database import database
+from ..models.customer import Customer
+from ..models.workflow import AuditRecord, AuditWorkflow
+
+# 可导出的数据表
+EXPORT_TABLES: Mapping[str, Table] = MappingProxyType({
+    "customers": Customer.__table__,
+    "audit_records": AuditRecord.__table__,
+    "audit_workflow": AuditWorkflow.__table__
+})
+
+EXPORT_FORMATS = ("ndjson", "csv")
+
+MEDIA_TYPES = MappingProxyType({"ndjson": "application/x-ndjson", "csv": "text/csv"})
+
+def to_plain(value: Any) -> Any:
+    """将数据库值转换为可序列化的简单类型"""
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+def column_converters(table: Table) -> List[Optional[Callable[[Any], Any]]]:
+    """按列类型预先确定转换函数，int/str 等无需转换的列为None"""
+    converters = []
+    for column in table.columns:
+        if isinstance(column.type, Enum):
+            converters.append(lambda value: value.value if value is not None else None)
+        elif isinstance(column.type, (Numeric, DateTime, Date, JSON)):
+            converters.append(lambda value: to_plain(value) if value is not None else None)
+        else:
+            converters.append(None)
+    return converters
+
+class DataExportService:
+    """
+    数据表流式导出
+
+    使用服务端游标（yield_per）按批读取，每批编码后立即输出，
+    内存占用只与批大小有关，与表的总行数无关。
+    """
+
+    @staticmethod
+    def export_statement(table_name: str):
+        """按主键顺序导出整表的查询"""
+        table = EXPORT_TABLES[table_name]
+        return select(table).order_by(table.c.id)
+
+    @staticmethod
+    async def iter_batches(db: AsyncSession, table_name: str, batch_size: int) -> AsyncIterator[Sequence[tuple]]:
+        """按批读取整表"""
+        result = await db.stream(
+            DataExportService.export_statement(table_name).execution_options(yield_per=batch_size)
+        )
+        async for rows in result.partitions():
+            yield rows
+
+    @staticmethod
+    def plain_rows(table: Table) -> Callable[[Sequence[tuple]], List[list]]:
+        """将一批行转换为只含简单类型的列表"""
+        converters = list(enumerate(column_converters(table)))
+        converters = [(index, convert) for index, convert in converters if convert is not None]
+
+        def convert_rows(rows: Sequence[tuple]) -> List[list]:
+            plain = []
+            for row in rows:
+                values = list(row)
+                for index, convert in converters:
+                    values[index] = convert(values[index])
+                plain.append(values)
+            return plain
+        return convert_rows
+
+    @staticmethod
+    def ndjson_encoder(table: Table) -> Callable[[Sequence[tuple]], str]:
+        """每行一个JSON对象"""
+        columns = [column.name for column in table.columns]
+        convert_rows = DataExportService.plain_rows(table)
+        encode_json = json.JSONEncoder(ensure_ascii=False, default=to_plain).encode
+
+        def encode(rows: Sequence[tuple]) -> str:
+            return "".join(encode_json(dict(zip(columns, row))) + "\n" for row in convert_rows(rows))
+        return encode
+
+    @staticmethod
+    def csv_encoder(table: Table) -> Callable[[Sequence[tuple]], str]:
+        """CSV数据行（不含列名）"""
+        convert_rows = DataExportService.plain_rows(table)
+
+        def encode(rows: Sequence[tuple]) -> str:
+            buffer = io.StringIO()
+            csv.writer(buffer).writerows(convert_rows(rows))
+            return buffer.getvalue()
+        return encode
+
+    @staticmethod
+    async def iter_export(
+        table_name: str,
+        export_format: str = "ndjson",
+        compress: bool = False,
+        batch_size: int = settings.export_batch_size,
+        session_factory: Optional[Callable[[], AsyncSession]] = None
+    ) -> AsyncIterator[bytes]:
+        """
+        流式导出整表，逐块产出UTF-8编码（compress=True 时为gzip压缩）的数据
+
+        自行创建数据库会话（默认使用全局数据库的只读会话，配置了只读副本时读取副本），保证会话在数据全部输出后才关闭。
+        每批数据的编码和压缩在线程中执行，导出大表时不阻塞事件循环中的其他请求。
+        """
+        if table_name not in EXPORT_TABLES:
+            raise ValueError(f"不支持导出该数据表: {table_name}")
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f"不支持的导出格式: {export_format}")
+
+        table = EXPORT_TABLES[table_name]
+        if export_format == "csv":
+            encode = DataExportService.csv_encoder(table)
+            header_buffer = io.StringIO()
+            csv.writer(header_buffer).writerow([column.name for column in table.columns])
+            header = header_buffer.getvalue()
+        else:
+            encode = DataExportService.ndjson_encoder(table)
+            header = ""
+        # wbits=31 输出带gzip文件头的数据
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+
+        def output(text: str) -> bytes:
+            data = text.encode("utf-8")
+            return compressor.compress(data) if compressor else data
+
+        def encode_batch(rows: Sequence[tuple]) -> bytes:
+            return output(encode(rows))
+
+        if header:
+            yield output(header)
+        async with (session_factory or database.read_session)() as db:
+            async for rows in DataExportService.iter_batches(db, table_name, batch_size):
+                chunk = await asyncio.to_thread(encode_batch, rows)
+                if chunk:
+                    yield chunk
+        if compressor:
+            yield compressor.flush()
@@ -1,48 +1,143 @@
-from typing import Dict, Any
+from types import MappingProxyType
+from typing import Dict, Any, Mapping, NamedTuple, Sequence, Union
 from decimal import Decimal
+import numpy as np
 from ..models.customer import RiskLevel
 
+class PortfolioTemplate(NamedTuple):
+    """投资组合模板（不可变）"""
+    portfolio_type: str
+    expected_return_min: Decimal
+    expected_return_max: Decimal
+    portfolio_config: Mapping[str, int]  # 资产类别 -> 配置比例（%）
+    advice_content: str
+
+# 各风险等级的投资组合模板，模块加载时构建一次
+PORTFOLIO_TEMPLATES: Mapping[RiskLevel, PortfolioTemplate] = MappingProxyType({
+    RiskLevel.conservative: PortfolioTemplate(
+        portfolio_type=RiskLevel.conservative.value,
+        expected_return_min=Decimal("4.0"),
+        expected_return_max=Decimal("6.0"),
+        portfolio_config=MappingProxyType({
+            "money_fund": 40,
+            "government_bonds": 30,
+            "bank_products": 20,
+            "bond_fund": 10
+        }),
+        advice_content="基于您的保守型风险偏好，建议配置低风险投资产品，主要投资于货币基金、国债等稳定收益产品。"
+    ),
+    RiskLevel.moderate: PortfolioTemplate(
+        portfolio_type=RiskLevel.moderate.value,
+        expected_return_min=Decimal("6.0"),
+        expected_return_max=Decimal("10.0"),
+        portfolio_config=MappingProxyType({
+            "mixed_fund": 35,
+            "bond_fund": 25,
+            "quality_stocks": 25,
+            "money_fund": 15
+        }),
+        advice_content="基于您的稳健型风险偏好，建议配置平衡型投资组合，适度配置股票和基金产品。"
+    ),
+    RiskLevel.aggressive: PortfolioTemplate(
+        portfolio_type=RiskLevel.aggressive.value,
+        expected_return_min=Decimal("10.0"),
+        expected_return_max=Decimal("15.0"),
+        portfolio_config=MappingProxyType({
+            "growth_stocks": 50,
+            "tech_fund": 25,
+            "emerging_markets": 15,
+            "bond_fund": 10
+        }),
+        advice_content="基于您的激进型风险偏好，建议配置高收益投资组合，主要投资于成长股和科技基金。"
+    )
+})
+
+# 未知风险等级使用稳健型模板
+DEFAULT_RISK_LEVEL = RiskLevel.moderate
+
+# 风险等级 -> 模板下标（同时接受枚举和字符串）
+PORTFOLIO_LEVELS = tuple(PORTFOLIO_TEMPLATES)
+LEVEL_CODES: Mapping[Any, int] = MappingProxyType({
+    **{level: code for code, level in enumerate(PORTFOLIO_LEVELS)},
+    **{level.value: code for code, level in enumerate(PORTFOLIO_LEVELS)}
+})
+
+# 所有模板涉及的资产类别（按首次出现顺序），批量分配结果的列顺序
+ASSET_CLASSES = tuple(dict.fromkeys(
+    asset for template in PORTFOLIO_TEMPLATES.values() for asset in template.portfolio_config
+))
+
+# (风险等级, 资产类别) 的配置比例矩阵，每行之和为100
+ALLOCATION_WEIGHTS = np.array(
+    [[template.portfolio_config.get(asset, 0) for asset in ASSET_CLASSES] for template in PORTFOLIO_TEMPLATES.values()],
+    dtype=np.int64
+)
+ALLOCATION_WEIGHTS.setflags(write=False)
+
+RiskLevelInput = Union[RiskLevel, str]
+
 class InvestmentAdviceService:
+    @staticmethod
+    def get_template(risk_level: RiskLevelInput) -> PortfolioTemplate:
+        """获取风险等级对应的投资组合模板"""
+        return PORTFOLIO_TEMPLATES[PORTFOLIO_LEVELS[LEVEL_CODES.get(risk_level, LEVEL_CODES[DEFAULT_RISK_LEVEL])]]
+
     @staticmethod
     def generate_portfolio(risk_level: RiskLevel, investment_amount: float) -> Dict[str, Any]:
-        """生成投资组合建议"""
-        portfolios = {
-            RiskLevel.conservative: {
-                "portfolio_type": RiskLevel.conservative.value,
-                "expected_return_min": Decimal("4.0"),
-                "expected_return_max": Decimal("6.0"),
-                "portfolio_config": {
-                    "money_fund": 40,
-                    "government_bonds": 30,
-                    "bank_products": 20,
-                    "bond_fund": 10
-                },
-                "advice_content": "基于您的保守型风险偏好，建议配置低风险投资产品，主要投资于货币基金、国债等稳定收益产品。"
-            },
-            RiskLevel.moderate: {
-                "portfolio_type": RiskLevel.moderate.value,
-                "expected_return_min": Decimal("6.0"),
-                "expected_return_max": Decimal("10.0"),
-                "portfolio_config": {
-                    "mixed_fund": 35,
-                    "bond_fund": 25,
-                    "quality_stocks": 25,
-                    "money_fund": 15
-                },
-                "advice_content": "基于您的稳健型风险偏好，建议配置平衡型投资组合，适度配置股票和基金产品。"
-            },
-            RiskLevel.aggressive: {
-                "portfolio_type": RiskLevel.aggressive.value,
-                "expected_return_min": Decimal("10.0"),
-                "expected_return_max": Decimal("15.0"),
-                "portfolio_config": {
-                    "growth_stocks": 50,
-                    "tech_fund": 25,
-                    "emerging_markets": 15,
-                    "bond_fund": 10
-                },
-                "advice_content": "基于您的激进型风险偏好，建议配置高收益投资组合，主要投资于成长股和科技基金。"
-            }
+        """生成投资组合建议，包含按配置比例分配到各资产的金额（元，精确到分）"""
+        template = InvestmentAdviceService.get_template(risk_level)
+        return {
+            "portfolio_type": template.portfolio_type,
+            "expected_return_min": template.expected_return_min,
+            "expected_return_max": template.expected_return_max,
+            "portfolio_config": dict(template.portfolio_config),
+            "allocation_amounts": InvestmentAdviceService.allocate_amounts(risk_level, investment_amount),
+            "advice_content": template.advice_content
+        }
+
+    @staticmethod
+    def encode_risk_levels(risk_levels: Sequence[RiskLevelInput]) -> np.ndarray:
+        """将风险等级（枚举或字符串）编码为模板下标数组，未知等级按稳健型处理"""
+        default = LEVEL_CODES[DEFAULT_RISK_LEVEL]
+        return np.fromiter(
+            (LEVEL_CODES.get(level, default) for level in risk_levels), dtype=np.int8, count=len(risk_levels)
+        )
+
+    @staticmethod
+    def allocate_cents_encoded(level_codes: np.ndarray, amounts: Sequence[float]) -> np.ndarray:
+        """
+        向量化计算各资产分配金额，返回 (n, len(ASSET_CLASSES)) 的整数矩阵（单位：分）
+
+        amounts 单位为元，本金按分四舍五入（精确到分的 DECIMAL(15,2) 金额不受浮点误差影响）。
+        各资产先按比例向下取整到分，再用最大余数法把剩余的分逐个补给小数部分最大的资产，
+        保证每行之和严格等于本金；余数相同时按 ASSET_CLASSES 顺序。
+        """
+        principal = np.rint(np.asarray(amounts, dtype=np.float64) * 100).astype(np.int64)
+        weighted = principal[:, None] * ALLOCATION_WEIGHTS[level_codes]
+        cents, remainders = np.divmod(weighted, 100)
+
+        leftover = principal - cents.sum(axis=1)
+        order = np.argsort(-remainders, axis=1, kind="stable")
+        ranks = np.empty_like(order)
+        np.put_along_axis(ranks, order, np.arange(order.shape[1])[None, :], axis=1)
+        cents += ranks < leftover[:, None]
+        return cents
+
+    @staticmethod
+    def allocate_cents_batch(risk_levels: Sequence[RiskLevelInput], amounts: Sequence[float]) -> np.ndarray:
+        """批量计算各资产分配金额（单位：分），列顺序为 ASSET_CLASSES"""
+        if len(risk_levels) != len(amounts):
+            raise ValueError("risk_levels 与 amounts 长度不一致")
+        return InvestmentAdviceService.allocate_cents_encoded(
+            InvestmentAdviceService.encode_risk_levels(risk_levels), amounts
+        )
+
+    @staticmethod
+    def allocate_amounts(risk_level: RiskLevelInput, investment_amount: float) -> Dict[str, float]:
+        """单个客户各资产的分配金额（元），只包含模板中的资产"""
+        template = InvestmentAdviceService.get_template(risk_level)
+        cents = InvestmentAdviceService.allocate_cents_batch([risk_level], [investment_amount])[0]
+        return {
+            asset: int(cents[ASSET_CLASSES.index(asset)]) / 100
+            for asset in template.portfolio_config
         }
-        
-        return portfolios.get(risk_level, portfolios[RiskLevel.moderate])
@@ -0,0 +1,224 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+from sqlalchemy import select, delete, update, func
+from sqlalchemy.dialects import mysql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..config import settings
+from ..models.customer import Customer, CustomerStatus, RiskLevel
+from ..models.investment_rollup import InvestmentRollup
+from ..models.workflow import AuditRecord, AuditStatus
+
+def current_month(now: Optional[datetime] = None) -> str:
+    """应用时区（settings.timezone）当前时间所在的月份（YYYY-MM），不依赖数据库时钟（SQLite的时钟为UTC）"""
+    if now is None:
+        now = datetime.now(ZoneInfo(settings.timezone))
+    return now.strftime("%Y-%m")
+
+def month_of(value: datetime) -> str:
+    """数据库时钟写入的时间（不带时区时按 settings.database_timezone 解释）在应用时区所在的月份"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=ZoneInfo(settings.database_timezone))
+    return current_month(value.astimezone(ZoneInfo(settings.timezone)))
+
+def month_bounds(month: str) -> Tuple[datetime, datetime]:
+    """应用时区的月份在数据库时钟下的起止时间 [start, end)，用于按审核完成时间筛选"""
+    year, number = (int(part) for part in month.split("-"))
+    app_zone, database_zone = ZoneInfo(settings.timezone), ZoneInfo(settings.database_timezone)
+    start = datetime(year, number, 1, tzinfo=app_zone)
+    end = datetime(year + number // 12, number % 12 + 1, 1, tzinfo=app_zone)
+    return (
+        start.astimezone(database_zone).replace(tzinfo=None),
+        end.astimezone(database_zone).replace(tzinfo=None)
+    )
+
+def _accumulate(totals: Dict[Any, Dict[str, Any]], key, status: CustomerStatus, amount):
+    """把一个客户的审核结果累加到 totals[key]"""
+    values = totals[key]
+    if status == CustomerStatus.approved:
+        values["approved_count"] += 1
+        values["approved_amount"] += Decimal(amount or 0)
+    elif status == CustomerStatus.rejected:
+        values["rejected_count"] += 1
+
+def _empty_totals() -> Dict[Any, Dict[str, Any]]:
+    return defaultdict(lambda: {"approved_count": 0, "approved_amount": Decimal(0), "rejected_count": 0})
+
+# 重建时每批从数据库读取的客户数
+REBUILD_BATCH_SIZE = 5000
+
+# 按方言生成累加语句：主键冲突时把本次的数量和金额加到已有的行上
+_UPSERT_DIALECTS = {"sqlite": sqlite.insert, "mysql": mysql.insert}
+
+class InvestmentRollupService:
+    """月度投资汇总：审核完成时增量累加，工作台和报表只读汇总表"""
+
+    @staticmethod
+    def upsert_statement(dialect_name: str, rows: List[Dict[str, Any]]):
+        """
+        按 (month, risk_level) 累加的 INSERT ... ON CONFLICT / ON DUPLICATE KEY UPDATE 语句
+
+        只支持 _UPSERT_DIALECTS 中的数据库，其他数据库返回 None，由 record 逐行先更新后插入。
+        """
+        if dialect_name not in _UPSERT_DIALECTS:
+            return None
+        table = InvestmentRollup.__table__
+        stmt = _UPSERT_DIALECTS[dialect_name](table).values(rows)
+        if dialect_name == "mysql":
+            new = stmt.inserted
+            return stmt.on_duplicate_key_update(
+                approved_count=table.c.approved_count + new.approved_count,
+                approved_amount=table.c.approved_amount + new.approved_amount,
+                rejected_count=table.c.rejected_count + new.rejected_count,
+                updated_at=func.now()
+            )
+        new = stmt.excluded
+        return stmt.on_conflict_do_update(
+            index_elements=[table.c.month, table.c.risk_level],
+            set_={
+                "approved_count": table.c.approved_count + new.approved_count,
+                "approved_amount": table.c.approved_amount + new.approved_amount,
+                "rejected_count": table.c.rejected_count + new.rejected_count,
+                "updated_at": func.now()
+            }
+        )
+
+    @staticmethod
+    async def record(db: AsyncSession, decisions: Iterable[Tuple[Optional[RiskLevel], CustomerStatus, Any]]):
+        """
+        累加审核结果到当月的汇总行（只执行不提交，与客户状态在同一事务中提交）
+
+        decisions 为 (风险等级, 审核后的客户状态, 投资金额)，同一风险等级合并为一行，整批一条语句。
+        """
+        totals = _empty_totals()
+        for risk_level, status, amount in decisions:
+            if risk_level is not None and status in (CustomerStatus.approved, CustomerStatus.rejected):
+                _accumulate(totals, risk_level, status, amount)
+        if not totals:
+            return
+
+        month = current_month()
+        rows = [
+            {"month": month, "risk_level": risk_level, **values, "updated_at": func.now()}
+            for risk_level, values in totals.items()
+        ]
+        stmt = InvestmentRollupService.upsert_statement(db.get_bind().dialect.name, rows)
+        if stmt is not None:
+            await db.execute(stmt)
+        else:
+            await InvestmentRollupService._update_or_insert(db, rows)
+
+    @staticmethod
+    async def _update_or_insert(db: AsyncSession, rows: List[Dict[str, Any]]):
+        """
+        不支持 upsert 语法的数据库：每行先累加已有的汇总行，没有时再插入
+
+        两个事务同时插入同一月份的新行时，后提交的一方违反主键约束，由调用方回滚后重试。
+        """
+        table = InvestmentRollup.__table__
+        for row in rows:
+            result = await db.execute(
+                update(table).where(
+                    table.c.month == row["month"], table.c.risk_level == row["risk_level"]
+                ).values(
+                    approved_count=table.c.approved_count + row["approved_count"],
+                    approved_amount=table.c.approved_amount + row["approved_amount"],
+                    rejected_count=table.c.rejected_count + row["rejected_count"],
+                    updated_at=func.now()
+                )
+            )
+            if result.rowcount == 0:
+                await db.execute(table.insert().values(row))
+
+    @staticmethod
+    def rebuild_statement(month: Optional[str] = None):
+        """
+        重建用的客户查询：每个已通过/拒绝的客户一行（风险等级、状态、投资金额、审核完成时间）
+
+        审核完成时间取客户最后一条通过/拒绝审核记录的时间，没有审核记录的客户取 updated_at。
+        这些时间由数据库时钟写入，月份在 Python 中换算到应用时区后计算（与审核时累加的月份一致），
+        指定 month 时按该月在数据库时钟下的起止时间筛选（略宽，调用方需按月份过滤）。
+        """
+        decided = select(
+            AuditRecord.customer_id,
+            func.max(AuditRecord.audit_date).label("decided_at")
+        ).where(
+            AuditRecord.audit_status.in_([AuditStatus.approved, AuditStatus.rejected])
+        ).group_by(AuditRecord.customer_id).subquery()
+
+        decided_at = func.coalesce(decided.c.decided_at, Customer.updated_at, type_=decided.c.decided_at.type)
+        stmt = select(
+            Customer.risk_level,
+            Customer.status,
+            Customer.investment_amount,
+            decided_at.label("decided_at")
+        ).outerjoin(decided, decided.c.customer_id == Customer.id).where(
+            Customer.status.in_([CustomerStatus.approved, CustomerStatus.rejected]),
+            Customer.risk_level.is_not(None)
+        )
+        if month is not None:
+            start, end = month_bounds(month)
+            # 前后各放宽1秒：SQLite按字符串比较时间，不带微秒的边界时间会落到错误的一侧，由 rebuild 按月份精确过滤
+            stmt = stmt.where(decided_at >= start - timedelta(seconds=1), decided_at < end + timedelta(seconds=1))
+        return stmt
+
+    @staticmethod
+    async def rebuild(db: AsyncSession, month: Optional[str] = None) -> int:
+        """
+        重建汇总表（month 为 None 时重建全部月份），删除和写入在同一事务中，返回写入的行数
+
+        按批流式读取客户，在内存中只保留（月份，风险等级）的合计。
+        重建期间提交的审核结果可能被重复计入或遗漏，应在审核较少时执行，完成后由调用方提交。
+        """
+        clear = delete(InvestmentRollup)
+        if month is not None:
+            clear = clear.where(InvestmentRollup.month == month)
+        await db.execute(clear)
+
+        totals = _empty_totals()
+        result = await db.stream(
+            InvestmentRollupService.rebuild_statement(month).execution_options(yield_per=REBUILD_BATCH_SIZE)
+        )
+        async for risk_level, status, amount, decided_at in result:
+            decided_month = month_of(decided_at)
+            if month is None or decided_month == month:
+                _accumulate(totals, (decided_month, risk_level), status, amount)
+        if not totals:
+            return 0
+
+        await db.execute(InvestmentRollup.__table__.insert(), [
+            {"month": row_month, "risk_level": risk_level, **values}
+            for (row_month, risk_level), values in totals.items()
+        ])
+        return len(totals)
+
+    @staticmethod
+    async def get_monthly(db: AsyncSession, start: Optional[str] = None, end: Optional[str] = None) -> List[Dict[str, Any]]:
+        """按月份返回汇总（含各风险等级的明细），start / end 为包含的起止月份"""
+        stmt = select(InvestmentRollup).order_by(InvestmentRollup.month, InvestmentRollup.risk_level)
+        if start is not None:
+            stmt = stmt.where(InvestmentRollup.month >= start)
+        if end is not None:
+            stmt = stmt.where(InvestmentRollup.month <= end)
+
+        months: Dict[str, Dict[str, Any]] = {}
+        for rollup in (await db.execute(stmt)).scalars():
+            summary = months.setdefault(rollup.month, {
+                "month": rollup.month,
+                "approved_count": 0,
+                "approved_amount": 0.0,
+                "rejected_count": 0,
+                "by_risk_level": {}
+            })
+            amount = float(rollup.approved_amount)
+            summary["approved_count"] += rollup.approved_count
+            summary["approved_amount"] += amount
+            summary["rejected_count"] += rollup.rejected_count
+            summary["by_risk_level"][rollup.risk_level.value] = {
+                "approved_count": rollup.approved_count,
+                "approved_amount": amount,
+                "rejected_count": rollup.rejected_count
+            }
+        return list(months.values())
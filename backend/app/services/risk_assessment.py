@@ -1,75 +1,130 @@
-from typing import Dict, Any
+from typing import Dict, Any, Sequence, Union
+import numpy as np
 from ..models.customer import RiskLevel
 from ..schemas.customer import AssessmentData
 
+# 基础分
+BASE_SCORE = 50
+
+# 评分上下限
+MIN_SCORE = 0
+MAX_SCORE = 100
+
+# 风险等级分界线：[0, 40) 保守型，[40, 70) 稳健型，[70, 100] 激进型
+RISK_LEVEL_BOUNDARIES = (40, 70)
+RISK_LEVELS = (RiskLevel.conservative, RiskLevel.moderate, RiskLevel.aggressive)
+
+# 问卷各项评分表（字段名, {选项: 分值}），模块加载时构建一次
+SCORE_TABLES = (
+    # 年龄影响
+    ("age", {
+        "18-30岁": 15,
+        "31-45岁": 10,
+        "46-60岁": 5,
+        "60岁以上": -10
+    }),
+    # 收入影响
+    ("income", {
+        "50万以上": 15,
+        "30-50万": 10,
+        "10-30万": 5,
+        "10万以下": 0
+    }),
+    # 投资经验影响
+    ("experience", {
+        "5年以上": 15,
+        "3-5年": 10,
+        "1-3年": 5,
+        "无经验": 0
+    }),
+    # 风险承受能力影响
+    ("risk_tolerance", {
+        "30%以上": 20,
+        "15-30%": 10,
+        "5-15%": 5,
+        "5%以内": -10
+    }),
+    # 投资目标影响
+    ("goal", {
+        "追求高收益": 15,
+        "积极增长": 10,
+        "稳健增值": 5,
+        "资产保值": -5
+    }),
+    # 投资期限影响
+    ("period", {
+        "5年以上": 10,
+        "3-5年": 5,
+        "1-3年": 0,
+        "1年以内": -10
+    })
+)
+
+# 选项 -> 整数编码，0 保留给未知选项（计0分）
+ANSWER_CODES = tuple(
+    {answer: code for code, answer in enumerate(scores, start=1)}
+    for _, scores in SCORE_TABLES
+)
+
+# 编码 -> 分值的查找数组，下标0为未知选项
+SCORE_LOOKUPS = tuple(
+    np.array([0] + list(scores.values()), dtype=np.int16)
+    for _, scores in SCORE_TABLES
+)
+
+AssessmentInput = Union[AssessmentData, Dict[str, Any]]
+
 class RiskAssessmentService:
     @staticmethod
     def calculate_risk_score(assessment_data: AssessmentData) -> int:
         """计算风险评分"""
-        score = 50  # 基础分
-        
-        # 年龄影响
-        age_scores = {
-            "18-30岁": 15,
-            "31-45岁": 10,
-            "46-60岁": 5,
-            "60岁以上": -10
-        }
-        score += age_scores.get(assessment_data.age, 0)
-        
-        # 收入影响
-        income_scores = {
-            "50万以上": 15,
-            "30-50万": 10,
-            "10-30万": 5,
-            "10万以下": 0
-        }
-        score += income_scores.get(assessment_data.income, 0)
-        
-        # 投资经验影响
-        experience_scores = {
-            "5年以上": 15,
-            "3-5年": 10,
-            "1-3年": 5,
-            "无经验": 0
-        }
-        score += experience_scores.get(assessment_data.experience, 0)
-        
-        # 风险承受能力影响
-        tolerance_scores = {
-            "30%以上": 20,
-            "15-30%": 10,
-            "5-15%": 5,
-            "5%以内": -10
-        }
-        score += tolerance_scores.get(assessment_data.risk_tolerance, 0)
-        
-        # 投资目标影响
-        goal_scores = {
-            "追求高收益": 15,
-            "积极增长": 10,
-            "稳健增值": 5,
-            "资产保值": -5
-        }
-        score += goal_scores.get(assessment_data.goal, 0)
-        
-        # 投资期限影响
-        period_scores = {
-            "5年以上": 10,
-            "3-5年": 5,
-            "1-3年": 0,
-            "1年以内": -10
-        }
-        score += period_scores.get(assessment_data.period, 0)
-        
-        return max(0, min(100, score))
-    
+        score = BASE_SCORE
+        for field, scores in SCORE_TABLES:
+            score += scores.get(getattr(assessment_data, field), 0)
+
+        return max(MIN_SCORE, min(MAX_SCORE, score))
+
     @staticmethod
     def determine_risk_level(score: int) -> RiskLevel:
         """确定风险等级"""
-        if score < 40:
+        if score < RISK_LEVEL_BOUNDARIES[0]:
             return RiskLevel.conservative
-        elif score < 70:
+        elif score < RISK_LEVEL_BOUNDARIES[1]:
             return RiskLevel.moderate
         else:
             return RiskLevel.aggressive
+
+    @staticmethod
+    def encode_assessments(assessments: Sequence[AssessmentInput]) -> np.ndarray:
+        """将问卷答案编码为 (n, 6) 的整数矩阵，可接受AssessmentData或同名字段的字典"""
+        count = len(assessments)
+        codes = np.zeros((count, len(SCORE_TABLES)), dtype=np.int8)
+        for column, (field, _) in enumerate(SCORE_TABLES):
+            answer_codes = ANSWER_CODES[column]
+            if count and isinstance(assessments[0], dict):
+                answers = (item.get(field) for item in assessments)
+            else:
+                answers = (getattr(item, field) for item in assessments)
+            codes[:, column] = np.fromiter(
+                (answer_codes.get(answer, 0) for answer in answers), dtype=np.int8, count=count
+            )
+        return codes
+
+    @staticmethod
+    def score_encoded(codes: np.ndarray) -> np.ndarray:
+        """对已编码的问卷矩阵向量化计算风险评分"""
+        scores = np.full(codes.shape[0], BASE_SCORE, dtype=np.int16)
+        for column, lookup in enumerate(SCORE_LOOKUPS):
+            scores += lookup[codes[:, column]]
+        return np.clip(scores, MIN_SCORE, MAX_SCORE)
+
+    @staticmethod
+    def calculate_risk_scores_batch(assessments: Sequence[AssessmentInput]) -> np.ndarray:
+        """批量计算风险评分，结果与 calculate_risk_score 逐条计算完全一致"""
+        return RiskAssessmentService.score_encoded(RiskAssessmentService.encode_assessments(assessments))
+
+    @staticmethod
+    def determine_risk_levels_batch(scores: np.ndarray) -> np.ndarray:
+        """批量确定风险等级，返回RiskLevel对象数组"""
+        level_index = np.digitize(scores, RISK_LEVEL_BOUNDARIES)
+        return np.array(RISK_LEVELS, dtype=object)[level_index]
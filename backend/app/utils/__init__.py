@@ -1,8 +1,54 @@
-from .auth import create_access_token, get_current_auditor
+from .auth import (
+    create_access_token, create_stream_ticket, get_current_auditor, get_stream_grant, invalidate_auditor_cache,
+    principal_cache
+)
+from .cache import LRUCache
+from .advice_cache import AdviceCache, advice_cache
+from .password import PasswordHasher, PasswordHasherBusy, password_hasher
 from .notification import NotificationService
+from .notification_dispatcher import (
+    NotificationTransport, LocalSinkTransport, NotificationDispatcher, notification_dispatcher
+)
+from .metrics import (
+    PrometheusMiddleware, PoolCollector, StatsCollector, instrument_engine, register_collector, render_metrics
+)
+from .registration_filter import BloomFilter, RegistrationFilter, registration_filter
+from .auditor_events import AuditorEventBroker, Subscription, TooManySubscribers, auditor_events
+from .sql_instrumentation import RequestSQLStats, SQLInstrumentationMiddleware, current_sql_stats, instrument_sql
 
 __all__ = [
     "create_access_token",
+    "create_stream_ticket",
     "get_current_auditor",
-    "NotificationService"
+    "get_stream_grant",
+    "invalidate_auditor_cache",
+    "principal_cache",
+    "LRUCache",
+    "AdviceCache",
+    "advice_cache",
+    "PasswordHasher",
+    "PasswordHasherBusy",
+    "password_hasher",
+    "NotificationService",
+    "NotificationTransport",
+    "LocalSinkTransport",
+    "NotificationDispatcher",
+    "notification_dispatcher",
+    "PrometheusMiddleware",
+    "PoolCollector",
+    "StatsCollector",
+    "instrument_engine",
+    "register_collector",
+    "render_metrics",
+    "BloomFilter",
+    "RegistrationFilter",
+    "registration_filter",
+    "AuditorEventBroker",
+    "Subscription",
+    "TooManySubscribers",
+    "auditor_events",
+    "RequestSQLStats",
+    "SQLInstrumentationMiddleware",
+    "current_sql_stats",
+    "instrument_sql"
 ]
@@ -0,0 +1,162 @@
+import json
+import logging
+from typing import Any, Dict, Optional
+from ..config import settings
+from .cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+# 版本号未变时才写入缓存（KEYS: 版本号键、缓存键；ARGV: 读取前的版本号、值、过期秒数）
+_SET_IF_CURRENT = """
+if (redis.call('GET', KEYS[1]) or '0') == ARGV[1] then
+    redis.call('SET', KEYS[2], ARGV[2], 'EX', ARGV[3])
+end
+"""
+
+# 增加版本号并删除缓存（KEYS: 版本号键、缓存键；ARGV: 版本号的过期秒数）
+_INVALIDATE = """
+redis.call('INCR', KEYS[1])
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+return redis.call('DEL', KEYS[2])
+"""
+
+class AdviceCache:
+    """
+    客户投资建议响应缓存（读穿透）
+
+    默认使用进程内LRU缓存；配置 advice_cache_backend=redis 时使用Redis，多个实例共享缓存。
+    进程内缓存的 invalidate 只删除本进程的条目，多worker部署时其他进程在过期前仍返回旧数据，
+    因此进程内缓存使用较短的过期时间（advice_cache_local_ttl_seconds），多worker部署应使用Redis。
+    客户状态、风险评估或投资建议变更提交后必须调用 invalidate。
+    未命中时先取 version 再查询数据库，set 时带上该版本：查询期间有 invalidate 时不写入，
+    避免把失效之前读到的旧数据写回缓存。进程内缓存的版本号对整个缓存计数，Redis按客户计数。
+    Redis不可用时按未命中处理，接口直接查询数据库。
+    """
+
+    def __init__(self, local: Optional[LRUCache] = None, redis_client: Any = None,
+                 ttl_seconds: int = 300, key_prefix: str = "advice:"):
+        if local is None and redis_client is None:
+            local = LRUCache(ttl_seconds=ttl_seconds)
+        self.local = local
+        self.redis = redis_client
+        self.ttl_seconds = ttl_seconds
+        self.key_prefix = key_prefix
+        self._version = 0
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    @property
+    def backend(self) -> str:
+        return "redis" if self.redis is not None else "local"
+
+    def _key(self, customer_id: int) -> str:
+        return f"{self.key_prefix}{customer_id}"
+
+    def _version_key(self, customer_id: int) -> str:
+        return f"{self.key_prefix}version:{customer_id}"
+
+    async def get(self, customer_id: int) -> Optional[Dict[str, Any]]:
+        """读取缓存的响应，不存在返回None"""
+        if self.redis is None:
+            value = self.local.get(customer_id)
+        else:
+            try:
+                raw = await self.redis.get(self._key(customer_id))
+                value = json.loads(raw) if raw is not None else None
+            except Exception as e:
+                self.errors += 1
+                logger.warning("读取投资建议缓存失败: %s", e)
+                value = None
+
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def version(self, customer_id: int) -> Optional[str]:
+        """查询数据库之前取得的缓存版本（Redis不可用时返回None，之后不写入）"""
+        if self.redis is None:
+            return str(self._version)
+        try:
+            raw = await self.redis.get(self._version_key(customer_id))
+        except Exception as e:
+            self.errors += 1
+            logger.warning("读取投资建议缓存版本失败: %s", e)
+            return None
+        return raw.decode() if raw is not None else "0"
+
+    async def set(self, customer_id: int, value: Dict[str, Any], version: Optional[str]):
+        """写入缓存（取得 version 之后该客户的缓存被删除过时不写入）"""
+        if version is None:
+            return
+        if self.redis is None:
+            if version == str(self._version):
+                self.local.set(customer_id, value)
+            return
+        try:
+            await self.redis.eval(
+                _SET_IF_CURRENT, 2, self._version_key(customer_id), self._key(customer_id),
+                version, json.dumps(value, ensure_ascii=False), self.ttl_seconds
+            )
+        except Exception as e:
+            self.errors += 1
+            logger.warning("写入投资建议缓存失败: %s", e)
+
+    async def invalidate(self, customer_id: int):
+        """删除指定客户的缓存"""
+        if self.redis is None:
+            self._version += 1
+            self.local.invalidate(customer_id)
+            return
+        try:
+            await self.redis.eval(
+                _INVALIDATE, 2, self._version_key(customer_id), self._key(customer_id), self.ttl_seconds
+            )
+        except Exception as e:
+            self.errors += 1
+            logger.warning("删除投资建议缓存失败 customer_id=%s: %s", customer_id, e)
+
+    def clear(self):
+        """清空进程内缓存并重置统计"""
+        if self.local is not None:
+            self._version += 1
+            self.local.clear()
+        self.hits = self.misses = self.errors = 0
+
+    async def close(self):
+        """关闭Redis连接"""
+        if self.redis is not None:
+            await self.redis.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """命中率统计"""
+        total = self.hits + self.misses
+        return {
+            "backend": self.backend,
+            "size": self.local.stats()["size"] if self.redis is None else None,
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0
+        }
+
+def create_advice_cache() -> AdviceCache:
+    """按配置创建投资建议缓存"""
+    if settings.advice_cache_backend == "redis":
+        try:
+            import redis.asyncio as redis_asyncio
+        except ImportError:
+            raise RuntimeError("advice_cache_backend=redis 需要安装 redis 包")
+        return AdviceCache(
+            redis_client=redis_asyncio.from_url(settings.redis_url),
+            ttl_seconds=settings.advice_cache_ttl_seconds
+        )
+    return AdviceCache(
+        local=LRUCache(max_size=settings.advice_cache_max_size, ttl_seconds=settings.advice_cache_local_ttl_seconds),
+        ttl_seconds=settings.advice_cache_local_ttl_seconds
+    )
+
+# 全局投资建议缓存
+advice_cache = create_advice_cache()
@@ -0,0 +1,132 @@
+import asyncio
+import json
+from collections import Counter
+from typing import Any, Dict, List, Optional, Set, Tuple
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from ..config import settings
+
+# 会话 info 中待发布的事件和计数变化（事务提交后发布）
+_PENDING_EVENTS = "auditor_events"
+_PENDING_COUNTERS = "auditor_counters"
+
+class TooManySubscribers(Exception):
+    """事件流连接数达到上限"""
+
+class Subscription:
+    """一个事件流连接：有界队列，积压超过上限时清空并只保留一个 resync 事件"""
+
+    __slots__ = ("auditor_id", "queue")
+
+    def __init__(self, auditor_id: Optional[int], queue_size: int):
+        self.auditor_id = auditor_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+
+    def put(self, message: Tuple[str, Dict[str, Any]]):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # 客户端消费过慢：丢弃积压的事件，通知其重新加载工作台
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(("resync", {}))
+
+class AuditorEventBroker:
+    """
+    审核员事件的进程内发布/订阅（驱动工作台的 SSE 推送）
+
+    事件类型：task_assigned（分配了新任务）、task_completed（提交了审核结果）、
+    counters_changed（工作台计数的变化量）、resync（积压被丢弃，需要重新加载工作台）。
+    业务代码通过 defer / defer_counters 把事件登记在会话上，事务提交后才发布，回滚时丢弃；
+    同一事务中同一审核员的计数变化合并为一个 counters_changed。
+    只在当前进程内分发，多进程部署时每个进程只推送本进程产生的事件。
+    """
+
+    def __init__(self, queue_size: int = 100, max_subscribers: int = 10000):
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self._subscribers: Dict[int, Set[Subscription]] = {}
+        self.count = 0
+
+    @property
+    def full(self) -> bool:
+        return self.count >= self.max_subscribers
+
+    def subscribe(self, auditor_id: int) -> Subscription:
+        if self.full:
+            raise TooManySubscribers(f"事件流连接数已达上限 {self.max_subscribers}")
+        subscription = Subscription(auditor_id, self.queue_size)
+        self._subscribers.setdefault(auditor_id, set()).add(subscription)
+        self.count += 1
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        subscribers = self._subscribers.get(subscription.auditor_id)
+        if subscribers is None or subscription not in subscribers:
+            return
+        subscribers.discard(subscription)
+        if not subscribers:
+            del self._subscribers[subscription.auditor_id]
+        self.count -= 1
+
+    def publish(self, auditor_id: Optional[int], event_type: str, data: Dict[str, Any]):
+        """发布给指定审核员的所有连接（auditor_id 为 None 时发布给所有连接）"""
+        if auditor_id is None:
+            targets = [subscription for subscribers in self._subscribers.values() for subscription in subscribers]
+        else:
+            targets = self._subscribers.get(auditor_id, ())
+        for subscription in targets:
+            subscription.put((event_type, data))
+
+    @staticmethod
+    def _pending(db: AsyncSession, key: str, default):
+        # 会话还没有开始事务时先开始（不会建立连接），保证之后的提交或回滚一定触发发布或丢弃
+        session = db.sync_session
+        if not session.in_transaction():
+            session.begin()
+        return session.info.setdefault(key, default)
+
+    def defer(self, db: AsyncSession, auditor_id: Optional[int], event_type: str, data: Dict[str, Any]):
+        """登记发给审核员的事件，会话提交后发布（任务未分配审核员时忽略）"""
+        if auditor_id is not None:
+            self._pending(db, _PENDING_EVENTS, []).append((auditor_id, event_type, data))
+
+    def defer_counters(self, db: AsyncSession, auditor_id: Optional[int], **deltas: float):
+        """登记工作台计数的变化量（auditor_id 为 None 表示所有审核员共同的计数，如投资总额）"""
+        counters: Dict[Optional[int], Counter] = self._pending(db, _PENDING_COUNTERS, {})
+        counters.setdefault(auditor_id, Counter()).update(deltas)
+
+    def flush(self, session: Session):
+        """发布会话上登记的事件（由提交事件调用）"""
+        events: List[Tuple[Optional[int], str, Dict[str, Any]]] = session.info.pop(_PENDING_EVENTS, [])
+        counters: Dict[Optional[int], Counter] = session.info.pop(_PENDING_COUNTERS, {})
+        for auditor_id, event_type, data in events:
+            self.publish(auditor_id, event_type, data)
+        for auditor_id, deltas in counters.items():
+            changed = {name: value for name, value in deltas.items() if value}
+            if changed:
+                self.publish(auditor_id, "counters_changed", changed)
+
+    @staticmethod
+    def format(event_type: str, data: Dict[str, Any]) -> str:
+        """按 text/event-stream 格式编码一个事件"""
+        return f"event: {event_type}\ndata: {json.dumps(data, ensure_ascii=False, separators=(',', ':'))}\n\n"
+
+# 全局事件中心
+auditor_events = AuditorEventBroker(
+    queue_size=settings.auditor_events_queue_size,
+    max_subscribers=settings.auditor_events_max_connections
+)
+
+@event.listens_for(Session, "after_commit")
+def _publish_after_commit(session: Session):
+    if _PENDING_EVENTS in session.info or _PENDING_COUNTERS in session.info:
+        auditor_events.flush(session)
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_after_rollback(session: Session, transaction):
+    # 提交时已在 after_commit 中发布并移除，剩下的是回滚或未提交就关闭的事务登记的事件
+    if transaction.parent is None:
+        session.info.pop(_PENDING_EVENTS, None)
+        session.info.pop(_PENDING_COUNTERS, None)
@@ -1,34 +1,36 @@
+import time
 from datetime import datetime, timedelta
-from typing import Optional
-from fastapi import Depends, HTTPException, status
+from typing import NamedTuple, Optional
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from jose import JWTError, jwt
-from passlib.context import CryptContext
-from sqlalchemy.orm import Session
-from ..database import get_db
+from sqlalchemy import select, event
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..database import database
 from ..models.auditor import Auditor
+from ..schemas.auditor import AuditorPrincipal
+from ..services.auditor_scheduler import auditor_scheduler
 from ..config import settings
-
-# 密码加密上下文
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from .cache import LRUCache
+from .password import verify_password, get_password_hash, password_hasher
 
 # JWT Bearer认证
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """验证密码"""
-    return pwd_context.verify(plain_password, hashed_password)
+# 已解析的审核员身份缓存，按令牌中的用户名索引
+principal_cache = LRUCache(max_size=settings.auth_cache_max_size, ttl_seconds=settings.auth_cache_ttl_seconds)
 
-def get_password_hash(password: str) -> str:
-    """获取密码哈希"""
-    return pwd_context.hash(password)
+async def get_auditor_by_username(db: AsyncSession, username: str) -> Optional[Auditor]:
+    """按用户名查询审核员"""
+    result = await db.execute(select(Auditor).where(Auditor.username == username))
+    return result.scalars().first()
 
-def authenticate_auditor(db: Session, username: str, password: str) -> Optional[Auditor]:
-    """认证审核员"""
-    auditor = db.query(Auditor).filter(Auditor.username == username).first()
+async def authenticate_auditor(db: AsyncSession, username: str, password: str) -> Optional[Auditor]:
+    """认证审核员（密码校验在密码计算池中执行，池满时抛出 PasswordHasherBusy）"""
+    auditor = await get_auditor_by_username(db, username)
     if not auditor:
         return None
-    if not verify_password(password, auditor.password_hash):
+    if not await password_hasher.verify(password, auditor.password_hash):
         return None
     return auditor
 
@@ -40,28 +42,112 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.access_token_expire_minutes)
     to_encode.update({"exp": expire})
+    # 首次签发令牌时才导入jose（其cryptography后端导入较慢）
+    from jose import jwt
     encoded_jwt = jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
     return encoded_jwt
 
-async def get_current_auditor(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> Auditor:
-    """获取当前审核员"""
-    credentials_exception = HTTPException(
+# 事件流票据的用途声明：票据只能用于打开事件流，不能作为访问令牌调用其他接口
+STREAM_TICKET_PURPOSE = "auditor_events"
+
+def create_stream_ticket(username: str, session_expires_at: int) -> str:
+    """
+    创建事件流票据（短期、单一用途），session_expires_at 为签发票据所用访问令牌的过期时间（Unix时间戳）
+
+    票据在 auditor_events_ticket_seconds 内可用于建立连接（不超过访问令牌的有效期），
+    建立的连接在访问令牌过期时关闭。
+    """
+    expires_at = min(int(time.time()) + settings.auditor_events_ticket_seconds, session_expires_at)
+    from jose import jwt
+    return jwt.encode(
+        {"sub": username, "purpose": STREAM_TICKET_PURPOSE, "exp": expires_at, "session_exp": session_expires_at},
+        settings.secret_key, algorithm=settings.algorithm
+    )
+
+def invalidate_auditor_cache():
+    """审核员被停用或信息变更后清除缓存的身份和分配池"""
+    principal_cache.clear()
+    auditor_scheduler.invalidate()
+
+@event.listens_for(Auditor, "after_update")
+@event.listens_for(Auditor, "after_delete")
+def _on_auditor_changed(mapper, connection, target):
+    """通过ORM修改审核员时自动失效缓存（批量UPDATE语句需手动调用 invalidate_auditor_cache）"""
+    invalidate_auditor_cache()
+
+def credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+def decode_token(token: str, purpose: Optional[str] = None) -> dict:
+    """校验令牌的签名、有效期和用途（purpose 为 None 时只接受访问令牌），返回其中的声明"""
+    from jose import JWTError, jwt
     try:
-        payload = jwt.decode(credentials.credentials, settings.secret_key, algorithms=[settings.algorithm])
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
+        payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
     except JWTError:
-        raise credentials_exception
-    
-    auditor = db.query(Auditor).filter(Auditor.username == username).first()
+        raise credentials_exception()
+    if payload.get("sub") is None or payload.get("purpose") != purpose:
+        raise credentials_exception()
+    return payload
+
+def decode_username(token: str) -> str:
+    """校验访问令牌并返回其中的用户名"""
+    return decode_token(token)["sub"]
+
+async def load_principal(db: AsyncSession, username: str) -> AuditorPrincipal:
+    """查询审核员身份并缓存"""
+    auditor = await get_auditor_by_username(db, username)
     if auditor is None:
-        raise credentials_exception
-    return auditor
+        raise credentials_exception()
+    principal = AuditorPrincipal.model_validate(auditor)
+    principal_cache.set(username, principal)
+    return principal
+
+async def resolve_principal(username: str) -> AuditorPrincipal:
+    """
+    取得审核员身份：命中缓存时不访问数据库，否则临时打开一个会话查询
+
+    查询完成即归还连接，不占用请求的会话：路由再取连接时，同一个请求不会同时持有两个连接。
+    """
+    principal = principal_cache.get(username)
+    if principal is not None:
+        return principal
+    async with database.async_session_factory() as db:
+        return await load_principal(db, username)
+
+async def get_current_auditor(credentials: HTTPAuthorizationCredentials = Depends(security)) -> AuditorPrincipal:
+    """获取当前审核员（命中缓存时不访问数据库）"""
+    return await resolve_principal(decode_username(credentials.credentials))
+
+class StreamGrant(NamedTuple):
+    """事件流连接的审核员身份和连接的截止时间（访问令牌的过期时间，Unix时间戳）"""
+    auditor: AuditorPrincipal
+    expires_at: int
+
+async def get_token_expiry(credentials: HTTPAuthorizationCredentials = Depends(security)) -> int:
+    """当前访问令牌的过期时间（Unix时间戳）"""
+    return int(decode_token(credentials.credentials)["exp"])
+
+async def get_stream_grant(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security),
+    ticket: Optional[str] = Query(None, description="事件流票据（EventSource 不能设置请求头时使用）")
+) -> StreamGrant:
+    """
+    获取事件流连接的审核员和连接截止时间
+
+    访问令牌放在 Authorization 请求头中；浏览器 EventSource 不能设置请求头，
+    改用 POST /events/ticket 换取的短期票据放在查询参数 ticket 中（URL会出现在访问日志里，不传递访问令牌）。
+    不依赖请求级的数据库会话（长连接期间不占用会话），缓存未命中时临时打开一个会话查询。
+    """
+    if credentials is not None:
+        payload = decode_token(credentials.credentials)
+        expires_at = payload["exp"]
+    elif ticket is not None:
+        payload = decode_token(ticket, STREAM_TICKET_PURPOSE)
+        expires_at = payload.get("session_exp", payload["exp"])
+    else:
+        raise credentials_exception()
+    return StreamGrant(await resolve_principal(payload["sub"]), int(expires_at))
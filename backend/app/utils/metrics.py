@@ -0,0 +1,212 @@
+import time
+import weakref
+from typing import Any, Callable, Iterable, Optional
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, ProcessCollector, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from prometheus_client.registry import Collector
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from ..models.workflow import Notification, NotificationStatus
+
+# 应用指标使用独立的注册表，避免与其他库注册到默认注册表的指标混在一起
+REGISTRY = CollectorRegistry(auto_describe=True)
+ProcessCollector(registry=REGISTRY)
+
+# 未匹配任何路由的请求统一归为一个标签值，防止随机URL导致标签数量无限增长
+UNMATCHED_ROUTE = "<unmatched>"
+
+REQUEST_COUNT = Counter(
+    "http_requests_total", "HTTP请求数", ["method", "route", "status"], registry=REGISTRY
+)
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "HTTP请求处理耗时（秒）", ["method", "route"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+    registry=REGISTRY
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress", "正在处理的HTTP请求数", ["method"], registry=REGISTRY
+)
+# 事件流（SSE）等长连接单独统计：连接期间不计入进行中请求数，时长不计入请求耗时分布
+STREAMS_OPEN = Gauge(
+    "http_streams_open", "打开中的流式连接数（text/event-stream）", ["route"], registry=REGISTRY
+)
+STREAM_DURATION = Histogram(
+    "http_stream_duration_seconds", "流式连接的持续时间（秒）", ["route"],
+    buckets=(1, 10, 60, 300, 900, 1800, 3600, 7200, 14400),
+    registry=REGISTRY
+)
+REQUEST_EXCEPTIONS = Counter(
+    "http_request_exceptions_total", "未处理异常导致失败的HTTP请求数", ["method", "route", "exception"],
+    registry=REGISTRY
+)
+
+DB_POOL_CHECKOUTS = Counter(
+    "db_pool_checkouts_total", "从连接池取出连接的次数", registry=REGISTRY
+)
+DB_POOL_CONNECTS = Counter(
+    "db_pool_connections_created_total", "新建数据库连接的次数", registry=REGISTRY
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out", "当前被取出使用中的连接数", registry=REGISTRY
+)
+
+CUSTOMER_REGISTRATIONS = Counter(
+    "customer_registrations_total", "客户注册数", ["risk_level"], registry=REGISTRY
+)
+AUDITS = Counter(
+    "audits_total", "审核提交数", ["level", "outcome"], registry=REGISTRY
+)
+NOTIFICATIONS = Gauge(
+    "notifications", "通知发件箱中各状态的通知数（抓取时查询）", ["status"], registry=REGISTRY
+)
+
+def route_label(scope: dict) -> str:
+    """请求匹配到的路由模板，如 /api/v1/customers/{customer_id}"""
+    route = scope.get("route")
+    return getattr(route, "path", None) or UNMATCHED_ROUTE
+
+class PrometheusMiddleware:
+    """
+    记录每个路由的请求数、耗时分布、进行中请求数和异常数
+
+    纯ASGI中间件，不缓冲响应体（流式导出不受影响），每个请求只增加几次计数器操作。
+    耗时从收到请求到响应体发送完毕。响应类型为 streaming_media_types（事件流）的长连接
+    在响应开始后移出进行中请求数，连接时长记录在 http_stream_duration_seconds，不计入请求耗时分布。
+    """
+
+    def __init__(self, app, excluded_paths: Iterable[str] = ("/metrics",),
+                 streaming_media_types: Iterable[str] = ("text/event-stream",)):
+        self.app = app
+        self.excluded_paths = frozenset(excluded_paths)
+        self.streaming_media_types = tuple(media_type.encode() for media_type in streaming_media_types)
+
+    def _is_stream(self, headers) -> bool:
+        for name, value in headers:
+            if name.lower() == b"content-type":
+                return value.split(b";")[0].strip() in self.streaming_media_types
+        return False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.excluded_paths:
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = 500
+        streaming = False
+        in_progress = REQUESTS_IN_PROGRESS.labels(method)
+        in_progress.inc()
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status, streaming
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if self._is_stream(message.get("headers", [])):
+                    streaming = True
+                    in_progress.dec()
+                    STREAMS_OPEN.labels(route_label(scope)).inc()
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception as e:
+            REQUEST_EXCEPTIONS.labels(method, route_label(scope), type(e).__name__).inc()
+            raise
+        finally:
+            route = route_label(scope)
+            REQUEST_COUNT.labels(method, route, str(status)).inc()
+            if streaming:
+                STREAMS_OPEN.labels(route).dec()
+                STREAM_DURATION.labels(route).observe(time.perf_counter() - started)
+            else:
+                REQUEST_LATENCY.labels(method, route).observe(time.perf_counter() - started)
+                in_progress.dec()
+
+# 已注册事件监听的连接池，重复调用 instrument_engine 时不重复计数
+_instrumented_pools = weakref.WeakSet()
+
+def instrument_engine(async_engine: AsyncEngine):
+    """监听连接池事件，统计连接取出次数、新建连接数和使用中的连接数"""
+    pool = async_engine.sync_engine.pool
+    if pool in _instrumented_pools:
+        return
+    _instrumented_pools.add(pool)
+
+    @event.listens_for(pool, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        DB_POOL_CONNECTS.inc()
+
+    @event.listens_for(pool, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        DB_POOL_CHECKOUTS.inc()
+        DB_POOL_CHECKED_OUT.inc()
+
+    @event.listens_for(pool, "checkin")
+    def on_checkin(dbapi_connection, connection_record):
+        DB_POOL_CHECKED_OUT.dec()
+
+class PoolCollector(Collector):
+    """抓取时读取连接池容量和溢出连接数（引擎尚未创建或连接池不支持时不输出）"""
+
+    def __init__(self, get_async_engine: Callable[[], Optional[AsyncEngine]]):
+        self.get_async_engine = get_async_engine
+
+    def collect(self):
+        async_engine = self.get_async_engine()
+        pool = async_engine.sync_engine.pool if async_engine is not None else None
+        if not hasattr(pool, "overflow"):
+            return
+        yield GaugeMetricFamily("db_pool_size", "连接池容量", value=pool.size())
+        yield GaugeMetricFamily("db_pool_checked_in", "连接池中空闲的连接数", value=pool.checkedin())
+        yield GaugeMetricFamily("db_pool_overflow", "超出连接池容量的连接数（负数表示尚未用满）",
+                                value=pool.overflow())
+
+class StatsCollector(Collector):
+    """抓取时读取进程内组件的统计（投资建议缓存、通知发送、认证身份缓存）"""
+
+    def __init__(self, advice_cache: Any, notification_dispatcher: Any, principal_cache: Any):
+        self.advice_cache = advice_cache
+        self.notification_dispatcher = notification_dispatcher
+        self.principal_cache = principal_cache
+
+    def collect(self):
+        cache = CounterMetricFamily("advice_cache_requests", "投资建议缓存查询数", labels=["result"])
+        stats = self.advice_cache.stats()
+        for result in ("hits", "misses", "errors"):
+            cache.add_metric([result], stats[result])
+        yield cache
+
+        dispatched = CounterMetricFamily("notifications_dispatched", "后台任务发送通知的结果数", labels=["result"])
+        for result, count in self.notification_dispatcher.stats().items():
+            dispatched.add_metric([result], count)
+        yield dispatched
+
+        # 认证身份缓存：命中时不访问数据库
+        principals = self.principal_cache.stats()
+        auth_cache = CounterMetricFamily("auth_cache_requests", "认证身份缓存查询数", labels=["result"])
+        for result in ("hits", "misses"):
+            auth_cache.add_metric([result], principals[result])
+        yield auth_cache
+        yield GaugeMetricFamily("auth_cache_size", "认证身份缓存的条目数", value=principals["size"])
+
+# 已注册的抓取时指标，多次创建应用（测试、基准测试）时只注册一次
+_registered_collectors = {}
+
+def register_collector(name: str, collector: Collector):
+    """注册抓取时读取的指标，同名的只注册一次"""
+    if name not in _registered_collectors:
+        REGISTRY.register(collector)
+        _registered_collectors[name] = collector
+
+async def render_metrics(session_factory: Optional[Callable[[], AsyncSession]] = None) -> bytes:
+    """查询需要读数据库的指标后，输出Prometheus文本格式"""
+    if session_factory is not None:
+        async with session_factory() as db:
+            result = await db.execute(
+                select(Notification.status, func.count()).group_by(Notification.status)
+            )
+            counts = dict(result.all())
+        for status in NotificationStatus:
+            NOTIFICATIONS.labels(status.value).set(counts.get(status, 0))
+    return generate_latest(REGISTRY)
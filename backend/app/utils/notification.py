@@ -1,48 +1,85 @@
 from datetime import datetime
-from sqlalchemy.orm import Session
+from typing import List, Tuple
+from sqlalchemy import select, insert
+from sqlalchemy.ext.asyncio import AsyncSession
 from ..models.workflow import Notification, NotificationType, NotificationStatus
 
 class NotificationService:
     @staticmethod
-    def create_notification(
-        db: Session,
+    async def create_notification(
+        db: AsyncSession,
         customer_id: int,
         notification_type: NotificationType,
         title: str,
         content: str
     ) -> Notification:
-        """创建通知"""
+        """
+        创建通知（写入发件箱）
+
+        只把通知加入当前会话，由调用方与业务数据在同一事务中提交；
+        实际发送由后台的 NotificationDispatcher 完成。
+        """
         notification = Notification(
             customer_id=customer_id,
             notification_type=notification_type,
             title=title,
             content=content,
-            status=NotificationStatus.pending
+            status=NotificationStatus.pending,
+            attempts=0
         )
         db.add(notification)
-        db.commit()
         return notification
     
     @staticmethod
-    def send_audit_completion_notification(db: Session, customer_id: int, customer_name: str, status: str):
-        """发送审核完成通知"""
+    def audit_completion_message(customer_name: str, status: str) -> Tuple[str, str]:
+        """审核完成通知的标题和内容"""
         if status == "approved":
             title = "投资风险评估审核通过"
             content = f"尊敬的{customer_name}，您的投资风险评估已审核通过，请登录系统查看投资建议。"
         else:
             title = "投资风险评估审核结果"
             content = f"尊敬的{customer_name}，您的投资风险评估审核未通过，请联系客服了解详情。"
-        
-        return NotificationService.create_notification(
+        return title, content
+    
+    @staticmethod
+    async def send_audit_completion_notification(db: AsyncSession, customer_id: int, customer_name: str, status: str):
+        """发送审核完成通知"""
+        title, content = NotificationService.audit_completion_message(customer_name, status)
+        return await NotificationService.create_notification(
             db, customer_id, NotificationType.sms, title, content
         )
     
     @staticmethod
-    def get_customer_notifications(db: Session, customer_id: int, limit: int = 10):
+    async def send_audit_completion_notifications(db: AsyncSession, customers: List[Tuple[int, str, str]]):
+        """
+        批量发送审核完成通知（customers 为 (客户ID, 客户姓名, 审核结果)）
+
+        与 send_audit_completion_notification 相同，只写入发件箱，由调用方提交；
+        一条多行INSERT写入，不逐条 flush。
+        """
+        rows = []
+        for customer_id, customer_name, status in customers:
+            title, content = NotificationService.audit_completion_message(customer_name, status)
+            rows.append({
+                "customer_id": customer_id,
+                "notification_type": NotificationType.sms,
+                "title": title,
+                "content": content,
+                "status": NotificationStatus.pending,
+                "attempts": 0
+            })
+        if rows:
+            await db.execute(insert(Notification), rows)
+    
+    @staticmethod
+    async def get_customer_notifications(db: AsyncSession, customer_id: int, limit: int = 10):
         """获取客户的通知历史"""
-        notifications = db.query(Notification).filter(
-            Notification.customer_id == customer_id
-        ).order_by(Notification.created_at.desc()).limit(limit).all()
+        result = await db.execute(
+            select(Notification).where(
+                Notification.customer_id == customer_id
+            ).order_by(Notification.created_at.desc()).limit(limit)
+        )
+        notifications = result.scalars().all()
         
         return [
             {
@@ -58,15 +95,18 @@ class NotificationService:
         ]
     
     @staticmethod
-    def mark_notification_as_read(db: Session, notification_id: int, customer_id: int):
+    async def mark_notification_as_read(db: AsyncSession, notification_id: int, customer_id: int):
         """标记通知为已读"""
-        notification = db.query(Notification).filter(
-            Notification.id == notification_id,
-            Notification.customer_id == customer_id
-        ).first()
+        result = await db.execute(
+            select(Notification).where(
+                Notification.id == notification_id,
+                Notification.customer_id == customer_id
+            )
+        )
+        notification = result.scalars().first()
         
         if notification:
             notification.status = NotificationStatus.sent
-            db.commit()
+            await db.commit()
             return True
         return False
@@ -0,0 +1,251 @@
+import asyncio
+import logging
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Any, Callable, Deque, Dict, List, Optional, Type
+from sqlalchemy import select, update, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..config import settings
+from ..database import database
+from ..models.customer import Customer
+from ..models.workflow import Notification, NotificationStatus
+
+logger = logging.getLogger(__name__)
+
+class NotificationTransport:
+    """
+    通知发送通道
+
+    send 发送一条通知，失败时抛出异常，由调度器负责重试。
+    message 中包含 id、customer_id、notification_type、title、content、phone、email。
+    """
+
+    async def send(self, message: Dict[str, Any]):
+        raise NotImplementedError
+
+class LocalSinkTransport(NotificationTransport):
+    """本地通道：不真正发送短信/邮件，只记录到内存和日志（开发和测试使用）"""
+
+    def __init__(self, max_messages: int = 1000):
+        self.messages: Deque[Dict[str, Any]] = deque(maxlen=max_messages)
+
+    async def send(self, message: Dict[str, Any]):
+        self.messages.append(message)
+        logger.info(
+            "通知已发送[%s] customer_id=%s title=%s",
+            message["notification_type"], message["customer_id"], message["title"]
+        )
+
+# 可用的发送通道，接入真实短信/邮件网关时在此注册
+TRANSPORTS: Dict[str, Type[NotificationTransport]] = {
+    "local": LocalSinkTransport
+}
+
+def create_transport(name: str) -> NotificationTransport:
+    """按名称创建发送通道"""
+    if name not in TRANSPORTS:
+        raise ValueError(f"未知的通知发送通道: {name}")
+    return TRANSPORTS[name]()
+
+class NotificationDispatcher:
+    """
+    通知发件箱调度器
+
+    后台任务按批轮询 notifications 表中到期的 pending 通知，先把这一批的下次发送时间
+    推后 lease_seconds 秒作为租约（进程崩溃后租约到期会被重新发送），
+    再并发调用发送通道，最后批量回写结果：成功标记为 sent，
+    失败按指数退避安排重试，达到 max_attempts 次后标记为 failed。
+    MySQL 下使用 SKIP LOCKED，多个实例可以同时运行。
+    """
+
+    def __init__(
+        self,
+        transport: NotificationTransport,
+        session_factory: Optional[Callable[[], AsyncSession]] = None,
+        batch_size: int = 100,
+        poll_interval: float = 1.0,
+        concurrency: int = 10,
+        max_attempts: int = 5,
+        retry_base_seconds: float = 2.0,
+        retry_max_seconds: float = 300.0,
+        lease_seconds: int = 60
+    ):
+        self.transport = transport
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self.lease_seconds = lease_seconds
+        self.sent = 0
+        self.retried = 0
+        self.failed = 0
+        self._task: Optional[asyncio.Task] = None
+        self._stopping: Optional[asyncio.Event] = None
+
+    def _session(self) -> AsyncSession:
+        """未指定会话工厂时使用全局数据库"""
+        return (self.session_factory or database.async_session_factory)()
+
+    def retry_delay(self, attempts: int) -> float:
+        """第 attempts 次失败后的等待时间（秒）"""
+        return min(self.retry_base_seconds * (2 ** (attempts - 1)), self.retry_max_seconds)
+
+    def claim_statement(self, now: datetime):
+        """
+        到期待发送通知的查询（联表取客户的手机号和邮箱）
+
+        只锁定通知行（FOR UPDATE OF notifications），不锁联表的客户行，多个实例并发轮询时跳过已被锁定的通知。
+        """
+        return select(
+            Notification.id,
+            Notification.customer_id,
+            Notification.notification_type,
+            Notification.title,
+            Notification.content,
+            Notification.attempts,
+            Customer.phone,
+            Customer.email
+        ).join(Customer, Customer.id == Notification.customer_id).where(
+            Notification.status == NotificationStatus.pending,
+            or_(Notification.next_attempt_at.is_(None), Notification.next_attempt_at <= now)
+        ).order_by(Notification.id).limit(self.batch_size).with_for_update(skip_locked=True, of=Notification)
+
+    async def _claim_batch(self, now: datetime) -> List[Dict[str, Any]]:
+        """取出一批到期的待发送通知并加租约"""
+        async with self._session() as db:
+            result = await db.execute(self.claim_statement(now))
+            rows = result.all()
+            if not rows:
+                return []
+
+            await db.execute(
+                update(Notification).where(
+                    Notification.id.in_([row.id for row in rows])
+                ).values(next_attempt_at=now + timedelta(seconds=self.lease_seconds))
+            )
+            await db.commit()
+
+        return [
+            {
+                "id": row.id,
+                "customer_id": row.customer_id,
+                "notification_type": row.notification_type.value,
+                "title": row.title,
+                "content": row.content,
+                "attempts": row.attempts,
+                "phone": row.phone,
+                "email": row.email
+            }
+            for row in rows
+        ]
+
+    async def _send_all(self, messages: List[Dict[str, Any]]) -> List[Optional[str]]:
+        """并发发送，返回每条通知的错误信息（成功为None）"""
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def send_one(message: Dict[str, Any]) -> Optional[str]:
+            async with semaphore:
+                try:
+                    await self.transport.send(message)
+                    return None
+                except Exception as e:
+                    return f"{type(e).__name__}: {e}"[:1000]
+
+        return await asyncio.gather(*(send_one(message) for message in messages))
+
+    async def dispatch_once(self) -> int:
+        """处理一批通知，返回本批处理的条数"""
+        now = datetime.utcnow()
+        messages = await self._claim_batch(now)
+        if not messages:
+            return 0
+
+        errors = await self._send_all(messages)
+        finished_at = datetime.utcnow()
+
+        sent_ids = [message["id"] for message, error in zip(messages, errors) if error is None]
+        failures = []
+        for message, error in zip(messages, errors):
+            if error is None:
+                continue
+            attempts = message["attempts"] + 1
+            if attempts >= self.max_attempts:
+                status, next_attempt_at = NotificationStatus.failed, None
+                self.failed += 1
+            else:
+                status = NotificationStatus.pending
+                next_attempt_at = finished_at + timedelta(seconds=self.retry_delay(attempts))
+                self.retried += 1
+            failures.append({
+                "id": message["id"],
+                "status": status,
+                "attempts": attempts,
+                "next_attempt_at": next_attempt_at,
+                "last_error": error
+            })
+            logger.warning("通知发送失败 id=%s 第%s次: %s", message["id"], attempts, error)
+
+        async with self._session() as db:
+            if sent_ids:
+                await db.execute(
+                    update(Notification).where(Notification.id.in_(sent_ids)).values(
+                        status=NotificationStatus.sent,
+                        attempts=Notification.attempts + 1,
+                        next_attempt_at=None,
+                        last_error=None,
+                        sent_at=finished_at
+                    )
+                )
+            if failures:
+                # 按主键批量更新
+                await db.execute(update(Notification), failures)
+            await db.commit()
+
+        self.sent += len(sent_ids)
+        return len(messages)
+
+    async def run(self):
+        """循环处理，直到 stop 被调用；一批取满时立即处理下一批"""
+        while not self._stopping.is_set():
+            try:
+                processed = await self.dispatch_once()
+            except Exception:
+                logger.exception("通知发件箱处理失败")
+                processed = 0
+            if processed < self.batch_size:
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+    def start(self):
+        """启动后台任务"""
+        if self._task is None or self._task.done():
+            self._stopping = asyncio.Event()
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        """停止后台任务，等待当前批次处理完成"""
+        if self._task is not None:
+            self._stopping.set()
+            await self._task
+            self._task = None
+
+    def stats(self) -> Dict[str, int]:
+        """发送统计"""
+        return {"sent": self.sent, "retried": self.retried, "failed": self.failed}
+
+# 全局通知调度器
+notification_dispatcher = NotificationDispatcher(
+    transport=create_transport(settings.notification_transport),
+    batch_size=settings.notification_batch_size,
+    poll_interval=settings.notification_poll_interval_seconds,
+    concurrency=settings.notification_send_concurrency,
+    max_attempts=settings.notification_max_attempts,
+    retry_base_seconds=settings.notification_retry_base_seconds,
+    retry_max_seconds=settings.notification_retry_max_seconds,
+    lease_seconds=settings.notification_lease_seconds
+)
@@ -0,0 +1,91 @@
+import asyncio
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+from functools import lru_cache
+from typing import TYPE_CHECKING, Callable, List, Optional
+from ..config import settings
+
+if TYPE_CHECKING:
+    from passlib.context import CryptContext
+
+@lru_cache(maxsize=None)
+def get_pwd_context() -> "CryptContext":
+    """密码加密上下文（首次使用时才导入passlib和bcrypt，不拖慢应用启动）"""
+    from passlib.context import CryptContext
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """验证密码"""
+    return get_pwd_context().verify(plain_password, hashed_password)
+
+def get_password_hash(password: str) -> str:
+    """获取密码哈希"""
+    return get_pwd_context().hash(password)
+
+class PasswordHasherBusy(Exception):
+    """密码计算队列已满"""
+
+class PasswordHasher:
+    """
+    在线程池或进程池中执行bcrypt计算，避免阻塞事件循环
+
+    排队中和执行中的任务总数超过 max_pending 时立即抛出 PasswordHasherBusy，
+    由调用方返回503，而不是让请求无限排队。max_workers 为0时在当前线程直接计算。
+    """
+
+    def __init__(self, max_workers: int = 4, max_pending: int = 64, use_processes: bool = False):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.use_processes = use_processes
+        self.pending = 0
+        self.rejected = 0
+        self._executor: Optional[Executor] = None
+
+    @property
+    def executor(self) -> Executor:
+        """首次使用时创建线程池/进程池"""
+        if self._executor is None:
+            if self.use_processes:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="bcrypt")
+        return self._executor
+
+    async def _run(self, func: Callable, *args):
+        if self.max_workers <= 0:
+            return func(*args)
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise PasswordHasherBusy()
+
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+        finally:
+            self.pending -= 1
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """异步验证密码"""
+        return await self._run(verify_password, plain_password, hashed_password)
+
+    async def hash(self, password: str) -> str:
+        """异步计算密码哈希"""
+        return await self._run(get_password_hash, password)
+
+    def hash_many(self, passwords: List[str]) -> List[str]:
+        """同步批量计算密码哈希（供初始化脚本使用），在池中并行执行"""
+        if self.max_workers <= 0:
+            return [get_password_hash(password) for password in passwords]
+        return list(self.executor.map(get_password_hash, passwords))
+
+    def shutdown(self):
+        """关闭线程池/进程池"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+# 全局密码计算池
+password_hasher = PasswordHasher(
+    max_workers=settings.password_hash_workers,
+    max_pending=settings.password_hash_max_pending,
+    use_processes=settings.password_hash_use_processes
+)
@@ -0,0 +1,163 @@
+import asyncio
+import logging
+import math
+import time
+from typing import Iterable, List, Optional, Tuple
+import numpy as np
+from sqlalchemy import select, func
+from ..config import settings
+from ..models.customer import Customer
+
+logger = logging.getLogger(__name__)
+
+# 加载时每批读取的行数
+LOAD_CHUNK_SIZE = 50000
+
+class BloomFilter:
+    """
+    布隆过滤器：判断为不存在时一定不存在，判断为可能存在时有 error_rate 的误判
+
+    位数组用 numpy 保存，批量添加时向量化计算位置。
+    使用进程内的 hash()，过滤器只在当前进程中使用，不持久化。
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        self.capacity = max(1, capacity)
+        self.error_rate = error_rate
+        self.size = max(64, int(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / self.capacity * math.log(2)))
+        self._bits = np.zeros((self.size + 7) // 8, dtype=np.uint8)
+        self.count = 0
+
+    @property
+    def memory_bytes(self) -> int:
+        return self._bits.nbytes
+
+    def _positions(self, key: str) -> List[int]:
+        # 双重哈希：由一个64位哈希的高低32位生成 hash_count 个位置
+        digest = hash(key) & 0xFFFFFFFFFFFFFFFF
+        low, high = digest & 0xFFFFFFFF, (digest >> 32) | 1
+        return [(low + i * high) % self.size for i in range(self.hash_count)]
+
+    def add(self, key: str):
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def add_many(self, keys: Iterable[str]):
+        """批量添加（加载时使用）"""
+        digests = np.fromiter((hash(key) for key in keys), dtype=np.int64).view(np.uint64)
+        if not len(digests):
+            return
+        low = digests & np.uint64(0xFFFFFFFF)
+        high = (digests >> np.uint64(32)) | np.uint64(1)
+        rounds = np.arange(self.hash_count, dtype=np.uint64)
+        positions = ((low[:, None] + rounds[None, :] * high[:, None]) % np.uint64(self.size)).ravel()
+        np.bitwise_or.at(
+            self._bits, positions >> np.uint64(3), np.left_shift(1, positions & np.uint64(7)).astype(np.uint8)
+        )
+        self.count += len(digests)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+class RegistrationFilter:
+    """
+    注册查重预过滤：进程内记录已注册的手机号和身份证号
+
+    启动时在后台从数据库加载，注册成功后追加（加载过程中追加的在加载完成时补入）。
+    单个注册时两者都判断为不存在则直接插入，不再查询数据库；
+    判断为可能存在时才用一次查询确认（布隆过滤器有误判，不能直接拒绝）。批量注册总是查询数据库。
+    skipped_checks、confirmed_checks 分别统计省去的查询次数和需要确认的次数。
+    其他进程注册的客户不会出现在本进程的过滤器中，最终由数据库唯一约束保证不重复。
+    """
+
+    def __init__(self, capacity: int = 1000000, error_rate: float = 0.01):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.phones: Optional[BloomFilter] = None
+        self.id_cards: Optional[BloomFilter] = None
+        self.loaded = False
+        self.load_seconds: Optional[float] = None
+        self.skipped_checks = 0
+        self.confirmed_checks = 0
+        self._task: Optional[asyncio.Task] = None
+        # 加载过程中追加的客户（加载完成时补入新的过滤器）
+        self._added_during_load: Optional[List[Tuple[str, str]]] = None
+
+    def might_exist(self, phone: str, id_card: str) -> bool:
+        """手机号或身份证号可能已注册，需要查询数据库确认（未加载时无法判断，返回 True）"""
+        if not self.loaded:
+            return True
+        if phone in self.phones or id_card in self.id_cards:
+            self.confirmed_checks += 1
+            return True
+        self.skipped_checks += 1
+        return False
+
+    def add(self, phone: str, id_card: str):
+        """记录新注册的客户（加载过程中也可以追加）"""
+        if self._added_during_load is not None:
+            self._added_during_load.append((phone, id_card))
+        if self.phones is not None:
+            self.phones.add(phone)
+            self.id_cards.add(id_card)
+
+    async def load(self, session_factory):
+        """从数据库加载全部手机号和身份证号，容量至少为现有客户数的两倍"""
+        started = time.perf_counter()
+        self.loaded = False
+        self._added_during_load = []
+        try:
+            async with session_factory() as db:
+                existing = await db.scalar(select(func.count()).select_from(Customer))
+                capacity = max(self.capacity, 2 * existing)
+                phone_filter = BloomFilter(capacity, self.error_rate)
+                id_card_filter = BloomFilter(capacity, self.error_rate)
+                result = await db.stream(
+                    select(Customer.phone, Customer.id_card).execution_options(yield_per=LOAD_CHUNK_SIZE)
+                )
+                async for rows in result.partitions():
+                    phones, id_cards = zip(*rows)
+                    phone_filter.add_many(phones)
+                    id_card_filter.add_many(id_cards)
+            # 读取期间注册成功的客户可能不在读到的数据中，补入后再启用（此后没有 await，不会再漏掉）
+            for phone, id_card in self._added_during_load:
+                phone_filter.add(phone)
+                id_card_filter.add(id_card)
+            self.phones = phone_filter
+            self.id_cards = id_card_filter
+        finally:
+            self._added_during_load = None
+        self.loaded = True
+        self.load_seconds = time.perf_counter() - started
+        logger.info(
+            "注册查重过滤器加载完成：%d 个客户，%.1fs，占用 %.1fMB",
+            self.phones.count, self.load_seconds, (self.phones.memory_bytes + self.id_cards.memory_bytes) / 2 ** 20
+        )
+
+    def start(self, session_factory):
+        """在后台加载（不阻塞应用启动）"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._load_in_background(session_factory))
+
+    async def _load_in_background(self, session_factory):
+        try:
+            await self.load(session_factory)
+        except Exception:
+            logger.exception("注册查重过滤器加载失败，注册时查询数据库查重")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+# 全局过滤器实例
+registration_filter = RegistrationFilter(
+    capacity=settings.registration_filter_capacity,
+    error_rate=settings.registration_filter_error_rate
+)
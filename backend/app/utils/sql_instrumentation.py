@@ -0,0 +1,156 @@
+import contextvars
+import json
+import logging
+import re
+import time
+import weakref
+from collections import Counter
+from functools import lru_cache
+from typing import Any, Dict, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from .metrics import route_label
+
+logger = logging.getLogger(__name__)
+
+# 参数列表中连续的占位符（IN (?, ?, ?)）视为同一种语句
+_PLACEHOLDER_LIST = re.compile(r"\(\s*(\?|%s|%\(\w+\)s)(\s*,\s*(\?|%s|%\(\w+\)s))+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+# 日志中参数的最大长度，避免批量插入的参数撑爆日志
+MAX_PARAMETERS_LENGTH = 500
+
+@lru_cache(maxsize=1024)
+def statement_shape(statement: str) -> str:
+    """语句形态：合并空白和 IN 参数列表，参数不同但结构相同的语句形态相同"""
+    return _PLACEHOLDER_LIST.sub("(?)", _WHITESPACE.sub(" ", statement).strip())
+
+def format_parameters(parameters: Any) -> str:
+    text = repr(parameters)
+    if len(text) > MAX_PARAMETERS_LENGTH:
+        text = text[:MAX_PARAMETERS_LENGTH] + "..."
+    return text
+
+class RequestSQLStats:
+    """单个请求内执行的SQL语句数、数据库耗时和各语句形态的执行次数"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.shapes: Counter = Counter()
+
+    def record(self, statement: str, elapsed: float):
+        self.count += 1
+        self.duration += elapsed
+        self.shapes[statement_shape(statement)] += 1
+
+    def repeated(self, threshold: int) -> Dict[str, int]:
+        """执行次数超过 threshold 的语句形态（N+1查询）"""
+        return {shape: count for shape, count in self.shapes.items() if count > threshold}
+
+_current_stats: contextvars.ContextVar[Optional[RequestSQLStats]] = contextvars.ContextVar(
+    "request_sql_stats", default=None
+)
+
+def current_sql_stats() -> Optional[RequestSQLStats]:
+    """当前请求的SQL统计，不在请求中时返回None"""
+    return _current_stats.get()
+
+# 已注册事件监听的引擎，重复调用 instrument_sql 时不重复统计
+_instrumented_engines = weakref.WeakSet()
+
+def instrument_sql(engine: Engine, slow_query_threshold_ms: float = 200):
+    """
+    监听引擎的语句执行事件，计入当前请求的统计，并记录超过阈值的慢查询
+
+    异步引擎传入 async_engine.sync_engine。
+    """
+    if engine in _instrumented_engines:
+        return
+    _instrumented_engines.add(engine)
+    threshold = slow_query_threshold_ms / 1000
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start_time"].pop()
+        stats = _current_stats.get()
+        if stats is not None:
+            stats.record(statement, elapsed)
+        if elapsed >= threshold:
+            logger.warning(
+                "慢查询 %.1fms: %s 参数: %s",
+                elapsed * 1000, _WHITESPACE.sub(" ", statement), format_parameters(parameters)
+            )
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(exception_context):
+        # 执行失败时不会触发 after_cursor_execute，丢弃对应的开始时间
+        connection = exception_context.connection
+        if connection is not None and connection.info.get("query_start_time"):
+            connection.info["query_start_time"].pop()
+
+class SQLInstrumentationMiddleware:
+    """
+    统计每个请求的SQL语句数和数据库耗时，检测N+1查询
+
+    同一形态的语句在一个请求内执行超过 n_plus_one_threshold 次时记录警告。
+    expose_headers=True（调试模式）时通过响应头 X-DB-Queries、X-DB-Time-Ms、X-DB-N-Plus-One 返回统计；
+    否则每个执行过SQL的请求输出一行JSON日志。
+    """
+
+    def __init__(self, app, n_plus_one_threshold: int = 10, expose_headers: bool = False):
+        self.app = app
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.expose_headers = expose_headers
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestSQLStats()
+        token = _current_stats.set(stats)
+        status = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                # 响应头在响应体之前发送，只反映到此为止的统计（流式响应后续批次的查询不计入）
+                if self.expose_headers:
+                    repeated = stats.repeated(self.n_plus_one_threshold)
+                    headers = list(message.get("headers", []))
+                    headers.append((b"x-db-queries", str(stats.count).encode()))
+                    headers.append((b"x-db-time-ms", f"{stats.duration * 1000:.2f}".encode()))
+                    if repeated:
+                        headers.append((b"x-db-n-plus-one", str(max(repeated.values())).encode()))
+                    message = dict(message, headers=headers)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_stats.reset(token)
+            self.report(scope, status, stats, time.perf_counter() - started)
+
+    def report(self, scope: dict, status: int, stats: RequestSQLStats, elapsed: float):
+        route = route_label(scope)
+        repeated = stats.repeated(self.n_plus_one_threshold)
+        for shape, count in repeated.items():
+            logger.warning("疑似N+1查询 %s %s: 同一语句执行 %d 次: %s", scope["method"], route, count, shape)
+        if not self.expose_headers and stats.count:
+            logger.info(json.dumps({
+                "event": "request_sql",
+                "method": scope["method"],
+                "route": route,
+                "status": status,
+                "duration_ms": round(elapsed * 1000, 2),
+                "db_queries": stats.count,
+                "db_time_ms": round(stats.duration * 1000, 2),
+                "n_plus_one": max(repeated.values()) if repeated else 0
+            }, ensure_ascii=False))
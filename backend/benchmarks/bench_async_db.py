@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+异步数据库层基准测试
+
+对比旧实现（async路由中直接调用同步Session）与新实现（AsyncSession）
+在固定并发下的吞吐量(RPS)、p99延迟，以及事件循环阻塞时间
+（loop lag，即其他请求在同一worker上被卡住的时间）。
+
+用法:
+    cd backend
+    python benchmarks/bench_async_db.py --customers 2000 --requests 4000 --concurrency 50
+"""
+
+import argparse
+import asyncio
+import time
+
+from common import percentile  # 必须在导入app之前导入，用于切换到临时数据库
+
+import httpx
+from fastapi import FastAPI, HTTPException
+
+from app.api import customers_router
+from app.database import SessionLocal, engine
+from app.models import Base
+from app.models.customer import Customer, CustomerStatus, RiskLevel
+from app.models.workflow import RiskAssessment, InvestmentAdvice
+
+
+def seed_customers(count: int):
+    """生成测试客户数据"""
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        for i in range(count):
+            customer = Customer(
+                name=f"客户{i}",
+                phone=f"139{i:08d}",
+                id_card=f"110101{i:012d}",
+                investment_amount=100000 + i,
+                risk_score=60,
+                risk_level=RiskLevel.moderate,
+                status=CustomerStatus.pending
+            )
+            db.add(customer)
+            db.flush()
+            db.add(RiskAssessment(customer_id=customer.id, assessment_data={}, risk_score=60, risk_level="moderate"))
+            db.add(InvestmentAdvice(customer_id=customer.id, portfolio_type="moderate", portfolio_config={}))
+        db.commit()
+    finally:
+        db.close()
+
+
+def build_legacy_app() -> FastAPI:
+    """旧实现：在async路由中使用同步Session，查询会阻塞事件循环"""
+    legacy = FastAPI()
+
+    @legacy.get("/api/v1/customers/{customer_id}/advice")
+    async def get_customer_advice(customer_id: int):
+        db = SessionLocal()
+        try:
+            customer = db.query(Customer).filter(Customer.id == customer_id).first()
+            if not customer:
+                raise HTTPException(status_code=404, detail="客户不存在")
+            assessment = db.query(RiskAssessment).filter(RiskAssessment.customer_id == customer_id).first()
+            advice = db.query(InvestmentAdvice).filter(InvestmentAdvice.customer_id == customer_id).first()
+            return {
+                "customer_id": customer.id,
+                "risk_score": assessment.risk_score if assessment else None,
+                "portfolio_type": advice.portfolio_type if advice else None
+            }
+        finally:
+            db.close()
+
+    return legacy
+
+
+def build_async_app() -> FastAPI:
+    """新实现：使用AsyncSession的正式路由"""
+    current = FastAPI()
+    current.include_router(customers_router)
+    return current
+
+
+async def probe_loop_lag(lags: list, stop: asyncio.Event, interval: float = 0.005):
+    """周期性睡眠并记录实际唤醒延迟，衡量事件循环被阻塞的程度"""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(max(0.0, time.perf_counter() - start - interval))
+
+
+async def run_load(app: FastAPI, customers: int, total_requests: int, concurrency: int) -> dict:
+    """在固定并发下压测投资建议接口"""
+    latencies = []
+    lags = []
+    stop = asyncio.Event()
+    queue = asyncio.Queue()
+    for i in range(total_requests):
+        queue.put_nowait(i % customers + 1)
+
+    async def worker(client: httpx.AsyncClient):
+        while True:
+            try:
+                customer_id = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            start = time.perf_counter()
+            response = await client.get(f"/api/v1/customers/{customer_id}/advice")
+            latencies.append(time.perf_counter() - start)
+            response.raise_for_status()
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        probe = asyncio.create_task(probe_loop_lag(lags, stop))
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await probe
+
+    latencies.sort()
+    lags.sort()
+    return {
+        "requests": total_requests,
+        "rps": round(total_requests / elapsed, 1),
+        "p50_ms": percentile(latencies, 0.5),
+        "p99_ms": percentile(latencies, 0.99),
+        "loop_lag_p99_ms": percentile(lags, 0.99),
+        "loop_lag_max_ms": percentile(lags, 1.0)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="同步Session vs AsyncSession 基准测试")
+    parser.add_argument("--customers", type=int, default=2000)
+    parser.add_argument("--requests", type=int, default=4000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"🔨 生成 {args.customers} 条客户数据...")
+    seed_customers(args.customers)
+
+    print(f"🚀 并发 {args.concurrency}，共 {args.requests} 个请求")
+    for label, app in (("sync Session (before)", build_legacy_app()), ("AsyncSession (after)", build_async_app())):
+        result = asyncio.run(run_load(app, args.customers, args.requests, args.concurrency))
+        print(
+            f"   {label:<24} RPS: {result['rps']:>8}  p50: {result['p50_ms']:>7}ms  p99: {result['p99_ms']:>7}ms  "
+            f"loop lag p99: {result['loop_lag_p99_ms']:>6}ms  max: {result['loop_lag_max_ms']:>6}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
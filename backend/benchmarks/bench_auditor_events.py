@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+审核员事件推送基准测试
+
+在子进程中启动uvicorn，建立大量空闲的 /api/v1/workflow/events 连接，报告：
+- 服务进程每个连接占用的内存（RSS增量）和空闲期间的CPU占用；
+- 一次审核通过后，投资总额变化推送到全部连接的延迟（p50/p99/最大）；
+- 对照：同样数量的客户端按固定间隔轮询工作台接口所需的请求数和服务端耗时。
+
+用法:
+    cd backend
+    python benchmarks/bench_auditor_events.py --connections 5000 --auditors 50 --poll-interval 10
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+from common import percentile  # 必须在导入app之前导入，用于切换到临时数据库
+
+import httpx
+
+from app.database import SessionLocal, engine
+from app.models import Base
+from app.models.auditor import Auditor, AuditorRole, AuditorStatus
+from app.models.customer import Customer, CustomerStatus, RiskLevel
+from app.models.workflow import AuditWorkflow, AuditLevel, WorkflowStatus
+from app.utils.auth import create_access_token
+from bench_http_load import start_uvicorn
+
+CONNECT_BATCH = 200
+
+
+def seed(auditors: int, tasks_per_auditor: int):
+    """创建初级审核员，每人若干待审核任务"""
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        db.add_all([
+            Auditor(username=f"junior{i}", password_hash="-", name=f"初级审核员{i}",
+                    role=AuditorRole.junior, status=AuditorStatus.active)
+            for i in range(1, auditors + 1)
+        ])
+        db.flush()
+        for n in range(auditors * tasks_per_auditor):
+            customer = Customer(
+                name=f"客户{n}", phone=f"139{n:08d}", id_card=f"110101{n:012d}", investment_amount=100000,
+                risk_level=RiskLevel.conservative, status=CustomerStatus.pending
+            )
+            db.add(customer)
+            db.flush()
+            db.add(AuditWorkflow(
+                customer_id=customer.id, current_level=AuditLevel.junior,
+                workflow_status=WorkflowStatus.pending, assigned_auditor_id=n % auditors + 1
+            ))
+        db.commit()
+    finally:
+        db.close()
+
+
+def process_usage(pid: int) -> tuple:
+    """返回子进程的 (RSS字节数, 累计CPU秒数)"""
+    with open(f"/proc/{pid}/status") as f:
+        rss = next(int(line.split()[1]) * 1024 for line in f if line.startswith("VmRSS:"))
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    return rss, (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+async def open_stream(port: int, ticket: str):
+    """用原始套接字打开事件流，读到首个 retry 字段后返回"""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(
+        f"GET /api/v1/workflow/events?ticket={ticket} HTTP/1.1\r\nHost: bench\r\nAccept: text/event-stream\r\n\r\n".encode()
+    )
+    await writer.drain()
+    await reader.readuntil(b"retry: 3000")
+    return reader, writer
+
+
+async def wait_for_event(reader: asyncio.StreamReader, marker: bytes) -> float:
+    await reader.readuntil(marker)
+    return time.perf_counter()
+
+
+async def run(args, process, base_url: str):
+    port = int(base_url.rsplit(":", 1)[1])
+    tokens = [create_access_token({"sub": f"junior{i}"}) for i in range(1, args.auditors + 1)]
+    headers = {"Authorization": f"Bearer {tokens[0]}"}
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+        # 预热：每个审核员请求一次工作台（身份缓存、连接池）
+        for token in tokens:
+            (await client.get("/api/v1/workflow/workflow", headers={"Authorization": f"Bearer {token}"})).raise_for_status()
+
+        # 对照：轮询工作台的单次耗时
+        latencies = []
+        for i in range(args.poll_samples):
+            started = time.perf_counter()
+            response = await client.get("/api/v1/workflow/workflow",
+                                        headers={"Authorization": f"Bearer {tokens[i % len(tokens)]}"})
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - started)
+        latencies.sort()
+
+        # 每个审核员换取一张事件流票据（有效期内可建立多个连接）
+        tickets = []
+        for token in tokens:
+            response = await client.post("/api/v1/workflow/events/ticket", headers={"Authorization": f"Bearer {token}"})
+            response.raise_for_status()
+            tickets.append(response.json()["data"]["ticket"])
+
+        rss_before, _ = process_usage(process.pid)
+        started = time.perf_counter()
+        streams = []
+        for offset in range(0, args.connections, CONNECT_BATCH):
+            batch = range(offset, min(offset + CONNECT_BATCH, args.connections))
+            streams += await asyncio.gather(*(open_stream(port, tickets[i % len(tickets)]) for i in batch))
+        connect_time = time.perf_counter() - started
+        rss_after, cpu_before = process_usage(process.pid)
+
+        await asyncio.sleep(args.idle_seconds)
+        _, cpu_after = process_usage(process.pid)
+
+        # 一次审核通过：投资总额变化推送给所有连接
+        waiters = [asyncio.create_task(wait_for_event(reader, b"total_investment")) for reader, _ in streams]
+        started = time.perf_counter()
+        response = await client.post("/api/v1/workflow/audit", headers=headers,
+                                     json={"customer_id": 1, "audit_status": "approved"})
+        response.raise_for_status()
+        received = sorted(t - started for t in await asyncio.gather(*waiters))
+
+        for _, writer in streams:
+            writer.close()
+
+    mean_poll = sum(latencies) / len(latencies)
+    print(f"📡 {args.connections} 个事件流连接（{args.auditors} 个审核员），建立耗时 {connect_time:.1f}s")
+    print(f"   服务进程内存 {rss_before / 2 ** 20:.1f} MB -> {rss_after / 2 ** 20:.1f} MB，"
+          f"每个连接 {(rss_after - rss_before) / args.connections / 1024:.1f} KB")
+    print(f"   空闲 {args.idle_seconds:.0f}s 的CPU占用 {(cpu_after - cpu_before) / args.idle_seconds:.1%}")
+    print(f"   推送到全部连接：p50 {percentile(received, 0.5)}ms  p99 {percentile(received, 0.99)}ms  "
+          f"最大 {received[-1] * 1000:.2f}ms")
+    polls = args.connections / args.poll_interval
+    print(f"🔁 对照：每 {args.poll_interval:.0f}s 轮询一次工作台，单次 p50 {percentile(latencies, 0.5)}ms，"
+          f"需要 {polls:.0f} 请求/秒，约 {polls * mean_poll:.1f} 个CPU核的服务端耗时，"
+          f"平均 {args.poll_interval / 2:.1f}s 后才看到变化")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="审核员事件推送基准测试")
+    parser.add_argument("--connections", type=int, default=5000, help="空闲事件流连接数")
+    parser.add_argument("--auditors", type=int, default=50, help="审核员数（连接平均分配）")
+    parser.add_argument("--tasks-per-auditor", type=int, default=20)
+    parser.add_argument("--idle-seconds", type=float, default=10, help="测量空闲CPU占用的时长")
+    parser.add_argument("--poll-interval", type=float, default=10, help="对照组的轮询间隔（秒）")
+    parser.add_argument("--poll-samples", type=int, default=200, help="测量轮询耗时的请求数")
+    args = parser.parse_args()
+
+    seed(args.auditors, args.tasks_per_auditor)
+    process, base_url = start_uvicorn(1)
+    try:
+        asyncio.run(run(args, process, base_url))
+    finally:
+        process.terminate()
+        process.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+批量注册基准测试
+
+对比逐条调用 POST /api/v1/customers/register 与
+POST /api/v1/customers/register/batch 的注册吞吐量（条/分钟）。
+目标：SQLite 上批量接口不低于 10000 条/分钟。
+
+用法:
+    cd backend
+    python benchmarks/bench_batch_register.py --count 10000 --batch-size 1000
+"""
+
+import argparse
+import asyncio
+import time
+
+from common import make_customer_payload  # 必须在导入app之前导入，用于切换到临时数据库
+
+import httpx
+from fastapi import FastAPI
+
+from app.api import customers_router
+from app.database import SessionLocal, engine
+from app.models import Base
+from app.models.auditor import Auditor, AuditorRole, AuditorStatus
+
+
+def seed_auditors():
+    """创建各级别审核员"""
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        for role in AuditorRole:
+            db.add(Auditor(
+                username=f"{role.value}1",
+                password_hash="-",
+                name=role.value,
+                role=role,
+                status=AuditorStatus.active
+            ))
+        db.commit()
+    finally:
+        db.close()
+
+
+async def run_single(client: httpx.AsyncClient, start: int, count: int) -> float:
+    """逐条注册"""
+    started = time.perf_counter()
+    for i in range(start, start + count):
+        response = await client.post("/api/v1/customers/register", json=make_customer_payload(i))
+        response.raise_for_status()
+    return time.perf_counter() - started
+
+
+async def run_batch(client: httpx.AsyncClient, start: int, count: int, batch_size: int) -> float:
+    """批量注册"""
+    started = time.perf_counter()
+    for offset in range(start, start + count, batch_size):
+        rows = [make_customer_payload(i) for i in range(offset, min(offset + batch_size, start + count))]
+        response = await client.post("/api/v1/customers/register/batch", json={"customers": rows})
+        response.raise_for_status()
+        assert response.json()["data"]["failed_count"] == 0
+    return time.perf_counter() - started
+
+
+async def run(count: int, single_count: int, batch_size: int):
+    app = FastAPI()
+    app.include_router(customers_router)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        elapsed = await run_single(client, 0, single_count)
+        print(f"   逐条注册  {single_count:>7} 条  {elapsed:7.2f}s  {single_count / elapsed * 60:>10.0f} 条/分钟")
+
+        elapsed = await run_batch(client, single_count, count, batch_size)
+        print(f"   批量注册  {count:>7} 条  {elapsed:7.2f}s  {count / elapsed * 60:>10.0f} 条/分钟  (每批 {batch_size})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="批量注册吞吐量基准测试")
+    parser.add_argument("--count", type=int, default=10000, help="批量注册的客户数")
+    parser.add_argument("--single-count", type=int, default=500, help="逐条注册的客户数")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    seed_auditors()
+    print("🚀 注册吞吐量")
+    asyncio.run(run(args.count, args.single_count, args.batch_size))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+客户列表分页基准测试
+
+生成合成客户数据，比较游标分页与 OFFSET 分页在第1页和深页（默认第10000页）的耗时，
+并打印游标分页查询的执行计划。
+
+用法:
+    cd backend
+    python benchmarks/bench_customer_listing.py --customers 2000000 --page 10000
+"""
+
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+import common  # noqa: F401  必须在导入app之前导入，用于切换到临时数据库
+
+from sqlalchemy import select, text
+
+from app.database import engine
+from app.models import Base, Customer
+from app.models.customer import CustomerStatus, RiskLevel
+from app.services.customer_listing import CustomerListingService, CREATED_AT_KEY
+
+CHUNK_SIZE = 50000
+PAGE_SIZE = 20
+
+
+def seed(customers: int):
+    """生成合成客户，注册时间分布在最近两年内（每秒多条，制造相同时间）"""
+    Base.metadata.create_all(bind=engine)
+    rng = random.Random(42)
+    start = datetime(2024, 1, 1)
+    statuses = list(CustomerStatus)
+    levels = list(RiskLevel)
+    with engine.begin() as conn:
+        for offset in range(0, customers, CHUNK_SIZE):
+            conn.execute(Customer.__table__.insert(), [
+                {
+                    "name": f"客户{i}",
+                    "phone": f"1{i:010d}",
+                    "id_card": f"110101{i:012d}",
+                    "investment_amount": rng.randint(10000, 5000000),
+                    "risk_score": 60,
+                    "risk_level": levels[i % 3],
+                    "status": statuses[i % 3],
+                    "created_at": start + timedelta(seconds=i // 3)
+                }
+                for i in range(offset, min(offset + CHUNK_SIZE, customers))
+            ])
+
+
+def timed(conn, statement, repeat: int) -> float:
+    """平均耗时（毫秒）"""
+    started = time.perf_counter()
+    for _ in range(repeat):
+        conn.execute(statement).fetchall()
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def offset_statement(filters: dict, page: int):
+    """对照组：OFFSET 分页"""
+    statement = select(Customer)
+    if "status" in filters:
+        statement = statement.where(Customer.status == filters["status"])
+    return statement.order_by(Customer.created_at.desc(), Customer.id.desc()).offset(page * PAGE_SIZE).limit(PAGE_SIZE)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="客户列表分页基准测试")
+    parser.add_argument("--customers", type=int, default=2000000)
+    parser.add_argument("--page", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"🔨 生成 {args.customers} 个客户...")
+    started = time.perf_counter()
+    seed(args.customers)
+    print(f"   耗时 {time.perf_counter() - started:.1f}s")
+
+    with engine.connect() as conn:
+        for label, filters in (("无筛选", {}), ("status=approved", {"status": CustomerStatus.approved})):
+            # 直接定位到目标页的前一条记录来构造游标（相当于客户端已经翻到该页）
+            anchor = conn.execute(
+                offset_statement(filters, args.page - 1).with_only_columns(Customer.id, CREATED_AT_KEY)
+            ).all()[-1]
+            deep_cursor = CustomerListingService.encode_cursor(anchor[1], anchor[0])
+
+            first_page = CustomerListingService.list_statement(limit=PAGE_SIZE, **filters)
+            deep_page = CustomerListingService.list_statement(limit=PAGE_SIZE, cursor=deep_cursor, **filters)
+
+            print(f"\n▶ {label}")
+            sql = str(deep_page.compile(engine, compile_kwargs={"literal_binds": True}))
+            for row in conn.execute(text("EXPLAIN QUERY PLAN " + sql)) if engine.dialect.name == "sqlite" else []:
+                print(f"   {row[-1]}")
+            print(f"   游标分页  第1页 {timed(conn, first_page, args.repeat):>9.3f} ms   "
+                  f"第{args.page}页 {timed(conn, deep_page, args.repeat):>9.3f} ms")
+            print(f"   OFFSET    第1页 {timed(conn, offset_statement(filters, 0), args.repeat):>9.3f} ms   "
+                  f"第{args.page}页 {timed(conn, offset_statement(filters, args.page), args.repeat):>9.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
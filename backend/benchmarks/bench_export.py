@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+流式导出基准测试
+
+生成合成客户数据（默认500万行），以 NDJSON/CSV（可选gzip）流式导出，
+报告每秒导出行数和进程峰值内存（RSS）；--fetchall 时再对比一次性读取整表的峰值内存。
+
+用法:
+    cd backend
+    python benchmarks/bench_export.py --rows 5000000 --format csv --gzip
+"""
+
+import argparse
+import asyncio
+import resource
+import time
+from datetime import datetime
+
+import common  # noqa: F401  必须在导入app之前导入，用于切换到临时数据库
+
+from app.database import engine
+from app.models import Base, Customer
+from app.models.customer import CustomerStatus, RiskLevel
+from app.services.data_export import DataExportService, EXPORT_FORMATS
+
+CHUNK_SIZE = 50000
+
+
+def peak_rss_mb() -> float:
+    """进程峰值RSS（MB，Linux下 ru_maxrss 单位为KB）"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def seed(rows: int):
+    """分块生成合成客户，避免生成数据本身推高峰值内存"""
+    Base.metadata.create_all(bind=engine)
+    now = datetime.now()
+    statuses = list(CustomerStatus)
+    levels = list(RiskLevel)
+    with engine.begin() as conn:
+        for offset in range(0, rows, CHUNK_SIZE):
+            conn.execute(Customer.__table__.insert(), [
+                {
+                    "name": f"客户{i}",
+                    "phone": f"1{i:010d}",
+                    "id_card": f"110101{i:012d}",
+                    "email": f"customer{i}@example.com",
+                    "investment_amount": 10000 + i % 5000000,
+                    "risk_score": i % 100,
+                    "risk_level": levels[i % 3],
+                    "status": statuses[i % 3],
+                    "created_at": now,
+                    "updated_at": now
+                }
+                for i in range(offset, min(offset + CHUNK_SIZE, rows))
+            ])
+
+
+async def stream_export(export_format: str, compress: bool, batch_size: int) -> int:
+    """流式导出并丢弃输出，返回字节数"""
+    size = 0
+    async for chunk in DataExportService.iter_export("customers", export_format, compress, batch_size):
+        size += len(chunk)
+    return size
+
+
+def main():
+    parser = argparse.ArgumentParser(description="流式导出基准测试")
+    parser.add_argument("--rows", type=int, default=5000000)
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default="ndjson")
+    parser.add_argument("--gzip", action="store_true")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--fetchall", action="store_true", help="对比一次性读取整表的峰值内存")
+    args = parser.parse_args()
+
+    print(f"🔨 生成 {args.rows} 个客户...")
+    started = time.perf_counter()
+    seed(args.rows)
+    print(f"   耗时 {time.perf_counter() - started:.1f}s，峰值RSS {peak_rss_mb():.1f} MB")
+
+    started = time.perf_counter()
+    size = asyncio.run(stream_export(args.format, args.gzip, args.batch_size))
+    elapsed = time.perf_counter() - started
+    print(f"🚀 流式导出 {args.format}{' + gzip' if args.gzip else ''}")
+    print(f"   {args.rows} 行  {size / 1024 / 1024:.1f} MB  耗时 {elapsed:.1f}s  "
+          f"{args.rows / elapsed:,.0f} 行/秒  峰值RSS {peak_rss_mb():.1f} MB")
+
+    if args.fetchall:
+        with engine.connect() as conn:
+            rows = conn.execute(DataExportService.export_statement("customers")).fetchall()
+        print(f"📦 一次性读取 {len(rows)} 行后峰值RSS {peak_rss_mb():.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
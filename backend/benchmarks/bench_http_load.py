@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+HTTP混合负载基准测试
+
+生成合成数据库后，以固定并发对完整应用（app.main.create_app，含启动流程）发起混合请求：
+注册、查询投资建议、登录、审核工作台、提交审核。请求通过ASGI直接调用应用（默认），
+或发往本地启动的uvicorn进程（--transport uvicorn，包含真实的HTTP和序列化开销）。
+结果以JSON输出：整体和各接口的请求数、错误数、RPS、p50/p95/p99延迟；
+指定 --baseline 时同时打印与上一次结果的对比。
+
+用法:
+    cd backend
+    python benchmarks/bench_http_load.py --customers 5000 --concurrency 50 --duration 30 --output run.json
+    python benchmarks/bench_http_load.py --transport uvicorn --baseline run.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+from common import make_customer_payload, percentile  # 必须在导入app之前导入，用于切换到临时数据库
+
+import httpx
+from sqlalchemy import select
+
+from app.config import settings
+from app.database import AsyncSessionLocal, SessionLocal, engine
+from app.models import Base
+from app.models.auditor import Auditor, AuditorRole, AuditorStatus
+from app.models.workflow import AuditWorkflow, WorkflowStatus
+from app.services.customer_registration import CustomerRegistrationService
+from app.utils.password import get_password_hash
+
+PASSWORD = "password123"
+DEFAULT_MIX = "advice=50,dashboard=20,register=15,audit=10,login=5"
+SEED_BATCH_SIZE = 2000
+
+
+def parse_mix(mix: str) -> dict:
+    """解析负载比例，如 advice=50,login=5"""
+    weights = {}
+    for item in mix.split(","):
+        name, weight = item.split("=")
+        if name not in WORKLOADS:
+            raise SystemExit(f"未知的负载类型: {name}（可选 {', '.join(WORKLOADS)}）")
+        weights[name] = int(weight)
+    return weights
+
+
+def seed_auditors(per_role: int):
+    """每个角色创建 per_role 个审核员（共用一个密码哈希）"""
+    Base.metadata.create_all(bind=engine)
+    password_hash = get_password_hash(PASSWORD)
+    db = SessionLocal()
+    try:
+        for role in AuditorRole:
+            for i in range(1, per_role + 1):
+                db.add(Auditor(
+                    username=f"{role.value}{i}",
+                    password_hash=password_hash,
+                    name=f"{role.value}{i}",
+                    role=role,
+                    status=AuditorStatus.active
+                ))
+        db.commit()
+    finally:
+        db.close()
+
+
+async def seed_customers(count: int):
+    """通过批量注册生成客户、风险评估、投资建议和审核流程"""
+    for offset in range(0, count, SEED_BATCH_SIZE):
+        rows = [make_customer_payload(i) for i in range(offset, min(offset + SEED_BATCH_SIZE, count))]
+        async with AsyncSessionLocal() as db:
+            await CustomerRegistrationService.register_batch(db, rows)
+            await db.commit()
+
+
+async def load_audit_queue() -> list:
+    """待审核任务 (审核员用户名, 客户ID)，供提交审核负载使用"""
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(Auditor.username, AuditWorkflow.customer_id).join(
+                Auditor, Auditor.id == AuditWorkflow.assigned_auditor_id
+            ).where(AuditWorkflow.workflow_status == WorkflowStatus.pending)
+        )
+        tasks = result.all()
+    random.Random(7).shuffle(tasks)
+    return tasks
+
+
+class LoadState:
+    """压测过程中共享的数据和统计"""
+
+    def __init__(self, customers: int, auditors: list, tokens: dict, audit_queue: list):
+        self.customer_ids = range(1, customers + 1)
+        self.auditors = auditors
+        self.tokens = tokens
+        self.audit_queue = audit_queue
+        self.next_customer = customers
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+        self.errors = defaultdict(int)
+        self.skipped = defaultdict(int)
+
+
+async def do_register(client: httpx.AsyncClient, state: LoadState, rng: random.Random):
+    state.next_customer += 1
+    return await client.post("/api/v1/customers/register", json=make_customer_payload(state.next_customer))
+
+
+async def do_advice(client: httpx.AsyncClient, state: LoadState, rng: random.Random):
+    return await client.get(f"/api/v1/customers/{rng.choice(state.customer_ids)}/advice")
+
+
+async def do_login(client: httpx.AsyncClient, state: LoadState, rng: random.Random):
+    return await client.post(
+        "/api/v1/auditors/login", json={"username": rng.choice(state.auditors), "password": PASSWORD}
+    )
+
+
+async def do_dashboard(client: httpx.AsyncClient, state: LoadState, rng: random.Random):
+    token = state.tokens[rng.choice(state.auditors)]
+    return await client.get("/api/v1/workflow/workflow", headers={"Authorization": f"Bearer {token}"})
+
+
+async def do_audit(client: httpx.AsyncClient, state: LoadState, rng: random.Random):
+    if not state.audit_queue:
+        return None
+    username, customer_id = state.audit_queue.pop()
+    return await client.post(
+        "/api/v1/workflow/audit",
+        headers={"Authorization": f"Bearer {state.tokens[username]}"},
+        json={"customer_id": customer_id, "audit_status": "approved", "audit_opinion": "压测"}
+    )
+
+
+WORKLOADS = {
+    "register": do_register,
+    "advice": do_advice,
+    "login": do_login,
+    "dashboard": do_dashboard,
+    "audit": do_audit
+}
+
+
+async def worker(client: httpx.AsyncClient, state: LoadState, weights: dict, deadline: float,
+                 budget: list, seed: int):
+    """按权重随机选择负载，直到超时或请求数用完"""
+    rng = random.Random(seed)
+    names = list(weights)
+    cumulative = list(weights.values())
+    while time.perf_counter() < deadline and budget[0] > 0:
+        budget[0] -= 1
+        name = rng.choices(names, weights=cumulative)[0]
+        started = time.perf_counter()
+        try:
+            response = await WORKLOADS[name](client, state, rng)
+        except httpx.HTTPError as e:
+            state.errors[name] += 1
+            state.statuses[name][type(e).__name__] += 1
+            continue
+        if response is None:
+            state.skipped[name] += 1
+            continue
+        state.latencies[name].append(time.perf_counter() - started)
+        state.statuses[name][str(response.status_code)] += 1
+        if response.status_code >= 400:
+            state.errors[name] += 1
+
+
+def summarize(latencies: list, errors: int, elapsed: float) -> dict:
+    latencies = sorted(latencies)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": percentile(latencies, 0.5),
+        "p95_ms": percentile(latencies, 0.95),
+        "p99_ms": percentile(latencies, 0.99),
+        "max_ms": percentile(latencies, 1.0)
+    }
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_uvicorn(workers: int):
+    """在子进程中启动uvicorn（使用同一个临时数据库），返回 (进程, base_url)"""
+    port = free_port()
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=backend_dir,
+        env=dict(os.environ, NOTIFICATION_DISPATCHER_ENABLED="false")
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            if httpx.get(f"{base_url}/health").status_code == 200:
+                return process, base_url
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.1)
+    process.terminate()
+    raise SystemExit("uvicorn 启动失败")
+
+
+async def run_load(args, client: httpx.AsyncClient) -> dict:
+    auditors = [f"{role.value}{i}" for role in AuditorRole for i in range(1, args.auditors_per_role + 1)]
+    tokens = {}
+    for username in auditors:
+        response = await client.post("/api/v1/auditors/login", json={"username": username, "password": PASSWORD})
+        response.raise_for_status()
+        tokens[username] = response.json()["access_token"]
+
+    state = LoadState(args.customers, auditors, tokens, await load_audit_queue())
+    weights = parse_mix(args.mix)
+    budget = [args.requests or float("inf")]
+    started = time.perf_counter()
+    deadline = started + args.duration
+    await asyncio.gather(*(
+        worker(client, state, weights, deadline, budget, seed=i) for i in range(args.concurrency)
+    ))
+    elapsed = time.perf_counter() - started
+
+    all_latencies = [value for values in state.latencies.values() for value in values]
+    return {
+        "config": {
+            "transport": args.transport,
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "requests": args.requests,
+            "customers": args.customers,
+            "auditors_per_role": args.auditors_per_role,
+            "mix": weights,
+            "database": engine.dialect.name
+        },
+        "elapsed_s": round(elapsed, 2),
+        "total": summarize(all_latencies, sum(state.errors.values()), elapsed),
+        "endpoints": {
+            name: dict(
+                summarize(state.latencies[name], state.errors[name], elapsed),
+                status=dict(state.statuses[name]),
+                skipped=state.skipped[name]
+            )
+            for name in weights
+        }
+    }
+
+
+def print_comparison(result: dict, baseline_path: str):
+    """与上一次结果对比RPS和p99"""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    print(f"\n📊 与 {baseline_path} 对比", file=sys.stderr)
+    rows = [("total", result["total"], baseline["total"])] + [
+        (name, stats, baseline["endpoints"][name])
+        for name, stats in result["endpoints"].items() if name in baseline["endpoints"]
+    ]
+    for name, current, previous in rows:
+        def change(key):
+            return (current[key] - previous[key]) / previous[key] * 100 if previous[key] else 0.0
+        print(
+            f"   {name:<10} RPS {previous['rps']:>8} → {current['rps']:>8} ({change('rps'):+.1f}%)   "
+            f"p99 {previous['p99_ms']:>8} → {current['p99_ms']:>8} ms ({change('p99_ms'):+.1f}%)",
+            file=sys.stderr
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP混合负载基准测试")
+    parser.add_argument("--transport", choices=["asgi", "uvicorn"], default="asgi")
+    parser.add_argument("--uvicorn-workers", type=int, default=1)
+    parser.add_argument("--customers", type=int, default=5000, help="预先生成的客户数")
+    parser.add_argument("--auditors-per-role", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=30, help="压测时长（秒）")
+    parser.add_argument("--requests", type=int, default=0, help="请求总数上限，0为不限")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"负载比例，默认 {DEFAULT_MIX}")
+    parser.add_argument("--output", help="结果JSON写入文件")
+    parser.add_argument("--baseline", help="与之前的结果JSON对比")
+    args = parser.parse_args()
+    parse_mix(args.mix)
+
+    print(f"🔨 生成 {args.customers} 个客户、每个角色 {args.auditors_per_role} 个审核员...", file=sys.stderr)
+    seed_auditors(args.auditors_per_role)
+    asyncio.run(seed_customers(args.customers))
+
+    async def run_asgi():
+        from app.main import create_app
+        app = create_app(settings.model_copy(update={"notification_dispatcher_enabled": False}))
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+                return await run_load(args, client)
+
+    async def run_http(base_url: str):
+        limits = httpx.Limits(max_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=base_url, timeout=None, limits=limits) as client:
+            return await run_load(args, client)
+
+    print(f"🚀 {args.transport} 并发 {args.concurrency}，持续 {args.duration}s", file=sys.stderr)
+    if args.transport == "uvicorn":
+        process, base_url = start_uvicorn(args.uvicorn_workers)
+        try:
+            result = asyncio.run(run_http(base_url))
+        finally:
+            process.terminate()
+            process.wait()
+    else:
+        result = asyncio.run(run_asgi())
+
+    output = json.dumps(result, ensure_ascii=False, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    if args.baseline:
+        print_comparison(result, args.baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+启动耗时基准测试
+
+在新的子进程中多次测量：
+- 导入 app.main 的耗时（python -X importtime），按累计耗时列出最慢的模块和各顶层包的耗时
+- 冷启动耗时：从进程启动到应用完成启动流程并响应第一个 /health 请求
+同时检查 jose、passlib 等应延迟导入的模块没有在启动时被导入。
+结果可用 --output 保存为JSON，--baseline 与之前的结果对比；
+检查不通过或超过 --budget-ms 时以非零状态退出，便于在CI中发现启动回退。
+
+用法:
+    cd backend
+    python benchmarks/bench_import_time.py --runs 5 --output startup.json
+    python benchmarks/bench_import_time.py --baseline startup.json --budget-ms 1500
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+from common import BENCH_DIR  # 必须在导入app之前导入，用于切换到临时数据库
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 首次使用时才导入的模块，启动时出现说明有模块在顶层导入了它们
+LAZY_MODULES = ("jose", "passlib", "bcrypt", "cryptography", "redis")
+
+COLD_START_SCRIPT = """
+import asyncio, time
+started = time.perf_counter()
+import httpx
+from app.main import app
+
+async def first_request():
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            (await client.get("/health")).raise_for_status()
+
+asyncio.run(first_request())
+print((time.perf_counter() - started) * 1000)
+"""
+
+
+def subprocess_env(run: int) -> dict:
+    """每次运行使用新的数据库文件，启动时建表"""
+    return dict(
+        os.environ,
+        DATABASE_URL=f"sqlite:///{os.path.join(BENCH_DIR, f'startup{run}.db')}",
+        CREATE_SCHEMA_ON_STARTUP="true",
+        NOTIFICATION_DISPATCHER_ENABLED="false"
+    )
+
+
+def parse_importtime(stderr: str) -> list:
+    """解析 -X importtime 输出，返回 [(模块, 自身耗时us, 累计耗时us)]"""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules.append((name.strip(), int(self_us), int(cumulative_us)))
+    return modules
+
+
+def measure_import(run: int) -> list:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=BACKEND_DIR, env=subprocess_env(run), capture_output=True, text=True, check=True
+    )
+    return parse_importtime(result.stderr)
+
+
+def measure_cold_start(run: int) -> float:
+    result = subprocess.run(
+        [sys.executable, "-c", COLD_START_SCRIPT],
+        cwd=BACKEND_DIR, env=subprocess_env(run), capture_output=True, text=True, check=True
+    )
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="启动耗时基准测试")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="列出累计耗时最长的模块数")
+    parser.add_argument("--output", help="结果JSON写入文件")
+    parser.add_argument("--baseline", help="与之前的结果JSON对比")
+    parser.add_argument("--budget-ms", type=float, help="导入 app.main 的耗时上限（中位数）")
+    args = parser.parse_args()
+
+    import_runs = [measure_import(run) for run in range(args.runs)]
+    cold_starts = [measure_cold_start(args.runs + run) for run in range(args.runs)]
+
+    import_totals = [
+        next(cumulative for name, _, cumulative in modules if name == "app.main") / 1000 for modules in import_runs
+    ]
+    median_run = import_runs[import_totals.index(sorted(import_totals)[len(import_totals) // 2])]
+    packages = defaultdict(int)
+    for name, self_us, _ in median_run:
+        packages[name.split(".")[0]] += self_us
+    imported = {name for name, _, _ in median_run}
+    lazy_imported = sorted(module for module in LAZY_MODULES if module in imported)
+
+    result = {
+        "runs": args.runs,
+        "import_ms": round(statistics.median(import_totals), 1),
+        "cold_start_ms": round(statistics.median(cold_starts), 1),
+        "modules": len(median_run),
+        "lazy_modules_imported": lazy_imported,
+        "slowest_modules": [
+            {"module": name, "cumulative_ms": round(cumulative / 1000, 1), "self_ms": round(self_us / 1000, 1)}
+            for name, self_us, cumulative in sorted(median_run, key=lambda item: -item[2])[:args.top]
+        ],
+        "packages_ms": {
+            name: round(self_us / 1000, 1)
+            for name, self_us in sorted(packages.items(), key=lambda item: -item[1])[:args.top]
+        }
+    }
+
+    print(f"📦 导入 app.main: {result['import_ms']} ms（{result['modules']} 个模块，{args.runs} 次中位数）")
+    print(f"🚀 冷启动到第一个响应: {result['cold_start_ms']} ms")
+    print("\n累计耗时最长的模块:")
+    for item in result["slowest_modules"]:
+        print(f"   {item['cumulative_ms']:>8.1f} ms  {item['self_ms']:>7.1f} ms  {item['module']}")
+    print("\n各顶层包自身耗时:")
+    for name, elapsed in result["packages_ms"].items():
+        print(f"   {elapsed:>8.1f} ms  {name}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        print(f"\n📊 与 {args.baseline} 对比")
+        for key in ("import_ms", "cold_start_ms"):
+            change = (result[key] - baseline[key]) / baseline[key] * 100
+            print(f"   {key:<14} {baseline[key]:>8} → {result[key]:>8} ms ({change:+.1f}%)")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+
+    failed = False
+    if lazy_imported:
+        print(f"\n❌ 启动时导入了应延迟导入的模块: {', '.join(lazy_imported)}")
+        failed = True
+    if args.budget_ms and result["import_ms"] > args.budget_ms:
+        print(f"\n❌ 导入耗时 {result['import_ms']} ms 超过上限 {args.budget_ms} ms")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+热点查询索引基准测试
+
+生成合成数据（默认100万客户），分别在有/无热点索引的情况下
+打印每条热点查询的执行计划（SQLite: EXPLAIN QUERY PLAN，MySQL: EXPLAIN）和平均耗时。
+
+用法:
+    cd backend
+    python benchmarks/bench_indexes.py --customers 1000000 --auditors 200
+"""
+
+import argparse
+import random
+import time
+from datetime import datetime
+
+import common  # noqa: F401  必须在导入app之前导入，用于切换到临时数据库
+
+from sqlalchemy import select, text
+
+from app.database import engine
+from app.models import Base, Customer, AuditWorkflow, AuditRecord, RiskAssessment, InvestmentAdvice, Notification
+from app.models.auditor import Auditor
+from app.models.customer import CustomerStatus, RiskLevel
+from app.models.workflow import AuditLevel, AuditStatus, WorkflowStatus, NotificationType, NotificationStatus
+from app.services.audit_workflow import AuditWorkflowService
+
+# 本次新增的热点索引（不含主键和唯一约束）
+HOT_INDEXES = [
+    index
+    for table in (Customer.__table__, AuditWorkflow.__table__, AuditRecord.__table__,
+                  RiskAssessment.__table__, InvestmentAdvice.__table__, Notification.__table__)
+    for index in table.indexes
+    if not index.name.endswith("_id") or index.name.endswith("customer_id")
+]
+
+CHUNK_SIZE = 50000
+
+
+def insert_chunks(conn, table, rows):
+    """分块批量插入"""
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= CHUNK_SIZE:
+            conn.execute(table.insert(), chunk)
+            chunk = []
+    if chunk:
+        conn.execute(table.insert(), chunk)
+
+
+def seed(customers: int, auditors: int):
+    """生成合成数据"""
+    Base.metadata.create_all(bind=engine)
+    rng = random.Random(42)
+    now = datetime.now()
+    with engine.begin() as conn:
+        conn.execute(Auditor.__table__.insert(), [
+            {"username": f"auditor{i}", "password_hash": "-", "name": f"审核员{i}", "role": "junior", "status": "active"}
+            for i in range(1, auditors + 1)
+        ])
+        customer_status = [CustomerStatus.pending] + [CustomerStatus.approved] * 7 + [CustomerStatus.rejected] * 2
+        insert_chunks(conn, Customer.__table__, (
+            {
+                "name": f"客户{i}",
+                "phone": f"1{i:010d}",
+                "id_card": f"110101{i:012d}",
+                "investment_amount": rng.randint(10000, 5000000),
+                "risk_score": 60,
+                "risk_level": RiskLevel.moderate,
+                "status": customer_status[i % 10],
+                "created_at": now,
+                "updated_at": now
+            }
+            for i in range(1, customers + 1)
+        ))
+        workflow_status = [WorkflowStatus.pending, WorkflowStatus.in_progress] + [WorkflowStatus.completed] * 16 + [WorkflowStatus.rejected] * 2
+        insert_chunks(conn, AuditWorkflow.__table__, (
+            {
+                "customer_id": i,
+                "current_level": AuditLevel.junior,
+                "workflow_status": workflow_status[i % 20],
+                "assigned_auditor_id": rng.randint(1, auditors)
+            }
+            for i in range(1, customers + 1)
+        ))
+        record_status = [AuditStatus.approved] * 7 + [AuditStatus.rejected] * 2 + [AuditStatus.need_review]
+        insert_chunks(conn, AuditRecord.__table__, (
+            {
+                "customer_id": i,
+                "auditor_id": rng.randint(1, auditors),
+                "audit_level": AuditLevel.junior,
+                "audit_status": record_status[i % 10]
+            }
+            for i in range(1, customers + 1)
+        ))
+        insert_chunks(conn, RiskAssessment.__table__, (
+            {"customer_id": i, "assessment_data": None, "risk_score": 60, "risk_level": "moderate"}
+            for i in range(1, customers + 1)
+        ))
+        insert_chunks(conn, InvestmentAdvice.__table__, (
+            {"customer_id": i, "portfolio_type": "moderate"}
+            for i in range(1, customers + 1)
+        ))
+        insert_chunks(conn, Notification.__table__, (
+            {
+                "customer_id": i,
+                "notification_type": NotificationType.sms,
+                "content": "审核通知",
+                "status": NotificationStatus.sent
+            }
+            for i in range(1, customers + 1, 2)
+        ))
+
+
+# 热点查询，与接口中实际执行的语句保持一致；参数为 (auditor_id, customer_id)
+HOT_QUERIES = {
+    "get_pending_workflows": lambda auditor_id, customer_id: select(AuditWorkflow).where(
+        AuditWorkflow.assigned_auditor_id == auditor_id,
+        AuditWorkflow.workflow_status.in_([WorkflowStatus.pending, WorkflowStatus.in_progress])
+    ),
+    "dashboard_counts": lambda auditor_id, customer_id: AuditWorkflowService.dashboard_counts_statement(auditor_id),
+    "dashboard_pending_list": lambda auditor_id, customer_id: AuditWorkflowService.pending_list_statement(auditor_id),
+    "advice_assessment": lambda auditor_id, customer_id: select(RiskAssessment).where(
+        RiskAssessment.customer_id == customer_id
+    ).limit(1),
+    "advice_investment": lambda auditor_id, customer_id: select(InvestmentAdvice).where(
+        InvestmentAdvice.customer_id == customer_id
+    ).limit(1),
+    "customer_notifications": lambda auditor_id, customer_id: select(Notification).where(
+        Notification.customer_id == customer_id
+    ).order_by(Notification.created_at.desc()).limit(10)
+}
+
+
+def explain_and_time(label: str, customers: int, auditors: int, repeat: int):
+    """打印执行计划并计时"""
+    explain = "EXPLAIN QUERY PLAN " if engine.dialect.name == "sqlite" else "EXPLAIN "
+    rng = random.Random(7)
+    print(f"\n{'=' * 80}\n📋 {label}\n{'=' * 80}")
+    with engine.connect() as conn:
+        for name, build in HOT_QUERIES.items():
+            sql = str(build(1, 1).compile(engine, compile_kwargs={"literal_binds": True}))
+            plan = conn.execute(text(explain + sql)).fetchall()
+            print(f"\n▶ {name}")
+            for row in plan:
+                print(f"   {' | '.join(str(col) for col in row)}")
+
+            statements = [build(rng.randint(1, auditors), rng.randint(1, customers)) for _ in range(repeat)]
+            started = time.perf_counter()
+            for statement in statements:
+                conn.execute(statement).fetchall()
+            elapsed = (time.perf_counter() - started) / repeat
+            print(f"   ⏱  平均 {elapsed * 1000:.3f} ms（{repeat} 次）")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="热点查询索引基准测试")
+    parser.add_argument("--customers", type=int, default=1000000)
+    parser.add_argument("--auditors", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"🔨 生成 {args.customers} 个客户的合成数据...")
+    started = time.perf_counter()
+    seed(args.customers, args.auditors)
+    print(f"   耗时 {time.perf_counter() - started:.1f}s")
+
+    explain_and_time("有热点索引", args.customers, args.auditors, args.repeat)
+
+    for index in HOT_INDEXES:
+        index.drop(bind=engine)
+    engine.dispose()  # 丢弃连接池中缓存的预编译语句，确保重新生成执行计划
+    explain_and_time("无热点索引", args.customers, args.auditors, args.repeat)
+
+    for index in HOT_INDEXES:
+        index.create(bind=engine)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+月度投资汇总基准测试
+
+生成跨越多个月份的已完成审核客户（默认100万），对比工作台投资总额的两种读法：
+- customers：对所有通过的客户求和（原来的做法，结果也不限于本月）
+- rollups：读取本月的汇总行（每个风险等级一行）
+并报告从客户表和审核记录重建全部汇总的耗时，以及单次审核累加汇总的耗时。
+
+用法:
+    cd backend
+    python benchmarks/bench_investment_rollups.py --customers 1000000 --months 24
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from datetime import datetime
+
+import common  # noqa: F401  必须在导入app之前导入，用于切换到临时数据库
+
+from sqlalchemy import func, select
+
+from app.database import database, engine
+from app.models import Base, Customer, AuditRecord, InvestmentRollup
+from app.models.auditor import Auditor
+from app.models.customer import CustomerStatus, RiskLevel
+from app.models.workflow import AuditLevel, AuditStatus
+from app.services.investment_rollup import InvestmentRollupService, current_month
+
+CHUNK_SIZE = 50000
+RISK_LEVELS = list(RiskLevel)
+
+
+def seed(customers: int, months: int):
+    """生成客户和对应的最终审核记录，审核时间随机分布在最近 months 个月"""
+    Base.metadata.create_all(bind=engine)
+    rng = random.Random(42)
+    now = datetime.now()
+    # 本月起往前 months 个月，每月取一个时间
+    month_index = now.year * 12 + now.month - 1
+    decided_at = [datetime((month_index - k) // 12, (month_index - k) % 12 + 1, 1, 12) for k in range(months)]
+    with engine.begin() as conn:
+        conn.execute(Auditor.__table__.insert(), [
+            {"username": "auditor1", "password_hash": "-", "name": "审核员1", "role": "junior", "status": "active"}
+        ])
+        for offset in range(0, customers, CHUNK_SIZE):
+            numbers = range(offset + 1, min(offset + CHUNK_SIZE, customers) + 1)
+            # 风险等级、审核结果和月份独立随机，约四分之三通过
+            decisions = [
+                (rng.choice(RISK_LEVELS), CustomerStatus.approved if rng.random() < 0.75 else CustomerStatus.rejected,
+                 rng.choice(decided_at))
+                for _ in numbers
+            ]
+            conn.execute(Customer.__table__.insert(), [
+                {
+                    "name": f"客户{i}",
+                    "phone": f"1{i:010d}",
+                    "id_card": f"110101{i:012d}",
+                    "investment_amount": rng.randint(10000, 5000000),
+                    "risk_score": 50,
+                    "risk_level": risk_level,
+                    "status": status,
+                    "created_at": now,
+                    "updated_at": now
+                }
+                for i, (risk_level, status, _) in zip(numbers, decisions)
+            ])
+            conn.execute(AuditRecord.__table__.insert(), [
+                {
+                    "customer_id": i,
+                    "auditor_id": 1,
+                    "audit_level": AuditLevel.junior,
+                    "audit_status": AuditStatus.approved if status == CustomerStatus.approved else AuditStatus.rejected,
+                    "audit_date": audit_date
+                }
+                for i, (_, status, audit_date) in zip(numbers, decisions)
+            ])
+
+
+def time_statement(statement, repeat: int) -> tuple:
+    """返回 (结果, 平均耗时毫秒)"""
+    with engine.connect() as conn:
+        value = conn.scalar(statement)
+        started = time.perf_counter()
+        for _ in range(repeat):
+            conn.scalar(statement)
+    return value, (time.perf_counter() - started) / repeat * 1000
+
+
+async def rebuild_and_record(repeat: int) -> tuple:
+    """返回 (重建行数, 重建耗时秒, 单次累加平均耗时毫秒)"""
+    async with database.async_session_factory() as db:
+        started = time.perf_counter()
+        rows = await InvestmentRollupService.rebuild(db)
+        await db.commit()
+        rebuild_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for i in range(repeat):
+            await InvestmentRollupService.record(db, [(RISK_LEVELS[i % 3], CustomerStatus.approved, 100000)])
+            await db.commit()
+        record_ms = (time.perf_counter() - started) / repeat * 1000
+    await database.dispose()
+    return rows, rebuild_seconds, record_ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description="月度投资汇总基准测试")
+    parser.add_argument("--customers", type=int, default=1000000, help="已完成审核的客户数")
+    parser.add_argument("--months", type=int, default=24, help="审核时间分布的月份数")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"🔨 生成 {args.customers} 个已完成审核的客户（分布在 {args.months} 个月）...")
+    started = time.perf_counter()
+    seed(args.customers, args.months)
+    print(f"   耗时 {time.perf_counter() - started:.1f}s")
+
+    rows, rebuild_seconds, record_ms = asyncio.run(rebuild_and_record(args.repeat))
+    print(f"🔁 重建汇总 {rows} 行，耗时 {rebuild_seconds:.1f}s；审核时累加一次汇总（含提交）平均 {record_ms:.2f} ms")
+
+    old_total, old_ms = time_statement(
+        select(func.sum(Customer.investment_amount)).where(Customer.status == CustomerStatus.approved), args.repeat
+    )
+    new_total, new_ms = time_statement(
+        select(func.sum(InvestmentRollup.approved_amount)).where(InvestmentRollup.month == current_month()), args.repeat
+    )
+    print(f"{'读法':<10}{'平均耗时(ms)':>14}{'投资总额':>20}")
+    print(f"{'customers':<12}{old_ms:>12.3f}{float(old_total or 0):>22,.2f}  （全部历史）")
+    print(f"{'rollups':<12}{new_ms:>12.3f}{float(new_total or 0):>22,.2f}  （本月）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+登录风暴负载测试
+
+大量并发登录的同时，持续请求投资建议接口，比较三种模式下其他接口的延迟：
+1. 在事件循环中直接计算bcrypt（旧实现）；
+2. 在密码计算池中计算bcrypt；
+3. 密码计算池 + 很小的排队上限（超出部分快速返回503）。
+
+用法:
+    cd backend
+    python benchmarks/bench_login_storm.py --logins 200 --login-concurrency 50
+"""
+
+import argparse
+import asyncio
+import time
+
+from common import percentile  # 必须在导入app之前导入，用于切换到临时数据库
+
+import httpx
+from fastapi import FastAPI
+
+from app.api import auditors_router, customers_router
+from app.database import SessionLocal, engine
+from app.models import Base
+from app.models.auditor import Auditor, AuditorRole, AuditorStatus
+from app.models.customer import Customer, CustomerStatus, RiskLevel
+from app.utils.password import get_password_hash, password_hasher
+
+
+def seed():
+    """创建一个审核员和一个客户"""
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        db.add(Auditor(
+            username="junior1",
+            password_hash=get_password_hash("password123"),
+            name="初级审核员1",
+            role=AuditorRole.junior,
+            status=AuditorStatus.active
+        ))
+        db.add(Customer(
+            name="客户1",
+            phone="13900000001",
+            id_card="110101199001011234",
+            investment_amount=100000,
+            risk_level=RiskLevel.moderate,
+            status=CustomerStatus.pending
+        ))
+        db.commit()
+    finally:
+        db.close()
+
+
+async def run_storm(logins: int, login_concurrency: int) -> dict:
+    """并发登录，同时用单个客户端持续探测其他接口的延迟"""
+    app = FastAPI()
+    app.include_router(auditors_router)
+    app.include_router(customers_router)
+
+    login_latencies = []
+    probe_latencies = []
+    statuses = {}
+    remaining = [logins]
+    done = asyncio.Event()
+
+    async def login_worker(client: httpx.AsyncClient):
+        while remaining[0] > 0:
+            remaining[0] -= 1
+            started = time.perf_counter()
+            response = await client.post(
+                "/api/v1/auditors/login", json={"username": "junior1", "password": "password123"}
+            )
+            login_latencies.append(time.perf_counter() - started)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    async def probe(client: httpx.AsyncClient):
+        while not done.is_set():
+            started = time.perf_counter()
+            response = await client.get("/api/v1/customers/1/advice")
+            probe_latencies.append(time.perf_counter() - started)
+            response.raise_for_status()
+            await asyncio.sleep(0.005)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        probe_task = asyncio.create_task(probe(client))
+        started = time.perf_counter()
+        await asyncio.gather(*(login_worker(client) for _ in range(login_concurrency)))
+        elapsed = time.perf_counter() - started
+        done.set()
+        await probe_task
+
+    login_latencies.sort()
+    probe_latencies.sort()
+    return {
+        "elapsed_s": round(elapsed, 2),
+        "statuses": statuses,
+        "login_p99_ms": percentile(login_latencies, 0.99),
+        "probe_requests": len(probe_latencies),
+        "probe_p50_ms": percentile(probe_latencies, 0.5),
+        "probe_p99_ms": percentile(probe_latencies, 0.99),
+        "probe_max_ms": percentile(probe_latencies, 1.0)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="登录风暴负载测试")
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--login-concurrency", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--small-queue", type=int, default=8)
+    args = parser.parse_args()
+
+    seed()
+    modes = [
+        ("事件循环内计算", 0, args.logins),
+        ("密码计算池", args.workers, args.logins),
+        ("计算池+小队列", args.workers, args.small_queue)
+    ]
+    print(f"🚀 {args.logins} 次登录，并发 {args.login_concurrency}")
+    for label, workers, max_pending in modes:
+        password_hasher.shutdown()
+        password_hasher.max_workers = workers
+        password_hasher.max_pending = max_pending
+        result = asyncio.run(run_storm(args.logins, args.login_concurrency))
+        print(
+            f"   {label:<10} 耗时 {result['elapsed_s']:>6}s  状态码 {result['statuses']}  "
+            f"登录p99 {result['login_p99_ms']:>8}ms  | 其他接口 {result['probe_requests']:>4} 次 "
+            f"p50 {result['probe_p50_ms']:>7}ms  p99 {result['probe_p99_ms']:>7}ms  max {result['probe_max_ms']:>7}ms"
+        )
+    password_hasher.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+通知发件箱吞吐基准测试
+
+写入一批待发送通知，使用模拟网关延迟的本地通道，
+比较不同批大小和发送并发数下每分钟可发送的通知数。
+
+用法:
+    cd backend
+    python benchmarks/bench_notification_outbox.py --notifications 2000 --latency-ms 20
+"""
+
+import argparse
+import asyncio
+import time
+
+import common  # noqa: F401  必须在导入app之前导入，用于切换到临时数据库
+
+from app.database import engine
+from app.models import Base, Customer, Notification
+from app.models.customer import CustomerStatus, RiskLevel
+from app.models.workflow import NotificationStatus, NotificationType
+from app.utils.notification_dispatcher import LocalSinkTransport, NotificationDispatcher
+
+
+class SlowSinkTransport(LocalSinkTransport):
+    """模拟网关往返延迟的本地通道"""
+
+    def __init__(self, latency: float):
+        super().__init__(max_messages=1)
+        self.latency = latency
+
+    async def send(self, message):
+        await asyncio.sleep(self.latency)
+        self.messages.append(message)
+
+
+def seed(notifications: int):
+    """重建表结构并写入待发送通知"""
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(Customer.__table__.insert(), [{
+            "name": "客户1",
+            "phone": "13900000001",
+            "id_card": "110101199001011234",
+            "investment_amount": 100000,
+            "risk_level": RiskLevel.moderate,
+            "status": CustomerStatus.approved
+        }])
+        conn.execute(Notification.__table__.insert(), [
+            {
+                "customer_id": 1,
+                "notification_type": NotificationType.sms,
+                "title": f"通知{i}",
+                "content": "审核通过",
+                "status": NotificationStatus.pending,
+                "attempts": 0
+            }
+            for i in range(notifications)
+        ])
+
+
+async def drain(dispatcher: NotificationDispatcher) -> float:
+    """处理完所有待发送通知，返回耗时"""
+    started = time.perf_counter()
+    while await dispatcher.dispatch_once():
+        pass
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="通知发件箱吞吐基准测试")
+    parser.add_argument("--notifications", type=int, default=2000)
+    parser.add_argument("--latency-ms", type=float, default=20)
+    args = parser.parse_args()
+
+    modes = [
+        ("逐条发送", 1, 1),
+        ("批量100/并发10", 100, 10),
+        ("批量200/并发50", 200, 50)
+    ]
+    print(f"🚀 {args.notifications} 条通知，模拟网关延迟 {args.latency_ms}ms")
+    for label, batch_size, concurrency in modes:
+        seed(args.notifications)
+        dispatcher = NotificationDispatcher(
+            SlowSinkTransport(args.latency_ms / 1000), batch_size=batch_size, concurrency=concurrency
+        )
+        elapsed = asyncio.run(drain(dispatcher))
+        print(
+            f"   {label:<14} 耗时 {elapsed:>7.2f}s  发送 {dispatcher.sent:>6}  "
+            f"{dispatcher.sent / elapsed * 60:>10.0f} 条/分钟"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+注册查重基准测试
+
+在已有大量客户（默认500万）的表上以相同并发调用注册接口，其中一部分是重复手机号，对比三种方式：
+- query：每次注册前先查询查重（原来的做法）
+- insert：直接插入，由唯一约束发现重复
+- filter：加载布隆过滤器，判断可能重复时才查询确认
+报告每秒注册数、新客户/重复请求的p50/p99延迟和查重查询次数，以及过滤器的加载耗时和内存。
+
+用法:
+    cd backend
+    python benchmarks/bench_registration_filter.py --customers 5000000 --requests 3000 --duplicate-ratio 0.2
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from datetime import datetime
+
+from common import make_customer_payload, percentile  # 必须在导入app之前导入，用于切换到临时数据库
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import event
+
+from app.api import customers_router
+from app.database import database, engine
+from app.id_generator import id_generator
+from app.models import Base, Customer
+from app.models.customer import CustomerStatus, RiskLevel
+from app.utils.registration_filter import registration_filter
+
+CHUNK_SIZE = 50000
+MODES = ("query", "insert", "filter")
+
+
+def seed(count: int):
+    """分块生成已注册客户（手机号 1xxxxxxxxxx，身份证号 110101xxxxxxxxxxxx）"""
+    Base.metadata.create_all(bind=engine)
+    now = datetime.now()
+    with engine.begin() as conn:
+        for offset in range(0, count, CHUNK_SIZE):
+            numbers = range(offset, min(offset + CHUNK_SIZE, count))
+            conn.execute(Customer.__table__.insert(), [
+                {
+                    "application_no": application_no,
+                    "name": f"客户{i}",
+                    "phone": f"1{i:010d}",
+                    "id_card": f"110101{i:012d}",
+                    "investment_amount": 100000,
+                    "risk_score": 20,
+                    "risk_level": RiskLevel.conservative,
+                    "status": CustomerStatus.approved,
+                    "created_at": now,
+                    "updated_at": now
+                }
+                for i, application_no in zip(numbers, id_generator.next_ids(len(numbers)))
+            ])
+
+
+def build_requests(mode_index: int, args) -> list:
+    """新客户使用每种方式各自的号段，重复请求使用已注册客户的手机号"""
+    rng = random.Random(mode_index)
+    requests = []
+    for n in range(args.requests):
+        payload = make_customer_payload(n, phone_prefix=f"{mode_index + 7}")
+        duplicate = rng.random() < args.duplicate_ratio
+        if duplicate:
+            payload["phone"] = f"1{rng.randrange(args.customers):010d}"
+        requests.append((duplicate, payload))
+    return requests
+
+
+async def run_mode(mode: str, requests: list, concurrency: int) -> dict:
+    app = FastAPI()
+    app.include_router(customers_router)
+    latencies = {True: [], False: []}
+    statuses = {}
+    queue = list(reversed(requests))
+
+    async def worker(client: httpx.AsyncClient):
+        while queue:
+            duplicate, payload = queue.pop()
+            started = time.perf_counter()
+            response = await client.post("/api/v1/customers/register", json=payload)
+            latencies[duplicate].append(time.perf_counter() - started)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    started = time.perf_counter()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    result = {"rps": len(requests) / elapsed, "statuses": statuses}
+    for duplicate, name in ((False, "new"), (True, "duplicate")):
+        values = sorted(latencies[duplicate])
+        result[name] = {"p50": percentile(values, 0.5), "p99": percentile(values, 0.99)}
+    return result
+
+
+async def prepare(mode: str):
+    """切换查重方式"""
+    registration_filter.loaded = False
+    registration_filter.__dict__.pop("might_exist", None)
+    if mode == "query":
+        # 始终先查询一次，相当于原来的先查询后插入
+        registration_filter.loaded = True
+        registration_filter.might_exist = lambda phone, id_card: True
+    elif mode == "filter":
+        started = time.perf_counter()
+        await registration_filter.load(database.async_session_factory)
+        memory = (registration_filter.phones.memory_bytes + registration_filter.id_cards.memory_bytes) / 2 ** 20
+        print(f"   过滤器加载 {time.perf_counter() - started:.1f}s，"
+              f"{registration_filter.phones.count} 个客户，占用 {memory:.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="注册查重基准测试")
+    parser.add_argument("--customers", type=int, default=5000000, help="已注册客户数")
+    parser.add_argument("--requests", type=int, default=3000, help="每种方式的注册请求数")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--duplicate-ratio", type=float, default=0.2, help="重复手机号的请求比例")
+    args = parser.parse_args()
+
+    print(f"🔨 生成 {args.customers} 个已注册客户...")
+    started = time.perf_counter()
+    seed(args.customers)
+    print(f"   耗时 {time.perf_counter() - started:.1f}s")
+
+    checks = []
+    event.listen(database.async_engine.sync_engine, "before_cursor_execute",
+                 lambda conn, cursor, statement, *_: checks.append(1)
+                 if statement.startswith("SELECT customers.phone") else None)
+
+    async def run_all() -> list:
+        # 所有方式在同一个事件循环中运行（连接池的等待队列绑定事件循环）
+        rows = []
+        for mode_index, mode in enumerate(MODES):
+            await prepare(mode)
+            checks.clear()
+            result = await run_mode(mode, build_requests(mode_index, args), args.concurrency)
+            rows.append((mode, result, len(checks)))
+        return rows
+
+    print(f"📊 每种方式 {args.requests} 个注册请求，并发 {args.concurrency}，重复比例 {args.duplicate_ratio:.0%}")
+    rows = asyncio.run(run_all())
+
+    print(f"{'方式':<8}{'每秒':>8}{'新p50':>9}{'新p99':>9}{'重复p50':>9}{'重复p99':>9}{'查重查询':>8}  状态码")
+    for mode, result, check_count in rows:
+        print(f"{mode:<10}{result['rps']:>8.1f}{result['new']['p50']:>9}{result['new']['p99']:>9}"
+              f"{result['duplicate']['p50']:>9}{result['duplicate']['p99']:>9}{check_count:>10}  {result['statuses']}")
+
+
+if __name__ == "__main__":
+    main()
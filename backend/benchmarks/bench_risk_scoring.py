@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+批量风险评分基准测试
+
+对比逐条 calculate_risk_score 与 calculate_risk_scores_batch 的吞吐量
+（向量化结果与逐条计算一致性的校验见 test_risk_scoring.py）。
+
+用法:
+    cd backend
+    python benchmarks/bench_risk_scoring.py --rows 1000000
+"""
+
+import argparse
+import time
+
+import common  # noqa: F401  必须在导入app之前导入，用于切换到临时数据库
+
+import numpy as np
+
+from app.schemas.customer import AssessmentData
+from app.services.risk_assessment import RiskAssessmentService, SCORE_TABLES
+
+
+def make_rows(count: int) -> list:
+    """生成随机问卷数据（字典形式，模拟从数据库读取的列）"""
+    rng = np.random.default_rng(42)
+    columns = []
+    for _, scores in SCORE_TABLES:
+        answers = np.array(list(scores), dtype=object)
+        columns.append(answers[rng.integers(0, len(answers), count)])
+    fields = [field for field, _ in SCORE_TABLES]
+    return [dict(zip(fields, values)) for values in zip(*columns)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="批量风险评分基准测试")
+    parser.add_argument("--rows", type=int, default=1000000)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    assessments = [AssessmentData(**row) for row in rows[:min(len(rows), 200000)]]
+
+    started = time.perf_counter()
+    for item in assessments:
+        RiskAssessmentService.determine_risk_level(RiskAssessmentService.calculate_risk_score(item))
+    scalar_elapsed = time.perf_counter() - started
+    scalar_rate = len(assessments) / scalar_elapsed
+
+    started = time.perf_counter()
+    codes = RiskAssessmentService.encode_assessments(rows)
+    encode_elapsed = time.perf_counter() - started
+    started = time.perf_counter()
+    scores = RiskAssessmentService.score_encoded(codes)
+    RiskAssessmentService.determine_risk_levels_batch(scores)
+    score_elapsed = time.perf_counter() - started
+
+    print(f"🚀 {args.rows} 行")
+    print(f"   逐条计算              {scalar_rate:>14,.0f} 行/秒")
+    print(f"   批量计算(含编码)      {args.rows / (encode_elapsed + score_elapsed):>14,.0f} 行/秒")
+    print(f"   批量计算(已编码)      {args.rows / score_elapsed:>14,.0f} 行/秒")
+
+
+if __name__ == "__main__":
+    main()
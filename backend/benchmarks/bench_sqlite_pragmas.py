@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+SQLite连接配置基准测试
+
+在两个独立的数据库文件上以相同并发执行读写混合负载：
+- default：旧配置（异步引擎不复用连接，回滚日志模式，无PRAGMA）
+- tuned：当前配置（连接池 + WAL、synchronous=NORMAL、busy_timeout、cache_size、mmap_size、temp_store）
+写操作模拟注册（查重后插入客户和风险评估，提交事务），读操作模拟查询客户详情和客户列表。
+报告读/写吞吐、p50/p99延迟和失败数（database is locked）。
+
+用法:
+    cd backend
+    python benchmarks/bench_sqlite_pragmas.py --customers 20000 --concurrency 50 --duration 20 --write-ratio 0.2
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import time
+
+from common import BENCH_DIR, percentile  # 必须在导入app之前导入，用于切换到临时数据库
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.database import apply_sqlite_pragmas, engine_options, get_async_database_url
+from app.models import Base
+from app.models.customer import Customer, CustomerStatus, RiskLevel
+from app.models.workflow import RiskAssessment
+
+SEED_CHUNK_SIZE = 10000
+
+
+def seed(database_url: str, count: int):
+    """生成初始客户数据"""
+    seed_engine = create_engine(database_url)
+    Base.metadata.create_all(bind=seed_engine)
+    with seed_engine.begin() as conn:
+        for offset in range(0, count, SEED_CHUNK_SIZE):
+            conn.execute(Customer.__table__.insert(), [
+                {
+                    "name": f"客户{i}",
+                    "phone": f"139{i:08d}",
+                    "id_card": f"110101{i:012d}",
+                    "investment_amount": 100000 + i,
+                    "risk_score": 60,
+                    "risk_level": RiskLevel.moderate,
+                    "status": CustomerStatus.pending
+                }
+                for i in range(offset, min(offset + SEED_CHUNK_SIZE, count))
+            ])
+    seed_engine.dispose()
+
+
+def build_engine(database_url: str, tuned: bool):
+    async_url = get_async_database_url(database_url)
+    if not tuned:
+        return create_async_engine(async_url, connect_args={"check_same_thread": False})
+    async_engine = create_async_engine(async_url, **engine_options(database_url, is_async=True))
+    apply_sqlite_pragmas(async_engine.sync_engine)
+    return async_engine
+
+
+class Workload:
+    def __init__(self, session_factory, customers: int):
+        self.session_factory = session_factory
+        self.customers = customers
+        self.next_customer = customers
+        self.latencies = {"read": [], "write": []}
+        self.errors = {"read": 0, "write": 0}
+
+    async def read(self, rng: random.Random):
+        async with self.session_factory() as db:
+            await db.get(Customer, rng.randint(1, self.customers))
+            result = await db.execute(
+                select(Customer.id, Customer.name).where(Customer.status == CustomerStatus.pending)
+                .order_by(Customer.created_at.desc(), Customer.id.desc()).limit(20)
+            )
+            result.all()
+
+    async def write(self, rng: random.Random):
+        self.next_customer += 1
+        i = self.next_customer
+        async with self.session_factory() as db:
+            await db.scalar(select(Customer.id).where(Customer.phone == f"139{i:08d}").limit(1))
+            customer = Customer(
+                name=f"客户{i}",
+                phone=f"139{i:08d}",
+                id_card=f"110101{i:012d}",
+                investment_amount=100000,
+                risk_score=60,
+                risk_level=RiskLevel.moderate,
+                status=CustomerStatus.pending
+            )
+            db.add(customer)
+            await db.flush()
+            db.add(RiskAssessment(customer_id=customer.id, assessment_data={}, risk_score=60, risk_level="moderate"))
+            await db.commit()
+
+    async def worker(self, deadline: float, write_ratio: float, seed: int):
+        rng = random.Random(seed)
+        while time.perf_counter() < deadline:
+            kind = "write" if rng.random() < write_ratio else "read"
+            started = time.perf_counter()
+            try:
+                await (self.write(rng) if kind == "write" else self.read(rng))
+            except OperationalError:
+                self.errors[kind] += 1
+                continue
+            self.latencies[kind].append(time.perf_counter() - started)
+
+
+async def run(name: str, tuned: bool, args) -> dict:
+    database_url = f"sqlite:///{os.path.join(BENCH_DIR, f'{name}.db')}"
+    seed(database_url, args.customers)
+    async_engine = build_engine(database_url, tuned)
+    workload = Workload(async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False), args.customers)
+    started = time.perf_counter()
+    deadline = started + args.duration
+    await asyncio.gather(*(workload.worker(deadline, args.write_ratio, seed=i) for i in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+    await async_engine.dispose()
+
+    result = {}
+    for kind in ("read", "write"):
+        latencies = sorted(workload.latencies[kind])
+        result[kind] = {
+            "ops": len(latencies) / elapsed,
+            "p50": percentile(latencies, 0.5),
+            "p99": percentile(latencies, 0.99),
+            "errors": workload.errors[kind]
+        }
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SQLite连接配置基准测试")
+    parser.add_argument("--customers", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=20, help="每种配置的压测时长（秒）")
+    parser.add_argument("--write-ratio", type=float, default=0.2, help="写操作比例")
+    args = parser.parse_args()
+
+    print(f"📊 {args.customers} 个初始客户，并发 {args.concurrency}，写比例 {args.write_ratio:.0%}，每种配置 {args.duration}s")
+    print(f"{'配置':<8}{'操作':<6}{'每秒':>10}{'p50(ms)':>10}{'p99(ms)':>10}{'失败':>8}")
+    for name, tuned in (("default", False), ("tuned", True)):
+        result = asyncio.run(run(name, tuned, args))
+        for kind, stats in result.items():
+            print(f"{name:<10}{kind:<8}{stats['ops']:>10.1f}{stats['p50']:>10}{stats['p99']:>10}{stats['errors']:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+基准测试公共工具
+
+导入本模块会把 DATABASE_URL 指向一个临时SQLite数据库，
+因此必须在导入 app 之前导入。
+"""
+
+import os
+import sys
+import tempfile
+
+BENCH_DIR = tempfile.mkdtemp(prefix="fa_bench_")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(BENCH_DIR, 'bench.db')}")
+os.environ.setdefault("DEBUG", "false")
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+AGE_OPTIONS = ["18-30岁", "31-45岁", "46-60岁", "60岁以上"]
+INCOME_OPTIONS = ["50万以上", "30-50万", "10-30万", "10万以下"]
+EXPERIENCE_OPTIONS = ["5年以上", "3-5年", "1-3年", "无经验"]
+TOLERANCE_OPTIONS = ["30%以上", "15-30%", "5-15%", "5%以内"]
+GOAL_OPTIONS = ["追求高收益", "积极增长", "稳健增值", "资产保值"]
+PERIOD_OPTIONS = ["5年以上", "3-5年", "1-3年", "1年以内"]
+
+
+def make_customer_payload(i: int, phone_prefix: str = "139") -> dict:
+    """生成第i个合成客户的注册请求体"""
+    return {
+        "name": f"客户{i}",
+        "phone": f"{phone_prefix}{i:08d}",
+        "id_card": f"{phone_prefix}101{i:012d}",
+        "email": f"user{i}@example.com",
+        "occupation": "工程师",
+        "investment_amount": 50000 + (i * 7919) % 2000000,
+        "assessment_data": {
+            "age": AGE_OPTIONS[i % 4],
+            "income": INCOME_OPTIONS[(i // 4) % 4],
+            "experience": EXPERIENCE_OPTIONS[(i // 16) % 4],
+            "risk_tolerance": TOLERANCE_OPTIONS[(i // 64) % 4],
+            "goal": GOAL_OPTIONS[(i // 256) % 4],
+            "period": PERIOD_OPTIONS[(i // 1024) % 4]
+        }
+    }
+
+
+def percentile(values: list, ratio: float) -> float:
+    """计算已排序列表的分位数（毫秒）"""
+    if not values:
+        return 0.0
+    return round(values[min(len(values) - 1, int(len(values) * ratio))] * 1000, 2)
@@ -25,4 +25,7 @@ echo "   API文档: http://localhost:8000/docs"
 echo "   按 Ctrl+C 停止服务器"
 echo ""
 
+# 本地开发时启动自动创建缺少的数据表
+export CREATE_SCHEMA_ON_STARTUP=${CREATE_SCHEMA_ON_STARTUP:-true}
+
 uvicorn app.main:app --reload --host 0.0.0.0 --port 8000
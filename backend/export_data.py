@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+数据表流式导出（合规提取）
+
+用法:
+    python export_data.py customers --format csv --gzip -o customers.csv.gz
+    python export_data.py audit_records > audit_records.ndjson
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.config import settings
+from app.database import database
+from app.services.data_export import DataExportService, EXPORT_TABLES, EXPORT_FORMATS
+
+async def export(table_name: str, export_format: str, compress: bool, output, batch_size: int) -> int:
+    """导出到文件对象，返回写入的字节数"""
+    written = 0
+    try:
+        async for chunk in DataExportService.iter_export(table_name, export_format, compress, batch_size):
+            output.write(chunk)
+            written += len(chunk)
+    finally:
+        await database.dispose()
+    return written
+
+def main():
+    parser = argparse.ArgumentParser(description="数据表流式导出")
+    parser.add_argument("table", choices=list(EXPORT_TABLES))
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default="ndjson")
+    parser.add_argument("--gzip", action="store_true", help="gzip压缩输出")
+    parser.add_argument("-o", "--output", help="输出文件，默认写到标准输出")
+    parser.add_argument("--batch-size", type=int, default=settings.export_batch_size,
+                        help="服务端游标每批读取的行数，默认为 EXPORT_BATCH_SIZE")
+    args = parser.parse_args()
+
+    # SQL_ECHO 开启时SQL日志输出到标准输出，会混入导出数据
+    database.async_engine.echo = False
+
+    if args.output:
+        with open(args.output, "wb") as output:
+            written = asyncio.run(export(args.table, args.format, args.gzip, output, args.batch_size))
+        print(f"✅ 已导出 {args.table} 到 {args.output}（{written} 字节）", file=sys.stderr)
+    else:
+        asyncio.run(export(args.table, args.format, args.gzip, sys.stdout.buffer, args.batch_size))
+
+if __name__ == "__main__":
+    main()
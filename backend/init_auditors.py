@@ -9,7 +9,7 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from app.database import SessionLocal
 from app.models.auditor import Auditor, AuditorRole, AuditorStatus
-from app.utils.auth import get_password_hash
+from app.utils.password import password_hasher
 
 def init_auditors():
     """初始化审核员数据"""
@@ -58,10 +58,13 @@ def init_auditors():
             }
         ]
         
-        for auditor_data in auditors:
+        # 在密码计算池中并行计算bcrypt哈希
+        password_hashes = password_hasher.hash_many([auditor_data["password"] for auditor_data in auditors])
+        
+        for auditor_data, password_hash in zip(auditors, password_hashes):
             auditor = Auditor(
                 username=auditor_data["username"],
-                password_hash=get_password_hash(auditor_data["password"]),
+                password_hash=password_hash,
                 name=auditor_data["name"],
                 role=auditor_data["role"],
                 department=auditor_data["department"],
@@ -81,6 +84,7 @@ def init_auditors():
         db.rollback()
     finally:
         db.close()
+        password_hasher.shutdown()
 
 if __name__ == "__main__":
     init_auditors()
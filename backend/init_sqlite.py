@@ -26,6 +26,7 @@ def init_sqlite_db():
     cursor.execute('''
     CREATE TABLE customers (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
+        application_no BIGINT NOT NULL UNIQUE,
         name VARCHAR(50) NOT NULL,
         phone VARCHAR(20) NOT NULL UNIQUE,
         id_card VARCHAR(18) NOT NULL UNIQUE,
@@ -93,11 +94,13 @@ def init_sqlite_db():
     cursor.execute('''
     CREATE TABLE audit_workflow (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
+        workflow_no BIGINT NOT NULL UNIQUE,
         customer_id INTEGER NOT NULL,
         current_level VARCHAR(20) NOT NULL,
         workflow_status VARCHAR(20) DEFAULT 'pending',
         assigned_auditor_id INTEGER,
         next_level VARCHAR(20),
+        version INTEGER NOT NULL DEFAULT 1,
         created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
         updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
         FOREIGN KEY (customer_id) REFERENCES customers(id),
@@ -129,12 +132,44 @@ def init_sqlite_db():
         title VARCHAR(200),
         content TEXT NOT NULL,
         status VARCHAR(20) DEFAULT 'pending',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        next_attempt_at DATETIME,
+        last_error TEXT,
         sent_at DATETIME,
         created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
         FOREIGN KEY (customer_id) REFERENCES customers(id)
     )
     ''')
     
+    # 创建月度投资汇总表
+    cursor.execute('''
+    CREATE TABLE investment_rollups (
+        month VARCHAR(7) NOT NULL,
+        risk_level VARCHAR(20) NOT NULL,
+        approved_count INTEGER NOT NULL DEFAULT 0,
+        approved_amount DECIMAL(18,2) NOT NULL DEFAULT 0,
+        rejected_count INTEGER NOT NULL DEFAULT 0,
+        updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (month, risk_level)
+    )
+    ''')
+    
+    # 创建热点查询索引（与 app/models 中的声明保持一致）
+    print("📇 创建索引...")
+    cursor.executescript('''
+    CREATE INDEX ix_customers_status_amount ON customers (status, investment_amount);
+    CREATE INDEX ix_customers_created_id ON customers (created_at, id);
+    CREATE INDEX ix_customers_status_created_id ON customers (status, created_at, id);
+    CREATE INDEX ix_customers_risk_level_created_id ON customers (risk_level, created_at, id);
+    CREATE INDEX ix_risk_assessments_customer_id ON risk_assessments (customer_id);
+    CREATE INDEX ix_investment_advice_customer_id ON investment_advice (customer_id);
+    CREATE INDEX ix_audit_workflow_customer_id ON audit_workflow (customer_id);
+    CREATE INDEX ix_audit_workflow_auditor_status ON audit_workflow (assigned_auditor_id, workflow_status);
+    CREATE INDEX ix_audit_records_auditor_status ON audit_records (auditor_id, audit_status);
+    CREATE INDEX ix_notifications_customer_id ON notifications (customer_id);
+    CREATE INDEX ix_notifications_status_next_attempt ON notifications (status, next_attempt_at);
+    ''')
+    
     # 插入初始审核员数据
     print("👥 插入初始审核员数据...")
     cursor.execute('''
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+重建月度投资汇总表（investment_rollups）
+
+首次上线时回填历史数据，或汇总与客户表不一致时重建；汇总按客户最后一次通过/拒绝审核的时间归入月份。
+
+用法:
+    python rebuild_rollups.py                 # 重建全部月份
+    python rebuild_rollups.py --month 2024-05 # 只重建指定月份
+"""
+
+import argparse
+import asyncio
+import os
+import re
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.database import database
+from app.models import Base
+from app.services.investment_rollup import InvestmentRollupService
+
+async def rebuild(month) -> int:
+    """在一个事务中删除并重新写入汇总行，返回写入的行数"""
+    try:
+        async with database.async_engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all, tables=[Base.metadata.tables["investment_rollups"]])
+        async with database.async_session_factory() as db:
+            rows = await InvestmentRollupService.rebuild(db, month)
+            await db.commit()
+        return rows
+    finally:
+        await database.dispose()
+
+def main():
+    parser = argparse.ArgumentParser(description="重建月度投资汇总表")
+    parser.add_argument("--month", help="只重建指定月份（YYYY-MM），默认重建全部月份")
+    args = parser.parse_args()
+    if args.month is not None and not re.fullmatch(r"\d{4}-\d{2}", args.month):
+        parser.error("--month 格式应为 YYYY-MM")
+
+    rows = asyncio.run(rebuild(args.month))
+    print(f"✅ 已重建 {args.month or '全部月份'} 的投资汇总（{rows} 行）")
+
+if __name__ == "__main__":
+    main()
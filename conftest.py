@@ -0,0 +1,84 @@
+"""
+pytest 公共配置
+
+进程内测试使用临时SQLite数据库，必须在导入 app 之前设置环境变量。
+（test_api.py 等脚本需要先启动服务，请直接用 python 运行。）
+"""
+
+import os
+import sys
+import tempfile
+
+TEST_DB_DIR = tempfile.mkdtemp(prefix="fa_test_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(TEST_DB_DIR, 'test.db')}"
+os.environ["DEBUG"] = "false"
+os.environ["WORKER_ID"] = "1"
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+import pytest
+
+from app.database import SessionLocal, engine
+from app.models import Base
+from app.models.auditor import Auditor, AuditorRole, AuditorStatus
+from app.models.customer import Customer, CustomerStatus, RiskLevel
+from app.models.workflow import AuditWorkflow, AuditLevel, WorkflowStatus
+from app.utils.auth import invalidate_auditor_cache
+
+
+@pytest.fixture()
+def auditor_id():
+    """重建表结构并创建一个初级审核员（用户名 junior1）"""
+    invalidate_auditor_cache()
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        auditor = Auditor(
+            username="junior1",
+            password_hash="-",
+            name="初级审核员1",
+            role=AuditorRole.junior,
+            status=AuditorStatus.active
+        )
+        db.add(auditor)
+        db.commit()
+        return auditor.id
+    finally:
+        db.close()
+
+
+def seed_pending(auditor_id: int, count: int = 1, start: int = 0, risk_level=RiskLevel.conservative,
+                 investment_amount=100000, next_level=None) -> list:
+    """
+    为审核员添加初级审核的待审核任务，返回客户ID
+
+    第 i 个客户的手机号和身份证号由 start + i 生成；risk_level 和 investment_amount 为列表时按顺序分别用于每个客户。
+    """
+    db = SessionLocal()
+    try:
+        customers = []
+        for n in range(count):
+            i = start + n
+            customer = Customer(
+                name=f"客户{i}",
+                phone=f"139{i:08d}",
+                id_card=f"110101{i:012d}",
+                investment_amount=investment_amount[n] if isinstance(investment_amount, list) else investment_amount,
+                risk_level=risk_level[n] if isinstance(risk_level, list) else risk_level,
+                status=CustomerStatus.pending
+            )
+            db.add(customer)
+            db.flush()
+            db.add(AuditWorkflow(
+                customer_id=customer.id,
+                current_level=AuditLevel.junior,
+                workflow_status=WorkflowStatus.pending,
+                assigned_auditor_id=auditor_id,
+                next_level=next_level
+            ))
+            customers.append(customer.id)
+        db.commit()
+        return customers
+    finally:
+        db.close()
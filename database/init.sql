@@ -6,6 +6,7 @@ USE finance_athena;
 -- 创建客户信息表
 CREATE TABLE IF NOT EXISTS customers (
     id BIGINT PRIMARY KEY AUTO_INCREMENT,
+    application_no BIGINT NOT NULL UNIQUE COMMENT '申请编号',
     name VARCHAR(50) NOT NULL COMMENT '姓名',
     phone VARCHAR(20) NOT NULL UNIQUE COMMENT '手机号',
     id_card VARCHAR(18) NOT NULL UNIQUE COMMENT '身份证号',
@@ -22,7 +23,11 @@ CREATE TABLE IF NOT EXISTS customers (
     risk_level ENUM('conservative', 'moderate', 'aggressive') COMMENT '风险等级',
     status ENUM('pending', 'approved', 'rejected') DEFAULT 'pending' COMMENT '状态',
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    INDEX ix_customers_status_amount (status, investment_amount),
+    INDEX ix_customers_created_id (created_at, id),
+    INDEX ix_customers_status_created_id (status, created_at, id),
+    INDEX ix_customers_risk_level_created_id (risk_level, created_at, id)
 );
 
 -- 创建审核员表
@@ -46,6 +51,7 @@ CREATE TABLE IF NOT EXISTS risk_assessments (
     risk_score INT NOT NULL COMMENT '风险评分',
     risk_level ENUM('conservative', 'moderate', 'aggressive') NOT NULL,
     assessment_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    INDEX ix_risk_assessments_customer_id (customer_id),
     FOREIGN KEY (customer_id) REFERENCES customers(id)
 );
 
@@ -59,19 +65,24 @@ CREATE TABLE IF NOT EXISTS investment_advice (
     portfolio_config JSON COMMENT '投资组合配置',
     advice_content TEXT COMMENT '投资建议内容',
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    INDEX ix_investment_advice_customer_id (customer_id),
     FOREIGN KEY (customer_id) REFERENCES customers(id)
 );
 
 -- 创建审核流程表
 CREATE TABLE IF NOT EXISTS audit_workflow (
     id BIGINT PRIMARY KEY AUTO_INCREMENT,
+    workflow_no BIGINT NOT NULL UNIQUE COMMENT '流程编号',
     customer_id BIGINT NOT NULL,
     current_level ENUM('junior', 'senior', 'expert', 'committee') NOT NULL,
     workflow_status ENUM('pending', 'in_progress', 'completed', 'rejected') DEFAULT 'pending',
     assigned_auditor_id BIGINT COMMENT '当前审核员ID',
     next_level ENUM('junior', 'senior', 'expert', 'committee') COMMENT '下一级审核',
+    version INT NOT NULL DEFAULT 1 COMMENT '版本号',
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    INDEX ix_audit_workflow_customer_id (customer_id),
+    INDEX ix_audit_workflow_auditor_status (assigned_auditor_id, workflow_status),
     FOREIGN KEY (customer_id) REFERENCES customers(id),
     FOREIGN KEY (assigned_auditor_id) REFERENCES auditors(id)
 );
@@ -85,6 +96,7 @@ CREATE TABLE IF NOT EXISTS audit_records (
     audit_status ENUM('pending', 'approved', 'rejected', 'need_review') NOT NULL,
     audit_opinion TEXT COMMENT '审核意见',
     audit_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    INDEX ix_audit_records_auditor_status (auditor_id, audit_status),
     FOREIGN KEY (customer_id) REFERENCES customers(id),
     FOREIGN KEY (auditor_id) REFERENCES auditors(id)
 );
@@ -97,11 +109,27 @@ CREATE TABLE IF NOT EXISTS notifications (
     title VARCHAR(200) COMMENT '通知标题',
     content TEXT NOT NULL COMMENT '通知内容',
     status ENUM('pending', 'sent', 'failed') DEFAULT 'pending',
+    attempts INT NOT NULL DEFAULT 0 COMMENT '发送尝试次数',
+    next_attempt_at TIMESTAMP NULL COMMENT '下次发送时间',
+    last_error TEXT COMMENT '最近一次发送失败原因',
     sent_at TIMESTAMP NULL,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    INDEX ix_notifications_customer_id (customer_id),
+    INDEX ix_notifications_status_next_attempt (status, next_attempt_at),
     FOREIGN KEY (customer_id) REFERENCES customers(id)
 );
 
+-- 创建月度投资汇总表（审核完成时累加，backend/rebuild_rollups.py 可重建）
+CREATE TABLE IF NOT EXISTS investment_rollups (
+    month VARCHAR(7) NOT NULL COMMENT '月份',
+    risk_level ENUM('conservative', 'moderate', 'aggressive') NOT NULL COMMENT '风险等级',
+    approved_count INT NOT NULL DEFAULT 0 COMMENT '通过客户数',
+    approved_amount DECIMAL(18,2) NOT NULL DEFAULT 0 COMMENT '通过客户的投资金额',
+    rejected_count INT NOT NULL DEFAULT 0 COMMENT '拒绝客户数',
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (month, risk_level)
+);
+
 -- 插入初始审核员数据
 INSERT INTO auditors (username, password_hash, name, role, department, phone) VALUES
 ('junior1', '$2b$12$LQv3c1yqBWVHxkd0LHAkCOYz6TtxMQJqhN8/LewdBPj/RK.s5uOeG', '初级审核员1', 'junior', '风险审核部', '13800138001'),
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+投资建议缓存测试：重复请求不访问数据库，提交审核结果后缓存失效，
+查询期间被删除的缓存不会被旧数据重新写入，Redis后端行为一致
+"""
+
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import event
+
+from app.api import customers_router, workflow_router
+from app.database import SessionLocal, engine, async_engine
+from app.models import Base
+from app.models.auditor import Auditor, AuditorRole, AuditorStatus
+from app.models.customer import Customer, CustomerStatus, RiskLevel
+from app.models.workflow import AuditWorkflow, AuditLevel, WorkflowStatus, RiskAssessment, InvestmentAdvice
+from app.config import settings
+from app.utils.advice_cache import AdviceCache, _INVALIDATE, _SET_IF_CURRENT, create_advice_cache
+from app.utils.auth import create_access_token, invalidate_auditor_cache
+
+
+class FakeRedis:
+    """内存中的Redis替身，只实现缓存用到的命令"""
+
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value.encode()
+
+    async def delete(self, key):
+        self.data.pop(key, None)
+
+    async def eval(self, script, numkeys, version_key, key, *args):
+        # 按脚本语义模拟 _SET_IF_CURRENT 和 _INVALIDATE
+        if script == _INVALIDATE:
+            self.data[version_key] = str(int(self.data.get(version_key, b"0")) + 1).encode()
+            await self.delete(key)
+        elif script == _SET_IF_CURRENT:
+            expected, value, ttl = args
+            if self.data.get(version_key, b"0").decode() == expected:
+                await self.set(key, value, ex=ttl)
+
+    async def close(self):
+        pass
+
+
+@pytest.fixture(params=["local", "redis"])
+def cache(request, monkeypatch):
+    """分别使用进程内缓存和Redis替身"""
+    if request.param == "redis":
+        cache = AdviceCache(redis_client=FakeRedis())
+    else:
+        cache = AdviceCache()
+    for module in ("app.api.customers", "app.api.workflow"):
+        monkeypatch.setattr(f"{module}.advice_cache", cache)
+    return cache
+
+
+@pytest.fixture()
+def customer_id():
+    """重建表结构，创建一个待初级审核的保守型客户"""
+    invalidate_auditor_cache()
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        auditor = Auditor(
+            username="junior1",
+            password_hash="-",
+            name="初级审核员1",
+            role=AuditorRole.junior,
+            status=AuditorStatus.active
+        )
+        customer = Customer(
+            name="张三",
+            phone="13900000001",
+            id_card="110101199001011234",
+            investment_amount=100000,
+            risk_score=30,
+            risk_level=RiskLevel.conservative,
+            status=CustomerStatus.pending
+        )
+        db.add_all([auditor, customer])
+        db.flush()
+        db.add_all([
+            RiskAssessment(customer_id=customer.id, risk_score=30, risk_level="conservative"),
+            InvestmentAdvice(
+                customer_id=customer.id,
+                portfolio_type="conservative",
+                expected_return_min=3,
+                expected_return_max=5,
+                portfolio_config={"bonds": 70, "deposits": 30},
+                advice_content="稳健理财"
+            ),
+            AuditWorkflow(
+                customer_id=customer.id,
+                current_level=AuditLevel.junior,
+                workflow_status=WorkflowStatus.pending,
+                assigned_auditor_id=auditor.id
+            )
+        ])
+        db.commit()
+        return customer.id
+    finally:
+        db.close()
+
+
+def run_requests(requests):
+    """依次执行请求，返回 (响应列表, 每个请求执行的SQL语句数)"""
+    app = FastAPI()
+    app.include_router(customers_router)
+    app.include_router(workflow_router)
+    counts = []
+
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        counts[-1] += 1
+
+    async def run():
+        responses = []
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            for method, url, kwargs in requests:
+                counts.append(0)
+                responses.append(await client.request(method, url, **kwargs))
+        return responses
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", count_statement)
+    try:
+        return asyncio.run(run()), counts
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", count_statement)
+
+
+def test_repeated_advice_is_served_from_cache(cache, customer_id):
+    advice = ("GET", f"/api/v1/customers/{customer_id}/advice", {})
+    responses, counts = run_requests([advice, advice, advice])
+
+    assert [response.status_code for response in responses] == [200, 200, 200]
+    assert responses[0].json() == responses[1].json() == responses[2].json()
+    assert responses[0].json()["data"]["investment_advice"]["portfolio_config"] == {"bonds": 70, "deposits": 30}
+    assert counts[0] == 3
+    assert counts[1:] == [0, 0]
+    assert cache.stats()["hits"] == 2
+    assert cache.stats()["misses"] == 1
+    assert cache.stats()["hit_rate"] == round(2 / 3, 4)
+
+
+def test_submit_audit_invalidates_cached_advice(cache, customer_id):
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'junior1'})}"}
+    advice = ("GET", f"/api/v1/customers/{customer_id}/advice", {})
+    audit = ("POST", "/api/v1/workflow/audit", {
+        "headers": headers,
+        "json": {"customer_id": customer_id, "audit_status": "approved"}
+    })
+    responses, counts = run_requests([advice, audit, advice, advice])
+
+    assert responses[0].json()["data"]["audit_status"] == "pending"
+    assert responses[1].status_code == 200
+    assert responses[2].json()["data"]["audit_status"] == "approved"
+    assert counts[2] > 0
+    assert counts[3] == 0
+
+
+def test_missing_customer_is_not_cached(cache, customer_id):
+    missing = ("GET", "/api/v1/customers/999/advice", {})
+    responses, counts = run_requests([missing, missing])
+
+    assert [response.status_code for response in responses] == [404, 404]
+    assert counts[1] > 0
+
+
+def test_invalidation_during_fill_is_not_overwritten(cache):
+    async def run():
+        # 查询数据库期间审核提交并删除缓存：之前读到的旧数据不写入
+        version = await cache.version(1)
+        await cache.invalidate(1)
+        await cache.set(1, {"audit_status": "pending"}, version)
+        stale = await cache.get(1)
+
+        version = await cache.version(1)
+        await cache.set(1, {"audit_status": "approved"}, version)
+        # 其他客户的删除不影响（Redis 按客户计版本）
+        other_version = await cache.version(2)
+        await cache.set(2, {"audit_status": "pending"}, other_version)
+        return stale, await cache.get(1), await cache.get(2)
+
+    stale, fresh, other = asyncio.run(run())
+
+    assert stale is None
+    assert fresh == {"audit_status": "approved"}
+    assert other == {"audit_status": "pending"}
+
+
+def test_local_cache_uses_short_ttl(monkeypatch):
+    """进程内缓存的删除只对本进程生效，过期时间取 advice_cache_local_ttl_seconds"""
+    monkeypatch.setattr(settings, "advice_cache_backend", "local")
+    monkeypatch.setattr(settings, "advice_cache_local_ttl_seconds", 7)
+    cache = create_advice_cache()
+
+    assert cache.backend == "local"
+    assert cache.local.ttl_seconds == cache.ttl_seconds == 7
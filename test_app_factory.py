@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+应用工厂测试：导入时不连接数据库也不导入慢模块，按配置装配应用，表结构按需在启动时创建
+"""
+
+import asyncio
+import json
+import os
+import subprocess
+import sys
+
+import httpx
+import pytest
+from sqlalchemy import inspect
+
+from app.config import Settings
+from app.database import engine
+from app.main import create_app, ignored_settings
+from app.models import Base
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend")
+
+
+def serve(app, paths):
+    """在应用的启动/关闭流程中依次请求 paths"""
+    async def request():
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                return [await client.get(path) for path in paths]
+
+    return asyncio.run(request())
+
+
+def test_import_is_lazy(tmp_path):
+    database_path = tmp_path / "lazy.db"
+    script = (
+        "import json, sys\n"
+        "import app.main\n"
+        "print(json.dumps(sorted(name for name in ('jose', 'passlib', 'bcrypt') if name in sys.modules)))\n"
+    )
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{database_path}", PYTHONPATH=BACKEND_DIR)
+    output = subprocess.run(
+        [sys.executable, "-c", script], cwd=tmp_path, env=env, capture_output=True, text=True, check=True
+    ).stdout
+
+    assert json.loads(output) == []
+    # 导入时不连接数据库，也不建表
+    assert not database_path.exists()
+
+
+def test_schema_created_only_when_enabled():
+    Base.metadata.drop_all(bind=engine)
+
+    # 未开启时不建表，缺少数据表时拒绝启动
+    with pytest.raises(RuntimeError, match="CREATE_SCHEMA_ON_STARTUP"):
+        serve(create_app(Settings(notification_dispatcher_enabled=False)), ["/health"])
+    assert inspect(engine).get_table_names() == []
+
+    responses = serve(
+        create_app(Settings(notification_dispatcher_enabled=False, create_schema_on_startup=True)),
+        ["/health", "/api/v1/customers"]
+    )
+    assert [response.status_code for response in responses] == [200, 200]
+    assert "customers" in inspect(engine).get_table_names()
+
+
+def test_settings_select_features():
+    Base.metadata.create_all(bind=engine)
+    app = create_app(Settings(
+        notification_dispatcher_enabled=False, metrics_enabled=False, sql_instrumentation_enabled=True, debug=True
+    ))
+
+    health, metrics = serve(app, ["/health", "/metrics"])
+
+    assert health.status_code == 200
+    assert health.headers["x-db-queries"] == "0"
+    assert metrics.status_code == 404
+
+
+def test_settings_only_read_globally_are_reported(caplog):
+    assert ignored_settings(Settings(notification_dispatcher_enabled=False, sql_echo=True)) == []
+    assert ignored_settings(Settings(secret_key="other", advice_cache_backend="redis")) == [
+        "advice_cache_backend", "secret_key"
+    ]
+
+    create_app(Settings(secret_key="other"))
+    assert "secret_key" in caplog.text
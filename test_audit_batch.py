@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+批量审核测试：一次事务处理整批审核结果，SQL语句数量不随批量大小增长，返回每一项的处理结果
+"""
+
+import asyncio
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import event, func, select
+
+from app.api import workflow_router
+from app.database import SessionLocal, async_engine
+from app.models.customer import Customer, CustomerStatus
+from app.models.workflow import AuditRecord, AuditWorkflow, Notification, WorkflowStatus
+from app.services.audit_workflow import AuditWorkflowService
+from app.utils.auth import create_access_token
+from conftest import seed_pending
+
+
+def submit_batch(items: list):
+    """请求批量审核接口，返回响应和执行的SQL语句数"""
+    app = FastAPI()
+    app.include_router(workflow_router)
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'junior1'})}"}
+    statements = []
+
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    async def request():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post("/api/v1/workflow/audit/batch", json={"items": items}, headers=headers)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", count_statement)
+    try:
+        response = asyncio.run(request())
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", count_statement)
+    return response, len(statements)
+
+
+def approve_all(customer_ids: list) -> list:
+    return [{"customer_id": customer_id, "audit_status": "approved"} for customer_id in customer_ids]
+
+
+def test_batch_statement_count_is_constant(auditor_id):
+    submit_batch(approve_all(seed_pending(auditor_id, 1)))  # 预热认证缓存
+    response, small_batch_statements = submit_batch(approve_all(seed_pending(auditor_id, 3, start=1)))
+    assert response.status_code == 200
+    assert response.json()["data"]["success_count"] == 3
+
+    response, large_batch_statements = submit_batch(approve_all(seed_pending(auditor_id, 60, start=4)))
+    assert response.status_code == 200
+    assert response.json()["data"]["success_count"] == 60
+
+    assert small_batch_statements == large_batch_statements
+
+    db = SessionLocal()
+    try:
+        assert db.scalar(select(func.count()).select_from(AuditRecord)) == 64
+        assert db.scalar(
+            select(func.count()).select_from(AuditWorkflow).where(AuditWorkflow.workflow_status == WorkflowStatus.completed)
+        ) == 64
+        assert db.scalar(
+            select(func.count()).select_from(Customer).where(Customer.status == CustomerStatus.approved)
+        ) == 64
+        assert db.scalar(select(func.count()).select_from(Notification)) == 64
+    finally:
+        db.close()
+
+
+def test_batch_per_item_outcomes(auditor_id):
+    approved, rejected, review = seed_pending(auditor_id, 3)
+    response, _ = submit_batch([
+        {"customer_id": approved, "audit_status": "approved", "audit_opinion": "同意"},
+        {"customer_id": rejected, "audit_status": "rejected", "audit_opinion": "风险过高"},
+        {"customer_id": review, "audit_status": "need_review"},
+        {"customer_id": 9999, "audit_status": "approved"},
+        {"customer_id": approved, "audit_status": "rejected"}
+    ])
+
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert (data["total"], data["success_count"], data["failed_count"]) == (5, 3, 2)
+    results = data["results"]
+    assert [result["index"] for result in results] == [0, 1, 2, 3, 4]
+    assert [result.get("workflow_status") for result in results[:3]] == ["completed", "rejected", "pending"]
+    assert results[3]["error"] == "未找到对应的审核任务"
+    assert not results[4]["success"]
+
+    db = SessionLocal()
+    try:
+        statuses = dict(db.execute(select(Customer.id, Customer.status)).all())
+        assert statuses == {
+            approved: CustomerStatus.approved, rejected: CustomerStatus.rejected, review: CustomerStatus.pending
+        }
+        opinions = dict(db.execute(select(AuditRecord.customer_id, AuditRecord.audit_opinion)).all())
+        assert opinions == {approved: "同意", rejected: "风险过高", review: ""}
+        notified = set(db.scalars(select(Notification.customer_id)))
+        assert notified == {approved, rejected}
+    finally:
+        db.close()
+
+    # 已完成的任务不能再次审核
+    response, _ = submit_batch(approve_all([approved]))
+    assert response.json()["data"]["results"][0]["error"] == "未找到对应的审核任务"
+
+
+def test_batch_rejects_empty_items(auditor_id):
+    response, _ = submit_batch([])
+    assert response.status_code == 422
+
+
+def test_unexpected_errors_are_not_returned_to_client(auditor_id, monkeypatch, caplog):
+    customer_id, = seed_pending(auditor_id)
+
+    async def broken(*args, **kwargs):
+        raise RuntimeError("no such column: audit_workflow.version")
+
+    monkeypatch.setattr(AuditWorkflowService, "process_audit", broken)
+    monkeypatch.setattr(AuditWorkflowService, "process_audit_batch", broken)
+    app = FastAPI()
+    app.include_router(workflow_router)
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'junior1'})}"}
+
+    async def request():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return [
+                await client.post("/api/v1/workflow/audit", headers=headers,
+                                  json={"customer_id": customer_id, "audit_status": "approved"}),
+                await client.post("/api/v1/workflow/audit/batch", headers=headers,
+                                  json={"items": approve_all([customer_id])})
+            ]
+
+    single, batch = asyncio.run(request())
+
+    assert (single.status_code, single.json()["detail"]) == (500, "审核提交失败，请稍后重试")
+    assert (batch.status_code, batch.json()["detail"]) == (500, "批量审核提交失败，请稍后重试")
+    # 原始错误只记录在日志中
+    assert "no such column" in caplog.text
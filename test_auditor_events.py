@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+审核员事件推送测试：事件中心的订阅/发布和积压处理，事务提交后才发布事件（回滚和并发冲突时不发布），
+以及 /api/v1/workflow/events 事件流的票据认证、推送、保活、令牌过期时关闭和断开后取消订阅
+"""
+
+import asyncio
+import json
+import time
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.api import workflow_router
+from app.config import settings
+from app.database import database
+from app.models.workflow import AuditWorkflow, AuditStatus
+from app.services.audit_workflow import AuditWorkflowService, WorkflowConflictError
+from app.utils.auditor_events import AuditorEventBroker, TooManySubscribers, auditor_events
+from app.utils.auth import STREAM_TICKET_PURPOSE, create_access_token, create_stream_ticket, decode_token
+from conftest import seed_pending
+
+
+@pytest.fixture()
+def customer_id(auditor_id):
+    """审核员的一个只需初级审核的待审核任务（投资金额20万）"""
+    customer_id, = seed_pending(auditor_id, start=1, investment_amount=200000)
+    return customer_id
+
+
+def drain(subscription) -> list:
+    messages = []
+    while not subscription.queue.empty():
+        messages.append(subscription.queue.get_nowait())
+    return messages
+
+
+def test_broker_routes_and_bounds_events():
+    broker = AuditorEventBroker(queue_size=3, max_subscribers=3)
+    first = broker.subscribe(1)
+    second = broker.subscribe(1)
+    other = broker.subscribe(2)
+    assert broker.full
+    with pytest.raises(TooManySubscribers):
+        broker.subscribe(3)
+
+    broker.publish(1, "task_assigned", {"customer_id": 10})
+    broker.publish(None, "counters_changed", {"total_investment": 5.0})
+    assert drain(first) == drain(second) == [
+        ("task_assigned", {"customer_id": 10}), ("counters_changed", {"total_investment": 5.0})
+    ]
+    assert drain(other) == [("counters_changed", {"total_investment": 5.0})]
+
+    # 积压超过队列长度时丢弃，只保留 resync
+    for customer_id in range(4):
+        broker.publish(2, "task_assigned", {"customer_id": customer_id})
+    assert drain(other) == [("resync", {})]
+
+    broker.unsubscribe(first)
+    broker.unsubscribe(first)
+    assert broker.count == 2 and not broker.full
+    broker.publish(1, "task_assigned", {"customer_id": 11})
+    assert drain(first) == []
+    assert drain(second) == [("task_assigned", {"customer_id": 11})]
+
+    assert AuditorEventBroker.format("resync", {}) == "event: resync\ndata: {}\n\n"
+
+
+def test_events_are_published_after_commit_only(auditor_id, customer_id):
+    async def run():
+        subscription = auditor_events.subscribe(auditor_id)
+        try:
+            async with database.async_session_factory() as db:
+                auditor_events.defer(db, auditor_id, "task_assigned", {"customer_id": 99})
+                auditor_events.defer_counters(db, auditor_id, pending_count=1)
+                await db.rollback()
+                rolled_back = drain(subscription)
+
+                # 两个会话读到同一版本，只有先提交的一方发布事件
+                await db.get(AuditWorkflow, 1)
+                async with database.async_session_factory() as loser:
+                    await loser.get(AuditWorkflow, 1)
+                    assert await AuditWorkflowService.process_audit(
+                        db, 1, auditor_id, AuditStatus.approved, ""
+                    )
+                    await db.commit()
+                    with pytest.raises(WorkflowConflictError):
+                        await AuditWorkflowService.process_audit(loser, 1, auditor_id, AuditStatus.rejected, "")
+                    await loser.rollback()
+            return rolled_back, drain(subscription)
+        finally:
+            auditor_events.unsubscribe(subscription)
+
+    rolled_back, committed = asyncio.run(run())
+
+    assert rolled_back == []
+    assert committed == [
+        ("task_completed", {"customer_id": customer_id, "audit_level": "junior", "audit_status": "approved",
+                            "workflow_status": "completed"}),
+        ("counters_changed", {"pending_count": -1, "approved_count": 1})
+    ]
+
+
+def read_events(body: str) -> list:
+    """解析 text/event-stream，返回 (事件类型, 数据) 列表"""
+    events = []
+    for block in body.split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines() if line and not line.startswith(":"))
+        if "event" in fields:
+            events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+async def open_stream(app: FastAPI, query: str) -> tuple:
+    """直接调用ASGI应用打开事件流，返回 (状态码, 已收到内容, 断开函数, 应用任务)"""
+    started = asyncio.Event()
+    disconnected = asyncio.Event()
+    response = {"status": None, "body": []}
+
+    async def receive():
+        if not response.get("requested"):
+            response["requested"] = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["headers"] = dict(message["headers"])
+        elif message["type"] == "http.response.body":
+            response["body"].append(message.get("body", b"").decode())
+            started.set()
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": "/api/v1/workflow/events", "raw_path": b"/api/v1/workflow/events",
+        "query_string": query.encode(), "headers": [(b"host", b"test")], "server": ("test", 80),
+        "client": ("test", 1234), "root_path": ""
+    }
+    task = asyncio.create_task(app(scope, receive, send))
+    await asyncio.wait([task, asyncio.create_task(started.wait())], return_when=asyncio.FIRST_COMPLETED)
+    return response, disconnected.set, task
+
+
+def test_event_stream(customer_id, monkeypatch):
+    monkeypatch.setattr(settings, "auditor_events_keepalive_seconds", 0.05)
+    app = FastAPI()
+    app.include_router(workflow_router)
+    token = create_access_token({"sub": "junior1"})
+    headers = {"Authorization": f"Bearer {token}"}
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            unauthorized = await client.get("/api/v1/workflow/events")
+            ticket = (await client.post("/api/v1/workflow/events/ticket", headers=headers)).json()["data"]["ticket"]
+
+            response, disconnect, task = await open_stream(app, f"ticket={ticket}")
+            assert auditor_events.count == 1
+            submitted = await client.post("/api/v1/workflow/audit", json={
+                "customer_id": customer_id, "audit_status": "approved"
+            }, headers=headers)
+            assert submitted.status_code == 200, submitted.text
+            await asyncio.sleep(0.2)
+            disconnect()
+            await asyncio.wait_for(task, 5)
+
+            # 连接数达到上限时返回503
+            monkeypatch.setattr(auditor_events, "max_subscribers", 0)
+            full = await client.get("/api/v1/workflow/events", params={"ticket": ticket})
+        return unauthorized, response, full
+
+    unauthorized, response, full = asyncio.run(run())
+
+    assert unauthorized.status_code == 401
+    assert full.status_code == 503
+    assert response["status"] == 200
+    assert response["headers"][b"content-type"].startswith(b"text/event-stream")
+    body = "".join(response["body"])
+    assert body.startswith("retry: 3000\n\n")
+    assert ": keepalive\n\n" in body
+    events = read_events(body)
+    assert events[0] == ("task_completed", {"customer_id": customer_id, "audit_level": "junior", "audit_status": "approved",
+                                            "workflow_status": "completed"})
+    # 审核结果和客户状态分两次提交，计数变化分别推送
+    assert ("counters_changed", {"pending_count": -1, "approved_count": 1}) in events
+    assert ("counters_changed", {"total_investment": 200000.0}) in events
+    assert auditor_events.count == 0
+
+
+def test_stream_ticket_is_single_purpose(auditor_id):
+    app = FastAPI()
+    app.include_router(workflow_router)
+    token = create_access_token({"sub": "junior1"})
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            issued = await client.post("/api/v1/workflow/events/ticket", headers={"Authorization": f"Bearer {token}"})
+            ticket = issued.json()["data"]["ticket"]
+            return issued, [
+                # 票据不能作为访问令牌调用其他接口，访问令牌也不能放在查询参数中
+                await client.get("/api/v1/workflow/workflow", headers={"Authorization": f"Bearer {ticket}"}),
+                await client.post("/api/v1/workflow/events/ticket", headers={"Authorization": f"Bearer {ticket}"}),
+                await client.get("/api/v1/workflow/events", params={"ticket": token}),
+                await client.get("/api/v1/workflow/events", params={"token": token}),
+                await client.post("/api/v1/workflow/events/ticket")
+            ]
+
+    issued, rejected = asyncio.run(run())
+
+    assert issued.status_code == 200
+    assert issued.json()["data"]["expires_in"] == settings.auditor_events_ticket_seconds
+    assert [response.status_code for response in rejected] == [401, 401, 401, 401, 403]
+
+    claims = decode_token(issued.json()["data"]["ticket"], STREAM_TICKET_PURPOSE)
+    session_exp = decode_token(token)["exp"]
+    assert claims["session_exp"] == session_exp
+    assert claims["exp"] <= time.time() + settings.auditor_events_ticket_seconds
+    # 访问令牌即将过期时，票据不超过访问令牌的有效期
+    assert decode_token(create_stream_ticket("junior1", int(time.time()) + 5), STREAM_TICKET_PURPOSE)["exp"] \
+        <= time.time() + 5
+
+
+def test_stream_closes_when_token_expires(auditor_id, monkeypatch):
+    monkeypatch.setattr(settings, "auditor_events_keepalive_seconds", 30)
+    app = FastAPI()
+    app.include_router(workflow_router)
+    ticket = create_stream_ticket("junior1", int(time.time()) + 2)
+
+    async def run():
+        response, disconnect, task = await open_stream(app, f"ticket={ticket}")
+        assert auditor_events.count == 1
+        try:
+            # 没有事件也不等保活间隔，访问令牌过期时结束响应
+            await asyncio.wait_for(task, 5)
+        finally:
+            disconnect()
+        return response
+
+    response = asyncio.run(run())
+
+    assert response["status"] == 200
+    assert "".join(response["body"]).startswith("retry: 3000\n\n")
+    assert auditor_events.count == 0
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+审核员分配调度测试：选择未完成任务最少的审核员，任务数相同时轮询，
+事务回滚（或未提交就关闭会话）时撤销分配和释放对任务数的调整，过期后从数据库重建
+"""
+
+import asyncio
+
+import pytest
+
+from app.database import SessionLocal, database, engine
+from app.models import Base
+from app.models.auditor import Auditor, AuditorRole, AuditorStatus
+from app.models.customer import Customer, CustomerStatus, RiskLevel
+from app.models.workflow import AuditWorkflow, AuditLevel, WorkflowStatus
+from app.services.auditor_scheduler import AuditorScheduler
+
+
+def add_auditor(username: str, open_tasks: int = 0, role: AuditorRole = AuditorRole.junior) -> int:
+    """创建审核员和指定数量的未完成任务"""
+    db = SessionLocal()
+    try:
+        auditor = Auditor(username=username, password_hash="-", name=username, role=role,
+                          status=AuditorStatus.active)
+        db.add(auditor)
+        db.flush()
+        for _ in range(open_tasks):
+            number = db.query(Customer).count()
+            customer = Customer(name=f"客户{number}", phone=f"139{number:08d}", id_card=f"110101{number:012d}",
+                                investment_amount=100000, risk_level=RiskLevel.conservative,
+                                status=CustomerStatus.pending)
+            db.add(customer)
+            db.flush()
+            db.add(AuditWorkflow(customer_id=customer.id, current_level=AuditLevel.junior,
+                                 workflow_status=WorkflowStatus.pending, assigned_auditor_id=auditor.id))
+        db.commit()
+        return auditor.id
+    finally:
+        db.close()
+
+
+@pytest.fixture()
+def auditors() -> list:
+    """三个初级审核员，分别有2、1、0个未完成任务"""
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    return [add_auditor("junior1", 2), add_auditor("junior2", 1), add_auditor("junior3")]
+
+
+def test_least_loaded_with_round_robin_ties(auditors):
+    first, second, third = auditors
+    scheduler = AuditorScheduler(refresh_seconds=60)
+
+    async def run():
+        async with database.async_session_factory() as db:
+            assigned = [await scheduler.assign(db, AuditLevel.junior) for _ in range(7)]
+            await db.commit()
+        return assigned
+
+    # 任务数 2/1/0：先分给最空闲的；持平时分给最久未被分配的
+    assert asyncio.run(run()) == [third, second, third, first, second, third, first]
+    assert scheduler.snapshot()["junior"] == {first: 4, second: 3, third: 3}
+    assert scheduler.snapshot()["senior"] == {}
+
+
+def test_rollback_reverts_load(auditors):
+    first, second, third = auditors
+    scheduler = AuditorScheduler(refresh_seconds=60)
+
+    async def run():
+        async with database.async_session_factory() as db:
+            await scheduler.assign(db, AuditLevel.junior)
+            await db.commit()
+        committed = scheduler.snapshot()["junior"]
+
+        async with database.async_session_factory() as db:
+            assert await scheduler.assign(db, AuditLevel.junior) == second
+            scheduler.release(db, first)
+            assert scheduler.snapshot()["junior"] == {first: 1, second: 2, third: 1}
+            await db.rollback()
+        rolled_back = scheduler.snapshot()["junior"]
+
+        # 未提交就关闭会话同样撤销
+        async with database.async_session_factory() as db:
+            await scheduler.assign(db, AuditLevel.junior)
+        closed = scheduler.snapshot()["junior"]
+
+        # 提交的释放保留
+        async with database.async_session_factory() as db:
+            scheduler.release(db, first)
+            await db.commit()
+        return committed, rolled_back, closed, scheduler.snapshot()["junior"]
+
+    committed, rolled_back, closed, released = asyncio.run(run())
+
+    assert committed == {first: 2, second: 1, third: 1}
+    assert rolled_back == closed == committed
+    assert released == {first: 1, second: 1, third: 1}
+
+
+def test_rollback_reverts_only_applied_change(auditors):
+    first, second, third = auditors
+    scheduler = AuditorScheduler(refresh_seconds=60)
+
+    async def run():
+        async with database.async_session_factory() as db:
+            await scheduler.rebuild(db)
+
+        # 任务数已为0，释放没有生效，回滚时也不应加回
+        async with database.async_session_factory() as db:
+            scheduler.release(db, third)
+            scheduler.release(db, third)
+            await db.rollback()
+        clamped = scheduler.snapshot()["junior"]
+
+        # 事务期间从数据库重建过，重建后的计数不包含未提交的调整，回滚时不再撤销
+        async with database.async_session_factory() as db:
+            scheduler.release(db, first)
+            async with database.async_session_factory() as other:
+                await scheduler.rebuild(other)
+            await db.rollback()
+        return clamped, scheduler.snapshot()["junior"]
+
+    clamped, rebuilt = asyncio.run(run())
+
+    assert clamped == {first: 2, second: 1, third: 0}
+    assert rebuilt == {first: 2, second: 1, third: 0}
+
+
+def test_rebuilds_from_database(auditors):
+    first, second, third = auditors
+    cached = AuditorScheduler(refresh_seconds=60)
+    expiring = AuditorScheduler(refresh_seconds=0)
+
+    async def assign(scheduler):
+        async with database.async_session_factory() as db:
+            auditor_id = await scheduler.assign(db, AuditLevel.junior)
+            await db.rollback()
+            return auditor_id
+
+    assert asyncio.run(assign(cached)) == asyncio.run(assign(expiring)) == third
+    fourth = add_auditor("junior4")
+    senior = add_auditor("senior1", role=AuditorRole.senior)
+    fifth = add_auditor("junior5", 1)
+
+    # 未过期时使用内存中的审核员池；过期或失效后从数据库重建
+    assert fourth not in cached.snapshot()["junior"]
+    assert asyncio.run(assign(cached)) == third
+    assert asyncio.run(assign(expiring)) == fourth
+    cached.invalidate()
+    assert asyncio.run(assign(cached)) == fourth
+    assert set(cached.snapshot()["junior"]) == {first, second, third, fourth, fifth}
+    assert cached.snapshot()["senior"] == {senior: 0}
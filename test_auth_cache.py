@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+认证身份缓存测试：预热后认证不再访问数据库，审核员变更后缓存失效
+"""
+
+import asyncio
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import event
+
+from app.api import auditors_router
+from app.database import SessionLocal, engine, async_engine
+from app.models import Base
+from app.models.auditor import Auditor, AuditorRole, AuditorStatus
+from app.utils.auth import create_access_token, invalidate_auditor_cache, principal_cache
+
+
+def setup_auditor():
+    """重建表结构并创建一个审核员"""
+    invalidate_auditor_cache()
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        db.add(Auditor(
+            username="senior1",
+            password_hash="-",
+            name="中级审核员1",
+            role=AuditorRole.senior,
+            department="风险审核部",
+            status=AuditorStatus.active
+        ))
+        db.commit()
+    finally:
+        db.close()
+
+
+def fetch_me():
+    """请求 /me，返回响应数据和查询 auditors 表的次数"""
+    app = FastAPI()
+    app.include_router(auditors_router)
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'senior1'})}"}
+    auditor_queries = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if "FROM auditors" in statement:
+            auditor_queries.append(statement)
+
+    async def request():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get("/api/v1/auditors/me", headers=headers)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+    try:
+        response = asyncio.run(request())
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+
+    assert response.status_code == 200
+    return response.json(), len(auditor_queries)
+
+
+def test_warm_requests_skip_database():
+    setup_auditor()
+    misses = principal_cache.misses
+    hits = principal_cache.hits
+
+    data, cold_queries = fetch_me()
+    assert data["username"] == "senior1"
+    assert data["role"] == "senior"
+    assert cold_queries == 1
+
+    for _ in range(3):
+        _, warm_queries = fetch_me()
+        assert warm_queries == 0
+
+    assert principal_cache.misses == misses + 1
+    assert principal_cache.hits == hits + 3
+
+
+def test_auditor_update_invalidates_cache():
+    setup_auditor()
+    fetch_me()
+
+    db = SessionLocal()
+    try:
+        auditor = db.query(Auditor).filter(Auditor.username == "senior1").first()
+        auditor.department = "投资委员会"
+        db.commit()
+    finally:
+        db.close()
+
+    data, queries = fetch_me()
+    assert queries == 1
+    assert data["department"] == "投资委员会"
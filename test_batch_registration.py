@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+批量注册测试：逐行返回结果（格式错误、已存在、批次内重复不影响其他行），
+评分与单个注册一致，整批的SQL语句数不随行数增长，一次提交
+"""
+
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import event, func, select
+
+from app.api import customers_router
+from app.database import SessionLocal, async_engine, engine
+from app.models import Base
+from app.models.customer import Customer
+from app.models.workflow import AuditWorkflow, InvestmentAdvice, RiskAssessment
+from app.utils.registration_filter import registration_filter
+
+ANSWERS = [
+    {"age": "60岁以上", "income": "10万以下", "experience": "无经验",
+     "risk_tolerance": "5%以内", "goal": "资产保值", "period": "1年以内"},
+    {"age": "18-30岁", "income": "50万以上", "experience": "5年以上",
+     "risk_tolerance": "30%以上", "goal": "追求高收益", "period": "5年以上"}
+]
+
+
+def payload(i: int, **overrides) -> dict:
+    body = {
+        "name": f"客户{i}",
+        "phone": f"139{i:08d}",
+        "id_card": f"110101{i:012d}",
+        "investment_amount": 100000 + i,
+        "assessment_data": ANSWERS[i % 2]
+    }
+    body.update(overrides)
+    return body
+
+
+@pytest.fixture(autouse=True)
+def empty_database():
+    """重建表结构，过滤器未加载（每行都参与查重查询）"""
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    registration_filter.loaded = False
+    registration_filter.phones = registration_filter.id_cards = None
+
+
+def post(requests: list):
+    """依次发送 (路径, 请求体)，返回响应和每个请求执行的SQL语句数、提交次数"""
+    app = FastAPI()
+    app.include_router(customers_router)
+    counts = []
+
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        counts[-1]["statements"] += 1
+
+    def count_commit(conn):
+        counts[-1]["commits"] += 1
+
+    async def send():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            responses = []
+            for path, body in requests:
+                counts.append({"statements": 0, "commits": 0})
+                responses.append(await client.post(path, json=body))
+            return responses
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", count_statement)
+    event.listen(async_engine.sync_engine, "commit", count_commit)
+    try:
+        responses = asyncio.run(send())
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", count_statement)
+        event.remove(async_engine.sync_engine, "commit", count_commit)
+    return responses, counts
+
+
+def table_counts() -> dict:
+    db = SessionLocal()
+    try:
+        return {
+            model.__tablename__: db.scalar(select(func.count()).select_from(model))
+            for model in (Customer, RiskAssessment, InvestmentAdvice, AuditWorkflow)
+        }
+    finally:
+        db.close()
+
+
+def test_batch_reports_each_row():
+    (single, batch), _ = post([
+        ("/api/v1/customers/register", payload(0)),
+        ("/api/v1/customers/register/batch", {"customers": [
+            payload(1),
+            payload(2, phone="13900000000"),                 # 手机号已注册
+            {"name": "缺少字段"},                             # 格式错误
+            payload(3),
+            payload(4, id_card="110101000000000003"),        # 与本批第3项身份证号重复
+            payload(5)
+        ]})
+    ])
+
+    assert single.status_code == 200
+    assert batch.status_code == 200
+    data = batch.json()["data"]
+    assert (data["total"], data["success_count"], data["failed_count"]) == (6, 3, 3)
+    results = data["results"]
+    assert [result["index"] for result in results] == list(range(6))
+    assert [result["success"] for result in results] == [True, False, False, True, False, True]
+    assert results[1]["error"] == "手机号已存在"
+    assert results[4]["error"] == "身份证号已存在"
+    assert "name" not in results[2]["error"] and "phone" in results[2]["error"]
+    assert all(result["workflow_id"].startswith("WF") for result in results if result["success"])
+    assert table_counts() == {"customers": 4, "risk_assessments": 4, "investment_advice": 4, "audit_workflow": 4}
+
+
+def test_batch_scores_match_single_registration():
+    rows = [payload(i) for i in range(4)]
+    responses, _ = post(
+        [("/api/v1/customers/register", row) for row in rows[:2]]
+        + [("/api/v1/customers/register/batch", {"customers": [payload(i, phone=f"138{i:08d}", id_card=f"220101{i:012d}")
+                                                                for i in range(2)]})]
+    )
+
+    singles = [response.json()["data"] for response in responses[:2]]
+    batched = responses[2].json()["data"]["results"]
+    for single, result in zip(singles, batched):
+        assert (result["risk_score"], result["risk_level"]) == (single["risk_score"], single["risk_level"])
+
+
+def test_batch_statement_count_is_constant():
+    _, counts = post([
+        ("/api/v1/customers/register/batch", {"customers": [payload(i) for i in range(5)]}),
+        ("/api/v1/customers/register/batch", {"customers": [payload(i) for i in range(100, 300)]})
+    ])
+
+    small, large = counts
+    assert small["statements"] == large["statements"]
+    assert small["commits"] == large["commits"] == 1
+    assert table_counts()["customers"] == 205
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+客户列表测试：游标分页不重复不遗漏，筛选条件生效，查询走索引而不是排序整表
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import text
+
+from app.api import customers_router
+from app.database import SessionLocal, engine
+from app.models import Base
+from app.models.customer import Customer, CustomerStatus, RiskLevel
+from app.services.customer_listing import CustomerListingService
+
+STATUSES = [CustomerStatus.pending, CustomerStatus.approved, CustomerStatus.rejected]
+LEVELS = [RiskLevel.conservative, RiskLevel.moderate, RiskLevel.aggressive]
+BASE_TIME = datetime(2026, 1, 1, 9, 0, 0)
+
+
+@pytest.fixture(scope="module", autouse=True)
+def customers():
+    """
+    重建表结构并写入客户：前20个使用服务端默认时间（同一秒内大量相同时间），
+    其余使用带微秒的显式时间
+    """
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        for i in range(50):
+            customer = Customer(
+                name=f"客户{i}",
+                phone=f"139{i:08d}",
+                id_card=f"110101{i:012d}",
+                investment_amount=10000 * (i + 1),
+                risk_level=LEVELS[i % 3],
+                status=STATUSES[i % 3]
+            )
+            if i >= 20:
+                customer.created_at = BASE_TIME + timedelta(hours=i, microseconds=i)
+            db.add(customer)
+        db.commit()
+    finally:
+        db.close()
+
+
+def fetch_pages(params=None, limit=7):
+    """按游标翻完所有页，返回每页的客户ID"""
+    app = FastAPI()
+    app.include_router(customers_router)
+
+    async def run():
+        pages = []
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            cursor = None
+            while True:
+                query = dict(params or {}, limit=limit)
+                if cursor:
+                    query["cursor"] = cursor
+                response = await client.get("/api/v1/customers", params=query)
+                assert response.status_code == 200, response.text
+                data = response.json()["data"]
+                pages.append([item["id"] for item in data["items"]])
+                cursor = data["next_cursor"]
+                if cursor is None:
+                    return pages
+
+    return asyncio.run(run())
+
+
+def expected_ids(predicate=lambda customer: True):
+    db = SessionLocal()
+    try:
+        customers = [customer for customer in db.query(Customer).all() if predicate(customer)]
+        customers.sort(key=lambda customer: (customer.created_at, customer.id), reverse=True)
+        return [customer.id for customer in customers]
+    finally:
+        db.close()
+
+
+def test_pages_cover_all_customers_in_order_without_duplicates():
+    pages = fetch_pages()
+    assert all(len(page) == 7 for page in pages[:-1])
+    assert [customer_id for page in pages for customer_id in page] == expected_ids()
+
+
+def test_filters():
+    params = {"status": "approved", "risk_level": "moderate", "min_amount": 50000, "max_amount": 400000}
+    ids = [customer_id for page in fetch_pages(params, limit=2) for customer_id in page]
+    assert ids == expected_ids(lambda c: c.status == CustomerStatus.approved
+                               and c.risk_level == RiskLevel.moderate
+                               and 50000 <= c.investment_amount <= 400000)
+    assert ids
+
+    window = {"created_from": "2026-01-02T05:00:00", "created_to": "2026-01-02T14:00:00"}
+    ids = [customer_id for page in fetch_pages(window, limit=3) for customer_id in page]
+    assert ids == expected_ids(lambda c: datetime(2026, 1, 2, 5) <= c.created_at < datetime(2026, 1, 2, 14))
+    assert len(ids) == 9
+
+
+def test_invalid_cursor_is_rejected():
+    app = FastAPI()
+    app.include_router(customers_router)
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get("/api/v1/customers", params={"cursor": "not-a-cursor"})
+
+    response = asyncio.run(run())
+    assert response.status_code == 400
+    assert response.json()["detail"] == "无效的分页游标"
+
+
+@pytest.mark.parametrize("filters", [{}, {"status": CustomerStatus.pending}, {"risk_level": RiskLevel.aggressive}])
+def test_deep_page_uses_index_instead_of_sorting(filters):
+    cursor = CustomerListingService.encode_cursor("2026-01-02 00:00:00", 40)
+    statement = CustomerListingService.list_statement(cursor=cursor, **filters)
+    sql = str(statement.compile(engine, compile_kwargs={"literal_binds": True}))
+    with engine.connect() as conn:
+        plan = " ".join(str(row[-1]) for row in conn.execute(text("EXPLAIN QUERY PLAN " + sql)))
+    assert "USING INDEX ix_customers_" in plan or "USING COVERING INDEX ix_customers_" in plan
+    assert "TEMP B-TREE" not in plan
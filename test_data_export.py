@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+数据导出测试：NDJSON/CSV/gzip 输出完整且与数据库一致，未登录和未知表被拒绝
+"""
+
+import asyncio
+import csv
+import gzip
+import io
+import json
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.api import exports_router
+from app.config import settings
+from app.database import SessionLocal, engine
+from app.models import Base
+from app.models.auditor import Auditor, AuditorRole, AuditorStatus
+from app.models.customer import Customer, CustomerStatus, RiskLevel
+from app.models.workflow import AuditRecord, AuditLevel, AuditStatus
+from app.services.data_export import DataExportService
+from app.utils.auth import create_access_token, invalidate_auditor_cache
+
+CUSTOMERS = 23
+
+
+@pytest.fixture(scope="module", autouse=True)
+def seed():
+    """重建表结构，写入审核员（投资委员会和初级各一名）、客户和审核记录"""
+    invalidate_auditor_cache()
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        auditor = Auditor(
+            username="committee1",
+            password_hash="-",
+            name="投资委员会1",
+            role=AuditorRole.committee,
+            status=AuditorStatus.active
+        )
+        db.add(auditor)
+        db.add(Auditor(
+            username="junior1",
+            password_hash="-",
+            name="初级审核员1",
+            role=AuditorRole.junior,
+            status=AuditorStatus.active
+        ))
+        db.flush()
+        for i in range(CUSTOMERS):
+            customer = Customer(
+                name=f"客户{i},\"引号\"",
+                phone=f"139{i:08d}",
+                id_card=f"110101{i:012d}",
+                investment_amount=10000.5 + i,
+                risk_level=RiskLevel.moderate,
+                status=CustomerStatus.approved
+            )
+            db.add(customer)
+            db.flush()
+            db.add(AuditRecord(
+                customer_id=customer.id,
+                auditor_id=auditor.id,
+                audit_level=AuditLevel.junior,
+                audit_status=AuditStatus.approved,
+                audit_opinion="同意\n换行"
+            ))
+        db.commit()
+    finally:
+        db.close()
+
+
+def export(path, authorized=True, username="committee1"):
+    app = FastAPI()
+    app.include_router(exports_router)
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': username})}"} if authorized else {}
+
+    async def request():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get(path, headers=headers)
+
+    return asyncio.run(request())
+
+
+def test_ndjson_export():
+    response = export("/api/v1/exports/customers")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert 'filename="customers.ndjson"' in response.headers["content-disposition"]
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert len(rows) == CUSTOMERS
+    assert [row["id"] for row in rows] == list(range(1, CUSTOMERS + 1))
+    assert rows[0]["name"] == "客户0,\"引号\""
+    assert rows[0]["investment_amount"] == "10000.50"
+    assert rows[0]["risk_level"] == "moderate"
+    assert rows[0]["status"] == "approved"
+    assert rows[0]["created_at"]
+
+
+def test_small_batches_produce_same_output():
+    async def collect(batch_size):
+        return b"".join([chunk async for chunk in DataExportService.iter_export("customers", "csv", batch_size=batch_size)])
+
+    assert asyncio.run(collect(5)) == asyncio.run(collect(1000))
+
+
+def test_gzip_csv_export():
+    response = export("/api/v1/exports/audit_records?format=csv&gzip=true")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/gzip"
+    assert 'filename="audit_records.csv.gz"' in response.headers["content-disposition"]
+    reader = csv.DictReader(io.StringIO(gzip.decompress(response.content).decode("utf-8")))
+    rows = list(reader)
+    assert len(rows) == CUSTOMERS
+    assert rows[0]["audit_status"] == "approved"
+    assert rows[0]["audit_level"] == "junior"
+    assert rows[0]["audit_opinion"] == "同意\n换行"
+
+
+def test_export_requires_login_and_known_table():
+    assert export("/api/v1/exports/customers", authorized=False).status_code == 403
+    assert export("/api/v1/exports/auditors").status_code == 404
+    assert export("/api/v1/exports/customers?format=xml").status_code == 422
+
+
+def test_export_requires_elevated_role(monkeypatch):
+    response = export("/api/v1/exports/customers", username="junior1")
+    assert response.status_code == 403
+    assert response.json()["detail"] == "没有数据导出权限"
+
+    monkeypatch.setattr(settings, "export_allowed_roles", "junior, committee")
+    assert export("/api/v1/exports/customers", username="junior1").status_code == 200
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+连接池配置测试：SQLite文件数据库使用不溢出的连接池（异步引擎也复用连接）并在每个连接上执行PRAGMA，
+内存数据库不设置连接池参数，MySQL使用 db_pool_* 配置
+"""
+
+import asyncio
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.config import Settings
+from app.database import apply_sqlite_pragmas, engine_options, get_async_database_url, sqlite_pragmas
+
+SETTINGS = Settings(sqlite_pool_size=3, db_pool_size=7, db_max_overflow=11, db_pool_timeout=9,
+                    db_pool_recycle=1800, db_pool_pre_ping=True, sql_echo=False)
+
+
+def test_sqlite_file_uses_bounded_pool():
+    url = "sqlite:///./finance_athena.db"
+
+    sync_options = engine_options(url, app_settings=SETTINGS)
+    assert sync_options == {
+        "echo": False,
+        "pool_timeout": 9,
+        "connect_args": {"check_same_thread": False},
+        "pool_size": 3,
+        "max_overflow": 0
+    }
+    # 异步驱动默认不复用连接，显式使用队列连接池
+    assert engine_options(url, is_async=True, app_settings=SETTINGS) == {
+        **sync_options, "poolclass": AsyncAdaptedQueuePool
+    }
+
+
+def test_sqlite_memory_has_no_pool_options():
+    for url in ("sqlite://", "sqlite:///:memory:"):
+        for is_async in (False, True):
+            assert engine_options(url, is_async=is_async, app_settings=SETTINGS) == {
+                "echo": False,
+                "connect_args": {"check_same_thread": False}
+            }
+    # 选项可以直接用于创建内存数据库引擎
+    create_engine("sqlite://", **engine_options("sqlite://", app_settings=SETTINGS)).dispose()
+
+
+def test_mysql_uses_server_pool_settings():
+    assert engine_options("mysql+pymysql://user:pass@db/finance", app_settings=SETTINGS) == {
+        "echo": False,
+        "pool_timeout": 9,
+        "pool_size": 7,
+        "max_overflow": 11,
+        "pool_recycle": 1800,
+        "pool_pre_ping": True
+    }
+
+
+def test_async_sqlite_engine_reuses_connections_with_pragmas(tmp_path):
+    url = f"sqlite:///{tmp_path / 'pool.db'}"
+    engine = create_async_engine(get_async_database_url(url), **engine_options(url, is_async=True, app_settings=SETTINGS))
+    apply_sqlite_pragmas(engine.sync_engine, sqlite_pragmas(SETTINGS))
+    connects = []
+    event.listen(engine.sync_engine, "connect", lambda dbapi_connection, record: connects.append(record))
+
+    async def run():
+        try:
+            values = []
+            for _ in range(3):
+                async with engine.connect() as conn:
+                    values.append((
+                        await conn.scalar(text("PRAGMA journal_mode")),
+                        await conn.scalar(text("PRAGMA busy_timeout")),
+                        await conn.scalar(text("PRAGMA synchronous"))
+                    ))
+            return values
+        finally:
+            await engine.dispose()
+
+    values = asyncio.run(run())
+
+    assert len(connects) == 1
+    assert values == [("wal", SETTINGS.sqlite_busy_timeout_ms, 1)] * 3
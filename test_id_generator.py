@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+雪花ID测试：多线程、多进程高速生成不重复且按时间递增，时钟回拨和序列号用完时仍然唯一，
+注册时申请编号和流程编号写入数据库并返回
+"""
+
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import select
+
+from app.api import customers_router
+from app.database import SessionLocal, engine
+from app.config import Settings
+from app.id_generator import EPOCH_MS, MAX_SEQUENCE, SnowflakeIdGenerator, default_worker_id, id_generator, parse_id
+from app.main import create_app
+from app.models import Base
+from app.models.customer import Customer
+from app.models.workflow import AuditWorkflow
+
+THREADS = 8
+IDS_PER_THREAD = 25000
+
+
+def generate_in_worker(worker_id: int) -> list:
+    generator = SnowflakeIdGenerator(worker_id=worker_id)
+    return generator.next_ids(20000) + [generator.next_id() for _ in range(20000)]
+
+
+def test_threads_generate_unique_increasing_ids():
+    generator = SnowflakeIdGenerator(worker_id=7)
+    results = [[] for _ in range(THREADS)]
+
+    def generate(index: int):
+        results[index] = [generator.next_id() for _ in range(IDS_PER_THREAD)]
+
+    threads = [threading.Thread(target=generate, args=(index,)) for index in range(THREADS)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    ids = [snowflake_id for result in results for snowflake_id in result]
+    assert len(set(ids)) == THREADS * IDS_PER_THREAD
+    # 每个线程拿到的ID按生成顺序递增
+    for result in results:
+        assert result == sorted(result)
+    # 远高于每秒数万个
+    assert len(ids) / elapsed > 50000
+
+    timestamp, worker_id, _ = parse_id(max(ids))
+    assert worker_id == 7
+    assert abs(timestamp - time.time() * 1000) < 60000
+
+
+def test_processes_with_different_workers_do_not_collide():
+    with multiprocessing.get_context("fork").Pool(4) as pool:
+        results = pool.map(generate_in_worker, [1, 2, 3, 4])
+
+    ids = [snowflake_id for result in results for snowflake_id in result]
+    assert len(set(ids)) == len(ids) == 4 * 40000
+    assert [parse_id(result[0])[1] for result in results] == [1, 2, 3, 4]
+
+
+def test_forked_child_uses_its_own_worker_id():
+    if not hasattr(os, "fork"):
+        return
+    generator = SnowflakeIdGenerator()
+    assert not generator.configured
+    assert generator.worker_id == default_worker_id()
+
+    read_end, write_end = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.write(write_end, f"{generator.worker_id} {default_worker_id()}".encode())
+        os._exit(0)
+    os.waitpid(pid, 0)
+    child_worker_id, expected = os.read(read_end, 32).split()
+    assert child_worker_id == expected
+
+
+def test_worker_id_required_in_production():
+    async def start(app):
+        async with app.router.lifespan_context(app):
+            pass
+
+    with pytest.raises(RuntimeError, match="WORKER_ID"):
+        asyncio.run(start(create_app(Settings(worker_id=None, debug=False))))
+    assert id_generator.configured and id_generator.worker_id == 1
+
+    generator = SnowflakeIdGenerator()
+    generator.configure(5)
+    assert generator.configured and parse_id(generator.next_id())[1] == 5
+    with pytest.raises(ValueError):
+        generator.configure(1024)
+
+
+def test_clock_going_backwards_and_sequence_overflow():
+    now = [EPOCH_MS + 1000]
+    generator = SnowflakeIdGenerator(worker_id=1, clock=lambda: now[0])
+
+    # 同一毫秒内超过4096个：借用下一毫秒，不重复
+    ids = generator.next_ids(MAX_SEQUENCE * 3)
+    assert len(set(ids)) == len(ids)
+    assert ids == sorted(ids)
+    assert parse_id(ids[-1])[0] == EPOCH_MS + 1000 + 2
+
+    # 时钟回拨：继续在最后的时间戳上递增
+    now[0] -= 500
+    later = generator.next_ids(100)
+    assert later[0] > ids[-1]
+    assert later == sorted(later)
+
+
+def test_registration_persists_ids():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    app = FastAPI()
+    app.include_router(customers_router)
+    answers = {"age": "60岁以上", "income": "10万以下", "experience": "无经验",
+               "risk_tolerance": "5%以内", "goal": "资产保值", "period": "1年以内"}
+
+    def payload(i: int) -> dict:
+        return {"name": f"客户{i}", "phone": f"139{i:08d}", "id_card": f"110101{i:012d}",
+                "investment_amount": 100000, "assessment_data": answers}
+
+    async def register():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            single = await client.post("/api/v1/customers/register", json=payload(0))
+            batch = await client.post("/api/v1/customers/register/batch",
+                                      json={"customers": [payload(i) for i in range(1, 21)]})
+            return [single.json()["data"]] + batch.json()["data"]["results"]
+
+    results = asyncio.run(register())
+
+    db = SessionLocal()
+    try:
+        stored = {
+            customer_id: (application_no, workflow_no)
+            for customer_id, application_no, workflow_no in db.execute(
+                select(Customer.id, Customer.application_no, AuditWorkflow.workflow_no)
+                .join(AuditWorkflow, AuditWorkflow.customer_id == Customer.id)
+            )
+        }
+    finally:
+        db.close()
+
+    assert len(results) == len(stored) == 21
+    for result in results:
+        application_no, workflow_no = stored[result["customer_id"]]
+        assert result["application_id"] == f"RA-{application_no}"
+        assert result["workflow_id"] == f"WF{workflow_no}"
+    numbers = [number for pair in stored.values() for number in pair]
+    assert len(set(numbers)) == 42
+    assert parse_id(max(numbers))[1] == id_generator.worker_id
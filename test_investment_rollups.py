@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+月度投资汇总测试：提交审核（单个和批量）时在同一事务中累加当月汇总，工作台的投资总额只统计本月，
+重建命令从客户和审核记录得到与增量累加相同的结果，月度报表按月份和风险等级返回汇总
+"""
+
+import asyncio
+from datetime import datetime, timezone
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import func, select
+
+from app.api import workflow_router
+from app.database import SessionLocal, database
+from app.models import InvestmentRollup
+from app.models.customer import Customer, CustomerStatus, RiskLevel
+from app.models.workflow import AuditRecord, AuditWorkflow, AuditLevel, AuditStatus, Notification, WorkflowStatus
+from app.config import settings
+from app.services import investment_rollup
+from app.services.investment_rollup import InvestmentRollupService, current_month
+from app.utils.auth import create_access_token
+from conftest import seed_pending
+
+HISTORY_MONTH = "2024-05"
+
+
+def seed_levels(auditor_id: int, risk_levels: list) -> list:
+    """每个风险等级一个只需初级审核的待审核任务，投资金额依次为10万、20万……"""
+    return seed_pending(
+        auditor_id, len(risk_levels), risk_level=risk_levels,
+        investment_amount=[100000 * (i + 1) for i in range(len(risk_levels))]
+    )
+
+
+def seed_history(auditor_id: int):
+    """历史月份已完成审核的客户（汇总表上线前的数据，只有审核记录）"""
+    decided_at = datetime(2024, 5, 20, 10, 0)
+    db = SessionLocal()
+    try:
+        for i, (risk_level, status) in enumerate([
+            (RiskLevel.aggressive, CustomerStatus.approved),
+            (RiskLevel.aggressive, CustomerStatus.approved),
+            (RiskLevel.moderate, CustomerStatus.rejected)
+        ]):
+            customer = Customer(
+                name=f"历史客户{i}",
+                phone=f"138{i:08d}",
+                id_card=f"220101{i:012d}",
+                investment_amount=1000000,
+                risk_level=risk_level,
+                status=status
+            )
+            db.add(customer)
+            db.flush()
+            db.add(AuditRecord(
+                customer_id=customer.id,
+                auditor_id=auditor_id,
+                audit_level=AuditLevel.junior,
+                audit_status=AuditStatus.approved if status == CustomerStatus.approved else AuditStatus.rejected,
+                audit_date=decided_at
+            ))
+        db.commit()
+    finally:
+        db.close()
+
+
+def rollup_rows() -> dict:
+    db = SessionLocal()
+    try:
+        return {
+            (rollup.month, rollup.risk_level): (rollup.approved_count, float(rollup.approved_amount), rollup.rejected_count)
+            for rollup in db.scalars(select(InvestmentRollup))
+        }
+    finally:
+        db.close()
+
+
+def call(requests):
+    """依次发送 (方法, 路径, 参数) 请求，返回响应列表"""
+    app = FastAPI()
+    app.include_router(workflow_router)
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'junior1'})}"}
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return [await client.request(method, url, headers=headers, **kwargs) for method, url, kwargs in requests]
+
+    return asyncio.run(run())
+
+
+def test_audits_update_rollups_and_dashboard(auditor_id):
+    seed_history(auditor_id)
+    first, second, third, fourth = seed_levels(
+        auditor_id, [RiskLevel.conservative, RiskLevel.moderate, RiskLevel.moderate, RiskLevel.conservative]
+    )
+    responses = call([
+        ("POST", "/api/v1/workflow/audit", {"json": {"customer_id": first, "audit_status": "approved"}}),
+        ("POST", "/api/v1/workflow/audit", {"json": {"customer_id": second, "audit_status": "rejected"}}),
+        ("POST", "/api/v1/workflow/audit/batch", {"json": {"items": [
+            {"customer_id": third, "audit_status": "approved"},
+            {"customer_id": fourth, "audit_status": "approved"}
+        ]}}),
+        ("GET", "/api/v1/workflow/workflow", {})
+    ])
+    for response in responses:
+        assert response.status_code == 200, response.text
+
+    month = current_month()
+    assert rollup_rows() == {
+        (month, RiskLevel.conservative): (2, 500000.0, 0),
+        (month, RiskLevel.moderate): (1, 300000.0, 1)
+    }
+    # 投资总额只统计本月通过的客户，不包括汇总表上线前的历史数据
+    assert responses[-1].json()["data"]["total_investment"] == 800000.0
+
+
+def test_current_month_uses_app_timezone(monkeypatch):
+    class FrozenDatetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            # UTC 5月31日20点已是北京时间6月1日
+            return datetime(2024, 5, 31, 20, 0, tzinfo=timezone.utc).astimezone(tz)
+
+    monkeypatch.setattr(investment_rollup, "datetime", FrozenDatetime)
+    monkeypatch.setattr(settings, "timezone", "Asia/Shanghai")
+    assert current_month() == "2024-06"
+    monkeypatch.setattr(settings, "timezone", "UTC")
+    assert current_month() == "2024-05"
+
+
+def test_update_or_insert_without_upsert_syntax(auditor_id, monkeypatch):
+    """不支持 upsert 语法的数据库逐行先更新后插入，结果与 upsert 相同"""
+    monkeypatch.setattr(investment_rollup, "_UPSERT_DIALECTS", {})
+    first, second, third = seed_levels(auditor_id, [RiskLevel.conservative, RiskLevel.conservative, RiskLevel.moderate])
+    responses = call([
+        ("POST", "/api/v1/workflow/audit", {"json": {"customer_id": first, "audit_status": "approved"}}),
+        ("POST", "/api/v1/workflow/audit/batch", {"json": {"items": [
+            {"customer_id": second, "audit_status": "approved"},
+            {"customer_id": third, "audit_status": "rejected"}
+        ]}})
+    ])
+    for response in responses:
+        assert response.status_code == 200, response.text
+
+    month = current_month()
+    assert rollup_rows() == {
+        (month, RiskLevel.conservative): (2, 300000.0, 0),
+        (month, RiskLevel.moderate): (0, 0.0, 1)
+    }
+
+
+def test_failed_rollup_rolls_back_the_whole_audit(auditor_id, monkeypatch):
+    """累加汇总失败时流转、审核记录、客户状态和通知一起回滚，重试可以成功"""
+    customer_id, = seed_levels(auditor_id, [RiskLevel.conservative])
+
+    async def broken_record(db, decisions):
+        raise RuntimeError("rollup unavailable")
+
+    monkeypatch.setattr(InvestmentRollupService, "record", broken_record)
+    failed, = call([("POST", "/api/v1/workflow/audit", {"json": {"customer_id": customer_id, "audit_status": "approved"}})])
+    assert failed.status_code == 500
+
+    db = SessionLocal()
+    try:
+        assert db.scalar(select(AuditWorkflow.workflow_status)) == WorkflowStatus.pending
+        assert db.scalar(select(Customer.status)) == CustomerStatus.pending
+        assert db.scalar(select(func.count()).select_from(AuditRecord)) == 0
+        assert db.scalar(select(func.count()).select_from(Notification)) == 0
+    finally:
+        db.close()
+    assert rollup_rows() == {}
+
+    monkeypatch.undo()
+    retried, = call([("POST", "/api/v1/workflow/audit", {"json": {"customer_id": customer_id, "audit_status": "approved"}})])
+    assert retried.status_code == 200, retried.text
+    assert rollup_rows() == {(current_month(), RiskLevel.conservative): (1, 100000.0, 0)}
+
+
+def test_rebuild_matches_incremental_rollups(auditor_id):
+    customers = seed_levels(auditor_id, [RiskLevel.conservative, RiskLevel.moderate, RiskLevel.aggressive])
+    call([
+        ("POST", "/api/v1/workflow/audit/batch", {"json": {"items": [
+            {"customer_id": customers[0], "audit_status": "approved"},
+            {"customer_id": customers[1], "audit_status": "rejected"},
+            {"customer_id": customers[2], "audit_status": "approved"}
+        ]}})
+    ])
+    incremental = rollup_rows()
+    seed_history(auditor_id)
+
+    async def rebuild(month=None):
+        async with database.async_session_factory() as db:
+            rows = await InvestmentRollupService.rebuild(db, month)
+            await db.commit()
+            return rows
+
+    assert asyncio.run(rebuild()) == 5
+    rebuilt = rollup_rows()
+    assert {key: value for key, value in rebuilt.items() if key[0] != HISTORY_MONTH} == incremental
+    assert {key: value for key, value in rebuilt.items() if key[0] == HISTORY_MONTH} == {
+        (HISTORY_MONTH, RiskLevel.aggressive): (2, 2000000.0, 0),
+        (HISTORY_MONTH, RiskLevel.moderate): (0, 0.0, 1)
+    }
+
+    # 只重建一个月份时不影响其他月份
+    db = SessionLocal()
+    try:
+        db.query(InvestmentRollup).filter(InvestmentRollup.month == HISTORY_MONTH).update(
+            {"approved_count": 99}, synchronize_session=False
+        )
+        db.commit()
+    finally:
+        db.close()
+    assert asyncio.run(rebuild(HISTORY_MONTH)) == 2
+    assert rollup_rows() == rebuilt
+
+
+def test_rebuild_uses_app_timezone(auditor_id, monkeypatch):
+    """数据库时钟（UTC）5月31日20点审核通过的客户，在北京时间归入6月"""
+    monkeypatch.setattr(settings, "timezone", "Asia/Shanghai")
+    monkeypatch.setattr(settings, "database_timezone", "UTC")
+    db = SessionLocal()
+    try:
+        for i, decided_at in enumerate([datetime(2024, 5, 31, 15, 59), datetime(2024, 5, 31, 16, 0)]):
+            customer = Customer(
+                name=f"月末客户{i}",
+                phone=f"137{i:08d}",
+                id_card=f"330101{i:012d}",
+                investment_amount=100000 * (i + 1),
+                risk_level=RiskLevel.moderate,
+                status=CustomerStatus.approved
+            )
+            db.add(customer)
+            db.flush()
+            db.add(AuditRecord(
+                customer_id=customer.id,
+                auditor_id=auditor_id,
+                audit_level=AuditLevel.junior,
+                audit_status=AuditStatus.approved,
+                audit_date=decided_at
+            ))
+        db.commit()
+    finally:
+        db.close()
+
+    async def rebuild(month=None):
+        async with database.async_session_factory() as db:
+            rows = await InvestmentRollupService.rebuild(db, month)
+            await db.commit()
+            return rows
+
+    assert asyncio.run(rebuild()) == 2
+    expected = {
+        ("2024-05", RiskLevel.moderate): (1, 100000.0, 0),
+        ("2024-06", RiskLevel.moderate): (1, 200000.0, 0)
+    }
+    assert rollup_rows() == expected
+    # 只重建一个月份时按该月在数据库时钟下的起止时间筛选
+    assert asyncio.run(rebuild("2024-06")) == 1
+    assert rollup_rows() == expected
+
+
+def test_monthly_report(auditor_id):
+    seed_history(auditor_id)
+    customers = seed_levels(auditor_id, [RiskLevel.conservative])
+    call([("POST", "/api/v1/workflow/audit", {"json": {"customer_id": customers[0], "audit_status": "approved"}})])
+
+    async def rebuild_history():
+        async with database.async_session_factory() as db:
+            await InvestmentRollupService.rebuild(db, HISTORY_MONTH)
+            await db.commit()
+
+    asyncio.run(rebuild_history())
+    month = current_month()
+    everything, history_only, invalid = call([
+        ("GET", "/api/v1/workflow/investment/monthly", {}),
+        ("GET", "/api/v1/workflow/investment/monthly", {"params": {"start": HISTORY_MONTH, "end": HISTORY_MONTH}}),
+        ("GET", "/api/v1/workflow/investment/monthly", {"params": {"start": "2024/05"}})
+    ])
+
+    assert invalid.status_code == 422
+    months = everything.json()["data"]["months"]
+    assert [summary["month"] for summary in months] == [HISTORY_MONTH, month]
+    assert months[0] == {
+        "month": HISTORY_MONTH,
+        "approved_count": 2,
+        "approved_amount": 2000000.0,
+        "rejected_count": 1,
+        "by_risk_level": {
+            "aggressive": {"approved_count": 2, "approved_amount": 2000000.0, "rejected_count": 0},
+            "moderate": {"approved_count": 0, "approved_amount": 0.0, "rejected_count": 1}
+        }
+    }
+    assert months[1]["approved_amount"] == 100000.0
+    assert history_only.json()["data"]["months"] == months[:1]
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+登录过载测试：密码计算池排队达到上限时登录立即返回503和 Retry-After，
+池中的计算完成后登录恢复正常
+"""
+
+import asyncio
+import threading
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.api import auditors_router
+from app.database import SessionLocal, engine
+from app.models import Base
+from app.models.auditor import Auditor, AuditorRole, AuditorStatus
+from app.utils import auth, password
+from app.utils.auth import invalidate_auditor_cache
+from app.utils.password import PasswordHasher
+
+
+@pytest.fixture()
+def blocked_hasher(monkeypatch):
+    """只允许一个排队任务的密码计算池，密码校验阻塞到 release 被设置"""
+    invalidate_auditor_cache()
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        db.add(Auditor(username="junior1", password_hash="-", name="初级审核员1",
+                       role=AuditorRole.junior, status=AuditorStatus.active))
+        db.commit()
+    finally:
+        db.close()
+
+    release = threading.Event()
+    started = threading.Event()
+
+    def slow_verify(plain_password: str, hashed_password: str) -> bool:
+        started.set()
+        release.wait(5)
+        return True
+
+    hasher = PasswordHasher(max_workers=1, max_pending=1)
+    monkeypatch.setattr(password, "verify_password", slow_verify)
+    monkeypatch.setattr(auth, "password_hasher", hasher)
+    yield hasher, started, release
+    release.set()
+    hasher.shutdown()
+
+
+def test_login_sheds_load_when_hasher_is_full(blocked_hasher):
+    hasher, started, release = blocked_hasher
+    app = FastAPI()
+    app.include_router(auditors_router)
+    credentials = {"username": "junior1", "password": "password123"}
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            first = asyncio.create_task(client.post("/api/v1/auditors/login", json=credentials))
+            await asyncio.get_running_loop().run_in_executor(None, started.wait, 5)
+            assert hasher.pending == 1
+
+            rejected = await client.post("/api/v1/auditors/login", json=credentials)
+            release.set()
+            return await first, rejected, await client.post("/api/v1/auditors/login", json=credentials)
+
+    first, rejected, after = asyncio.run(run())
+
+    assert rejected.status_code == 503
+    assert rejected.headers["Retry-After"] == "1"
+    assert hasher.rejected == 1
+    assert first.status_code == after.status_code == 200
+    assert hasher.pending == 0
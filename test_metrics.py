@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+监控指标测试：按路由模板统计请求数和耗时，业务计数器和通知数量出现在 /metrics 输出中
+"""
+
+import asyncio
+
+import httpx
+from fastapi import FastAPI, Response
+from fastapi.responses import StreamingResponse
+
+from app.api import customers_router
+from app.database import AsyncSessionLocal, SessionLocal, engine
+from app.models import Base, Customer, Notification
+from app.models.customer import CustomerStatus, RiskLevel
+from app.models.workflow import NotificationStatus, NotificationType
+from app.utils.cache import LRUCache
+from app.utils.metrics import REGISTRY, PrometheusMiddleware, StatsCollector, render_metrics
+from prometheus_client import CONTENT_TYPE_LATEST
+
+
+def build_app():
+    app = FastAPI()
+    app.add_middleware(PrometheusMiddleware)
+    app.include_router(customers_router)
+
+    @app.get("/metrics")
+    async def metrics():
+        return Response(await render_metrics(AsyncSessionLocal), headers={"Content-Type": CONTENT_TYPE_LATEST})
+
+    @app.get("/boom")
+    async def boom():
+        raise RuntimeError("故障")
+
+    @app.get("/events")
+    async def events():
+        async def stream():
+            # 连接期间记录两个仪表的值，供测试断言
+            observed.append((sample("http_requests_in_progress", method="GET"),
+                             sample("http_streams_open", route="/events")))
+            yield "data: ping\n\n"
+
+        return StreamingResponse(stream(), media_type="text/event-stream")
+
+    return app
+
+
+observed = []
+
+
+def run(requests):
+    async def send():
+        transport = httpx.ASGITransport(app=build_app(), raise_app_exceptions=False)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return [await client.request(method, path, json=body) for method, path, body in requests]
+
+    return asyncio.run(send())
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+def setup_module():
+    """重建表结构，写入一个客户和两条待发送通知"""
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        customer = Customer(
+            name="张三",
+            phone="13900000001",
+            id_card="110101199001011234",
+            investment_amount=100000,
+            risk_level=RiskLevel.moderate,
+            status=CustomerStatus.approved
+        )
+        db.add(customer)
+        db.flush()
+        for status in (NotificationStatus.pending, NotificationStatus.pending, NotificationStatus.sent):
+            db.add(Notification(
+                customer_id=customer.id,
+                notification_type=NotificationType.sms,
+                title="审核结果",
+                content="审核通过",
+                status=status
+            ))
+        db.commit()
+    finally:
+        db.close()
+
+
+def test_requests_are_labelled_by_route_template():
+    route = "/api/v1/customers/{customer_id}/advice"
+    before_list = sample("http_requests_total", method="GET", route="/api/v1/customers", status="200")
+    before = sample("http_requests_total", method="GET", route=route, status="404")
+    before_count = sample("http_request_duration_seconds_count", method="GET", route=route)
+
+    responses = run([
+        ("GET", "/api/v1/customers", None),
+        ("GET", "/api/v1/customers", None),
+        ("GET", "/api/v1/customers/998/advice", None),
+        ("GET", "/api/v1/customers/999/advice", None),
+        ("GET", "/no/such/path/123", None)
+    ])
+
+    assert [response.status_code for response in responses] == [200, 200, 404, 404, 404]
+    assert sample("http_requests_total", method="GET", route="/api/v1/customers", status="200") == before_list + 2
+    assert sample("http_requests_total", method="GET", route=route, status="404") == before + 2
+    assert sample("http_request_duration_seconds_count", method="GET", route=route) == before_count + 2
+    # 未匹配的URL不产生新的标签值
+    assert sample("http_requests_total", method="GET", route="<unmatched>", status="404") >= 1
+    assert sample("http_requests_in_progress", method="GET") == 0
+
+
+def test_unhandled_exception_counts_as_error():
+    before = sample("http_request_exceptions_total", method="GET", route="/boom", exception="RuntimeError")
+
+    responses = run([("GET", "/boom", None)])
+
+    assert responses[0].status_code == 500
+    assert sample("http_request_exceptions_total", method="GET", route="/boom", exception="RuntimeError") == before + 1
+    assert sample("http_requests_total", method="GET", route="/boom", status="500") >= 1
+
+
+def test_registration_counter_and_metrics_endpoint():
+    before = sample("customer_registrations_total", risk_level="conservative")
+    payload = {
+        "name": "李四",
+        "phone": "13900000002",
+        "id_card": "110101199001011235",
+        "investment_amount": 50000,
+        "assessment_data": {
+            "age": "60岁以上",
+            "income": "10万以下",
+            "experience": "无经验",
+            "risk_tolerance": "5%以内",
+            "goal": "资产保值",
+            "period": "1年以内"
+        }
+    }
+
+    register, metrics = run([
+        ("POST", "/api/v1/customers/register/batch", {"customers": [payload]}),
+        ("GET", "/metrics", None)
+    ])
+
+    assert register.status_code == 200
+    assert register.json()["data"]["results"][0]["risk_level"] == "conservative"
+    assert sample("customer_registrations_total", risk_level="conservative") == before + 1
+    assert metrics.headers["content-type"] == CONTENT_TYPE_LATEST
+    assert 'notifications{status="pending"} 2.0' in metrics.text
+    assert 'notifications{status="sent"} 1.0' in metrics.text
+    assert "http_request_duration_seconds_bucket" in metrics.text
+    # /metrics 本身不计入请求指标
+    assert 'route="/metrics"' not in metrics.text
+
+
+def test_stats_collector_exports_auth_cache():
+    class Stats:
+        def __init__(self, values):
+            self.values = values
+
+        def stats(self):
+            return self.values
+
+    principals = LRUCache(max_size=10, ttl_seconds=60)
+    principals.set("junior1", "principal")
+    principals.get("junior1")
+    principals.get("junior1")
+    principals.get("senior1")
+    collector = StatsCollector(Stats({"hits": 0, "misses": 0, "errors": 0}), Stats({}), principals)
+
+    samples = {
+        (metric_sample.name, metric_sample.labels.get("result")): metric_sample.value
+        for family in collector.collect() for metric_sample in family.samples
+    }
+    assert samples[("auth_cache_requests_total", "hits")] == 2
+    assert samples[("auth_cache_requests_total", "misses")] == 1
+    assert samples[("auth_cache_size", None)] == 1
+
+
+def test_event_stream_recorded_in_stream_metrics():
+    in_progress_before = sample("http_requests_in_progress", method="GET")
+    streams_before = sample("http_stream_duration_seconds_count", route="/events")
+
+    response, = run([("GET", "/events", None)])
+    assert response.status_code == 200
+    # 响应开始后移出进行中请求数，计入打开中的流式连接
+    assert observed[-1] == (in_progress_before, 1)
+    assert sample("http_streams_open", route="/events") == 0
+    assert sample("http_stream_duration_seconds_count", route="/events") == streams_before + 1
+    assert sample("http_request_duration_seconds_count", method="GET", route="/events") == 0
+    assert sample("http_requests_total", method="GET", route="/events", status="200") == 1
+    assert sample("http_requests_in_progress", method="GET") == in_progress_before
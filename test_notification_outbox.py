@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+通知发件箱测试：后台调度器批量发送待发送通知，失败后退避重试，超过次数标记为失败
+"""
+
+import asyncio
+from datetime import datetime
+
+from sqlalchemy.dialects import mysql
+
+from app.database import SessionLocal, engine
+from app.models import Base, Customer, Notification
+from app.models.customer import CustomerStatus, RiskLevel
+from app.models.workflow import NotificationStatus, NotificationType
+from app.utils.notification_dispatcher import LocalSinkTransport, NotificationDispatcher
+
+
+class FlakyTransport(LocalSinkTransport):
+    """前 failures 次发送失败的通道"""
+
+    def __init__(self, failures: int):
+        super().__init__()
+        self.failures = failures
+
+    async def send(self, message):
+        if self.failures > 0:
+            self.failures -= 1
+            raise ConnectionError("短信网关超时")
+        await super().send(message)
+
+
+def seed_notifications(count: int):
+    """重建表结构并写入 count 条待发送通知"""
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        customer = Customer(
+            name="张三",
+            phone="13900000001",
+            email="zhangsan@example.com",
+            id_card="110101199001011234",
+            investment_amount=100000,
+            risk_level=RiskLevel.moderate,
+            status=CustomerStatus.approved
+        )
+        db.add(customer)
+        db.flush()
+        for i in range(count):
+            db.add(Notification(
+                customer_id=customer.id,
+                notification_type=NotificationType.sms,
+                title=f"通知{i}",
+                content="审核通过",
+                status=NotificationStatus.pending
+            ))
+        db.commit()
+    finally:
+        db.close()
+
+
+def load_notifications():
+    db = SessionLocal()
+    try:
+        return db.query(Notification).order_by(Notification.id).all()
+    finally:
+        db.close()
+
+
+def test_dispatch_sends_pending_in_batches():
+    seed_notifications(5)
+    transport = LocalSinkTransport()
+    dispatcher = NotificationDispatcher(transport, batch_size=2)
+
+    processed = [asyncio.run(dispatcher.dispatch_once()) for _ in range(4)]
+
+    assert processed == [2, 2, 1, 0]
+    assert [message["title"] for message in transport.messages] == [f"通知{i}" for i in range(5)]
+    assert transport.messages[0]["phone"] == "13900000001"
+    notifications = load_notifications()
+    assert all(n.status == NotificationStatus.sent and n.sent_at is not None for n in notifications)
+    assert all(n.attempts == 1 for n in notifications)
+    assert dispatcher.stats() == {"sent": 5, "retried": 0, "failed": 0}
+
+
+def test_failed_send_is_retried_with_backoff_then_marked_failed():
+    seed_notifications(1)
+    dispatcher = NotificationDispatcher(FlakyTransport(failures=10), max_attempts=3, retry_base_seconds=0)
+
+    started = datetime.utcnow()
+    asyncio.run(dispatcher.dispatch_once())
+    notification = load_notifications()[0]
+    assert notification.status == NotificationStatus.pending
+    assert notification.attempts == 1
+    assert "短信网关超时" in notification.last_error
+    assert notification.next_attempt_at >= started
+
+    asyncio.run(dispatcher.dispatch_once())
+    asyncio.run(dispatcher.dispatch_once())
+    notification = load_notifications()[0]
+    assert notification.status == NotificationStatus.failed
+    assert notification.attempts == 3
+    assert notification.sent_at is None
+
+    # 标记为失败后不再被取出
+    assert asyncio.run(dispatcher.dispatch_once()) == 0
+    assert dispatcher.stats() == {"sent": 0, "retried": 2, "failed": 1}
+
+
+def test_retry_waits_for_backoff():
+    seed_notifications(1)
+    transport = FlakyTransport(failures=1)
+    dispatcher = NotificationDispatcher(transport, retry_base_seconds=60)
+
+    asyncio.run(dispatcher.dispatch_once())
+    # 退避时间未到，不会重发
+    assert asyncio.run(dispatcher.dispatch_once()) == 0
+    assert len(transport.messages) == 0
+    assert dispatcher.retry_delay(1) == 60
+    assert dispatcher.retry_delay(3) == 240
+    assert dispatcher.retry_delay(10) == dispatcher.retry_max_seconds
+
+
+def test_claim_locks_only_notification_rows():
+    # MySQL 8（支持 SKIP LOCKED 的版本）连接后开启 supports_for_update_of
+    dialect = mysql.dialect()
+    dialect.supports_for_update_of = True
+    statement = NotificationDispatcher(transport=LocalSinkTransport()).claim_statement(datetime(2024, 1, 1))
+    sql = str(statement.compile(dialect=dialect))
+    assert sql.endswith("FOR UPDATE OF notifications SKIP LOCKED")
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+投资组合金额分配测试：批量结果每行之和等于本金（按分四舍五入），没有负金额，
+且与逐条 Decimal 实现的最大余数法结果一致
+"""
+
+from decimal import Decimal, ROUND_HALF_EVEN, ROUND_FLOOR
+
+import numpy as np
+
+from app.services.investment_advice import InvestmentAdviceService, ASSET_CLASSES, PORTFOLIO_LEVELS
+
+ROWS = 20000
+
+
+def allocate_decimal(risk_level, amount: float) -> list:
+    """逐条Decimal实现的最大余数法（参照实现），返回与 ASSET_CLASSES 对齐的分"""
+    config = InvestmentAdviceService.get_template(risk_level).portfolio_config
+    principal = int((Decimal(repr(amount)) * 100).quantize(Decimal(1), rounding=ROUND_HALF_EVEN))
+    shares = [Decimal(principal) * config.get(asset, 0) / 100 for asset in ASSET_CLASSES]
+    cents = [int(share.to_integral_value(rounding=ROUND_FLOOR)) for share in shares]
+    leftover = principal - sum(cents)
+    order = sorted(range(len(shares)), key=lambda i: -(shares[i] - cents[i]))
+    for i in order[:leftover]:
+        cents[i] += 1
+    return cents
+
+
+def random_rows(count: int):
+    rng = np.random.default_rng(42)
+    levels = list(np.array(PORTFOLIO_LEVELS, dtype=object)[rng.integers(0, len(PORTFOLIO_LEVELS), count)])
+    amounts = np.round(rng.uniform(10000, 5000000, count), 2)  # 与 DECIMAL(15,2) 一致，精确到分
+    return levels, amounts
+
+
+def test_allocations_sum_to_principal():
+    levels, amounts = random_rows(ROWS)
+    cents = InvestmentAdviceService.allocate_cents_batch(levels, amounts)
+
+    assert (cents.sum(axis=1) == np.rint(amounts * 100).astype(np.int64)).all()
+    assert (cents >= 0).all()
+    assert cents.tolist() == [allocate_decimal(level, float(amount)) for level, amount in zip(levels, amounts)]
+
+
+def test_sub_cent_amounts_round_to_principal():
+    levels, amounts = random_rows(ROWS)
+    odd_amounts = amounts + np.random.default_rng(7).uniform(0, 0.01, ROWS)
+    cents = InvestmentAdviceService.allocate_cents_batch(levels, odd_amounts)
+
+    assert (cents.sum(axis=1) == np.rint(odd_amounts * 100).astype(np.int64)).all()
+    assert (cents >= 0).all()
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+读写分离测试：两个本地SQLite文件作为只读副本，读请求轮询分配到副本，写请求使用主库；
+不可用的副本暂停分配、恢复后重新加入，全部不可用时读取主库；请求中提交过写入后读取主库（读己之写）；
+每个请求最多占用一个主库连接，并发请求数超过连接池大小时排队而不是超时
+"""
+
+import asyncio
+
+import httpx
+import pytest
+from fastapi import Depends
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import Settings, settings
+from app.database import database, engine, get_read_db, get_write_db
+from app.main import create_app
+from app.models import Base
+from app.models.auditor import Auditor, AuditorRole, AuditorStatus
+from app.models.customer import Customer, CustomerStatus, RiskLevel
+from app.utils.advice_cache import AdviceCache
+from app.utils.auth import create_access_token, invalidate_auditor_cache
+
+ANSWERS = {"age": "60岁以上", "income": "10万以下", "experience": "无经验",
+           "risk_tolerance": "5%以内", "goal": "资产保值", "period": "1年以内"}
+
+
+def seed(bind, name: str):
+    """建表并写入一个以数据库命名的客户，用于区分读取的是哪个数据库"""
+    Base.metadata.drop_all(bind=bind)
+    Base.metadata.create_all(bind=bind)
+    with bind.begin() as conn:
+        conn.execute(Customer.__table__.insert(), [{
+            "application_no": 1,
+            "name": name,
+            "phone": "13900000000",
+            "id_card": "110101000000000000",
+            "investment_amount": 100000,
+            "risk_level": RiskLevel.conservative,
+            "status": CustomerStatus.pending
+        }])
+
+
+@pytest.fixture()
+def replica_urls(tmp_path):
+    """主库和两个副本各有一个客户：主库、副本A、副本B"""
+    seed(engine, "主库")
+    urls = []
+    for name in ("副本A", "副本B"):
+        url = f"sqlite:///{tmp_path / name}.db"
+        replica_engine = create_engine(url)
+        seed(replica_engine, name)
+        replica_engine.dispose()
+        urls.append(url)
+    yield urls
+    # 恢复全局配置（应用关闭时已释放副本）
+    database.configure(settings)
+
+
+def make_app(replica_urls, **options):
+    return create_app(Settings(
+        database_replica_urls=",".join(replica_urls),
+        notification_dispatcher_enabled=False,
+        registration_filter_enabled=False,
+        metrics_enabled=False,
+        **options
+    ))
+
+
+def serve(app, scenario):
+    """在应用的启动/关闭流程中执行 scenario(client)"""
+    async def run():
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                return await scenario(client)
+
+    return asyncio.run(run())
+
+
+async def read_names(client, count: int) -> list:
+    names = []
+    for _ in range(count):
+        response = await client.get("/api/v1/customers")
+        assert response.status_code == 200
+        names.append(response.json()["data"]["items"][0]["name"])
+    return names
+
+
+def test_reads_round_robin_and_writes_use_primary(replica_urls):
+    async def scenario(client):
+        names = await read_names(client, 4)
+        response = await client.post("/api/v1/customers/register", json={
+            "name": "新客户", "phone": "13900000001", "id_card": "110101000000000001",
+            "investment_amount": 100000, "assessment_data": ANSWERS
+        })
+        assert response.status_code == 200
+        return names
+
+    names = serve(make_app(replica_urls), scenario)
+
+    assert sorted(names) == ["副本A", "副本A", "副本B", "副本B"]
+    assert names[0] != names[1]
+    with engine.connect() as conn:
+        assert conn.scalar(select(func.count()).select_from(Customer)) == 2
+    for url in replica_urls:
+        replica_engine = create_engine(url)
+        with replica_engine.connect() as conn:
+            assert conn.scalar(select(func.count()).select_from(Customer)) == 1
+        replica_engine.dispose()
+
+
+def test_unhealthy_replicas_are_skipped(replica_urls, tmp_path):
+    # 副本B所在目录不存在，无法连接
+    missing = tmp_path / "missing"
+    replica_urls = [replica_urls[0], f"sqlite:///{missing}/replica.db"]
+
+    async def scenario(client):
+        replicas = database.replicas
+        await replicas.check()
+        assert replicas.healthy == [True, False]
+        skipped = await read_names(client, 3)
+
+        # 全部不可用时读取主库
+        replicas.mark(0, False)
+        fallback = await read_names(client, 2)
+
+        # 恢复后重新加入
+        missing.mkdir()
+        await replicas.check()
+        assert replicas.healthy == [True, True]
+        return skipped, fallback
+
+    skipped, fallback = serve(make_app(replica_urls, replica_health_check_interval_seconds=3600), scenario)
+
+    assert skipped == ["副本A"] * 3
+    assert fallback == ["主库"] * 2
+
+
+async def write_then_read(write_db: AsyncSession = Depends(get_write_db), read_db: AsyncSession = Depends(get_read_db)):
+    """先用主库会话写入并提交，再用只读会话读取"""
+    before = await read_db.scalar(select(func.count()).select_from(Customer))
+    write_db.add(Customer(
+        name="新客户", phone="13900000001", id_card="110101000000000001", investment_amount=100000,
+        risk_level=RiskLevel.conservative, status=CustomerStatus.pending
+    ))
+    await write_db.commit()
+    after = await read_db.scalar(select(func.count()).select_from(Customer))
+    return {"before": before, "after": after}
+
+
+@pytest.mark.parametrize("read_your_writes, expected", [(True, (1, 2)), (False, (1, 1))])
+def test_read_your_writes(replica_urls, read_your_writes, expected):
+    app = make_app(replica_urls[:1], read_your_writes=read_your_writes)
+    app.add_api_route("/write-then-read", write_then_read, methods=["POST"])
+
+    async def scenario(client):
+        result = (await client.post("/write-then-read")).json()
+        # 之后的请求仍然读取副本
+        return result, await read_names(client, 1)
+
+    result, later = serve(app, scenario)
+
+    # 提交前读取副本；开启读己之写时提交后改读主库
+    assert (result["before"], result["after"]) == expected
+    assert later == ["副本A"]
+
+
+@pytest.mark.parametrize("with_replicas", [False, True])
+def test_concurrent_requests_within_pool(replica_urls, with_replicas):
+    """认证查询审核员和只读查询不同时占用两个主库连接，并发请求数超过连接池大小时只是排队"""
+    with engine.begin() as conn:
+        conn.execute(Auditor.__table__.insert(), [{
+            "username": "junior1", "password_hash": "-", "name": "初级审核员1",
+            "role": AuditorRole.junior, "status": AuditorStatus.active
+        }])
+    invalidate_auditor_cache()
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'junior1'})}"}
+
+    async def scenario(client):
+        requests = [client.get("/api/v1/workflow/workflow", headers=headers) for _ in range(3 * settings.sqlite_pool_size)]
+        return await asyncio.wait_for(asyncio.gather(*requests), 10)
+
+    responses = serve(make_app(replica_urls if with_replicas else []), scenario)
+
+    assert [response.status_code for response in responses] == [200] * 3 * settings.sqlite_pool_size
+
+
+def test_advice_cache_is_filled_from_primary(replica_urls, monkeypatch):
+    """审核后删除的投资建议缓存从主库重新读取，不会把副本上尚未同步的旧状态写入缓存"""
+    cache = AdviceCache()
+    monkeypatch.setattr("app.api.customers.advice_cache", cache)
+
+    async def scenario(client):
+        first = await client.get("/api/v1/customers/1/advice")
+        cached = await cache.get(1)
+        return first, cached
+
+    first, cached = serve(make_app(replica_urls), scenario)
+
+    assert first.status_code == 200
+    assert first.json()["data"]["customer_info"]["name"] == "主库"
+    assert cached["data"]["customer_info"]["name"] == "主库"
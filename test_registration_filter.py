@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+注册查重测试：先插入、唯一约束冲突返回原有的400提示；预过滤加载后新客户注册不再查询数据库查重，
+可能重复时才查询确认；批量注册总是查询数据库，与并发注册冲突时重新执行；加载过程中注册的客户不会丢失；
+并发时唯一约束冲突不阻塞其他注册；布隆过滤器没有漏判，误判率接近设定值
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import event
+
+from app.api import customers_router
+from app.config import settings
+from app.database import SessionLocal, database, engine, async_engine
+from app.models import Base
+from app.models.customer import Customer, CustomerStatus
+from app.services.customer_registration import CustomerRegistrationService
+from app.utils.registration_filter import BloomFilter, registration_filter
+
+ANSWERS = {"age": "60岁以上", "income": "10万以下", "experience": "无经验",
+           "risk_tolerance": "5%以内", "goal": "资产保值", "period": "1年以内"}
+
+
+def payload(i: int, phone: str = None, id_card: str = None) -> dict:
+    return {
+        "name": f"客户{i}",
+        "phone": phone or f"139{i:08d}",
+        "id_card": id_card or f"110101{i:012d}",
+        "investment_amount": 100000,
+        "assessment_data": ANSWERS
+    }
+
+
+@pytest.fixture(autouse=True)
+def empty_database():
+    """重建表结构，过滤器恢复为未加载"""
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    registration_filter.loaded = False
+    registration_filter.phones = registration_filter.id_cards = None
+    yield
+    registration_filter.loaded = False
+    registration_filter.phones = registration_filter.id_cards = None
+
+
+def post(requests: list):
+    """依次发送 (路径, 请求体)，返回响应和查重查询（按手机号或身份证号查询 customers 表）的语句数"""
+    app = FastAPI()
+    app.include_router(customers_router)
+    selects = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("SELECT") and "FROM customers" in statement \
+                and "customers.phone" in statement.partition("WHERE")[2]:
+            selects.append(statement)
+
+    async def send():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return [await client.post(path, json=body) for path, body in requests]
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+    try:
+        responses = asyncio.run(send())
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+    return responses, len(selects)
+
+
+def load_filter():
+    asyncio.run(registration_filter.load(database.async_session_factory))
+
+
+def test_insert_first_maps_integrity_errors():
+    responses, selects = post([
+        ("/api/v1/customers/register", payload(0)),
+        ("/api/v1/customers/register", payload(1, phone="13900000000")),
+        ("/api/v1/customers/register", payload(2, id_card="110101000000000000"))
+    ])
+
+    assert [response.status_code for response in responses] == [200, 400, 400]
+    assert responses[1].json()["detail"] == "手机号已存在"
+    assert responses[2].json()["detail"] == "身份证号已存在"
+    # 未加载过滤器时直接插入，不查询查重
+    assert selects == 0
+
+
+def test_loaded_filter_skips_checks_for_new_customers():
+    post([("/api/v1/customers/register", payload(0))])
+    load_filter()
+    assert registration_filter.loaded
+    assert "13900000000" in registration_filter.phones
+
+    skipped = registration_filter.skipped_checks
+    responses, selects = post([("/api/v1/customers/register", payload(i)) for i in range(1, 6)])
+    assert [response.status_code for response in responses] == [200] * 5
+    assert selects == 0
+    assert registration_filter.skipped_checks == skipped + 5
+    # 注册成功后追加到过滤器
+    assert "13900000005" in registration_filter.phones
+    assert "110101000000000005" in registration_filter.id_cards
+
+    responses, selects = post([
+        ("/api/v1/customers/register", payload(9, phone="13900000003")),
+        ("/api/v1/customers/register", payload(10, id_card="110101000000000004"))
+    ])
+    assert [response.json()["detail"] for response in responses] == ["手机号已存在", "身份证号已存在"]
+    # 可能重复时查询一次确认
+    assert selects == 2
+
+
+def insert_directly(i: int):
+    """绕过过滤器插入客户（模拟其他进程注册）"""
+    db = SessionLocal()
+    try:
+        db.add(Customer(name=f"客户{i}", phone=f"139{i:08d}", id_card=f"110101{i:012d}",
+                        investment_amount=100000, status=CustomerStatus.pending))
+        db.commit()
+    finally:
+        db.close()
+
+
+def test_batch_registration_checks_database_with_stale_filter():
+    load_filter()
+    # 其他进程注册的客户不在本进程的过滤器中
+    insert_directly(3)
+    assert not registration_filter.might_exist("13900000003", "110101000000000003")
+
+    responses, selects = post([("/api/v1/customers/register/batch", {
+        "customers": [payload(i) for i in range(5)]
+    })])
+
+    assert responses[0].status_code == 200
+    data = responses[0].json()["data"]
+    assert (data["success_count"], data["failed_count"]) == (4, 1)
+    assert data["results"][3] == {"index": 3, "success": False, "error": "手机号已存在"}
+    assert selects == 1
+    assert "13900000004" in registration_filter.phones
+
+
+def test_batch_registration_retries_after_concurrent_insert(monkeypatch):
+    """查重之后其他请求注册了同一客户：唯一约束冲突后回滚并重新执行整批，不返回500和SQL"""
+    insert_directly(2)
+    find_existing = CustomerRegistrationService.find_existing
+    calls = []
+
+    async def miss_first_time(db, customers):
+        calls.append(len(customers))
+        if len(calls) == 1:
+            return set(), set()
+        return await find_existing(db, customers)
+
+    monkeypatch.setattr(CustomerRegistrationService, "find_existing", staticmethod(miss_first_time))
+    responses, _ = post([("/api/v1/customers/register/batch", {"customers": [payload(i) for i in range(4)]})])
+
+    assert calls == [4, 4]
+    assert responses[0].status_code == 200
+    results = responses[0].json()["data"]["results"]
+    assert [result["success"] for result in results] == [True, True, False, True]
+    assert results[2]["error"] == "手机号已存在"
+
+    # 一直冲突时返回409
+    async def always_miss(db, customers):
+        return set(), set()
+
+    monkeypatch.setattr(CustomerRegistrationService, "find_existing", staticmethod(always_miss))
+    responses, _ = post([("/api/v1/customers/register/batch", {"customers": [payload(i) for i in range(2, 6)]})])
+    assert responses[0].status_code == 409
+    assert "INSERT" not in responses[0].text
+
+
+def test_registrations_during_load_are_kept():
+    @asynccontextmanager
+    async def session_factory():
+        async with database.async_session_factory() as db:
+            stream = db.stream
+
+            async def register_then_stream(*args, **kwargs):
+                # 加载过程中（过滤器尚未启用）注册成功的客户
+                registration_filter.add("13700000000", "370101000000000000")
+                return await stream(*args, **kwargs)
+
+            db.stream = register_then_stream
+            yield db
+
+    post([("/api/v1/customers/register", payload(0))])
+    asyncio.run(registration_filter.load(session_factory))
+
+    assert registration_filter.loaded
+    assert "13900000000" in registration_filter.phones
+    assert "13700000000" in registration_filter.phones
+    assert "370101000000000000" in registration_filter.id_cards
+
+
+def test_concurrent_duplicates_do_not_block_other_registrations():
+    """并发注册中唯一约束冲突的请求不能让其他请求等到 busy_timeout（database is locked）"""
+    post([("/api/v1/customers/register", payload(i)) for i in range(20)])
+    app = FastAPI()
+    app.include_router(customers_router)
+    queue = [payload(100 + i, phone=f"139{i % 20:08d}" if i % 2 else None) for i in range(200)]
+    statuses = []
+
+    async def worker(client: httpx.AsyncClient):
+        while queue:
+            response = await client.post("/api/v1/customers/register", json=queue.pop())
+            statuses.append(response.status_code)
+
+    async def send():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            await asyncio.gather(*(worker(client) for _ in range(settings.sqlite_pool_size)))
+
+    asyncio.run(send())
+    assert sorted(set(statuses)) == [200, 400]
+    assert statuses.count(400) == 100
+
+
+def test_bloom_filter_has_no_false_negatives():
+    keys = [f"139{i:08d}" for i in range(20000)]
+    bloom = BloomFilter(20000, error_rate=0.01)
+    bloom.add_many(keys[:10000])
+    for key in keys[10000:]:
+        bloom.add(key)
+
+    assert all(key in bloom for key in keys)
+    false_positives = sum(f"138{i:08d}" in bloom for i in range(20000))
+    assert false_positives / 20000 < 0.02
+    assert bloom.count == 20000
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+批量风险评分测试：穷举所有问卷选项组合（含未知选项），向量化结果与逐条计算完全一致
+"""
+
+import itertools
+
+import pytest
+
+from app.schemas.customer import AssessmentData
+from app.services.risk_assessment import RiskAssessmentService, SCORE_TABLES
+
+
+@pytest.fixture(scope="module")
+def assessments() -> list:
+    options = [list(scores) + ["未知选项"] for _, scores in SCORE_TABLES]
+    fields = [field for field, _ in SCORE_TABLES]
+    return [AssessmentData(**dict(zip(fields, combo))) for combo in itertools.product(*options)]
+
+
+def test_batch_scores_match_scalar(assessments):
+    expected_scores = [RiskAssessmentService.calculate_risk_score(item) for item in assessments]
+    expected_levels = [RiskAssessmentService.determine_risk_level(score) for score in expected_scores]
+
+    scores = RiskAssessmentService.calculate_risk_scores_batch(assessments)
+    assert scores.tolist() == expected_scores
+    assert list(RiskAssessmentService.determine_risk_levels_batch(scores)) == expected_levels
+
+    # 字典输入与 AssessmentData 输入结果一致
+    dict_scores = RiskAssessmentService.calculate_risk_scores_batch([item.model_dump() for item in assessments])
+    assert dict_scores.tolist() == expected_scores
+
+
+def test_empty_batch():
+    scores = RiskAssessmentService.calculate_risk_scores_batch([])
+    assert scores.tolist() == []
+    assert list(RiskAssessmentService.determine_risk_levels_batch(scores)) == []
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+SQL监控测试：统计每个请求的语句数和数据库耗时，识别N+1查询，记录慢查询及参数
+"""
+
+import asyncio
+import json
+import logging
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.config import settings
+from app.database import SessionLocal, engine, get_async_database_url
+from app.models import Base, Customer
+from app.models.customer import CustomerStatus, RiskLevel
+from app.utils.sql_instrumentation import SQLInstrumentationMiddleware, instrument_sql, statement_shape
+
+CUSTOMERS = 12
+
+# 独立的引擎，慢查询阈值为0，每条语句都记录慢查询日志
+test_engine = create_async_engine(get_async_database_url(settings.database_url))
+instrument_sql(test_engine.sync_engine, slow_query_threshold_ms=0)
+TestSession = async_sessionmaker(test_engine, class_=AsyncSession)
+
+
+def setup_module():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        for i in range(CUSTOMERS):
+            db.add(Customer(
+                name=f"客户{i}",
+                phone=f"139{i:08d}",
+                id_card=f"110101{i:012d}",
+                investment_amount=100000,
+                risk_level=RiskLevel.moderate,
+                status=CustomerStatus.pending
+            ))
+        db.commit()
+    finally:
+        db.close()
+
+
+def build_app(expose_headers: bool):
+    app = FastAPI()
+    app.add_middleware(SQLInstrumentationMiddleware, n_plus_one_threshold=10, expose_headers=expose_headers)
+
+    @app.get("/names/loop")
+    async def names_loop():
+        async with TestSession() as db:
+            return [
+                await db.scalar(select(Customer.name).where(Customer.id == customer_id))
+                for customer_id in range(1, CUSTOMERS + 1)
+            ]
+
+    @app.get("/names/batch")
+    async def names_batch():
+        async with TestSession() as db:
+            result = await db.execute(select(Customer.name).where(Customer.id.in_(range(1, CUSTOMERS + 1))))
+            return result.scalars().all()
+
+    return app
+
+
+def get(path, expose_headers=True):
+    async def request():
+        transport = httpx.ASGITransport(app=build_app(expose_headers))
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get(path)
+
+    return asyncio.run(request())
+
+
+def test_n_plus_one_reported_in_headers_and_log(caplog):
+    caplog.set_level(logging.INFO, logger="app.utils.sql_instrumentation")
+
+    response = get("/names/loop")
+
+    assert response.status_code == 200
+    assert len(response.json()) == CUSTOMERS
+    assert response.headers["x-db-queries"] == str(CUSTOMERS)
+    assert float(response.headers["x-db-time-ms"]) > 0
+    assert response.headers["x-db-n-plus-one"] == str(CUSTOMERS)
+    warnings = [record.getMessage() for record in caplog.records if "N+1" in record.getMessage()]
+    assert len(warnings) == 1
+    assert "GET /names/loop" in warnings[0]
+
+
+def test_single_query_has_no_n_plus_one():
+    response = get("/names/batch")
+
+    assert response.status_code == 200
+    assert response.headers["x-db-queries"] == "1"
+    assert "x-db-n-plus-one" not in response.headers
+
+
+def test_structured_log_without_headers(caplog):
+    caplog.set_level(logging.INFO, logger="app.utils.sql_instrumentation")
+
+    response = get("/names/batch", expose_headers=False)
+
+    assert "x-db-queries" not in response.headers
+    lines = [json.loads(record.getMessage()) for record in caplog.records if record.getMessage().startswith("{")]
+    assert len(lines) == 1
+    assert lines[0]["event"] == "request_sql"
+    assert lines[0]["route"] == "/names/batch"
+    assert lines[0]["status"] == 200
+    assert lines[0]["db_queries"] == 1
+    assert lines[0]["n_plus_one"] == 0
+
+
+def test_slow_query_logged_with_parameters(caplog):
+    caplog.set_level(logging.WARNING, logger="app.utils.sql_instrumentation")
+
+    get("/names/batch")
+
+    slow = [record.getMessage() for record in caplog.records if record.getMessage().startswith("慢查询")]
+    assert len(slow) == 1
+    assert "FROM customers" in slow[0]
+    assert "(1, 2, 3" in slow[0]
+
+
+def test_statement_shape_ignores_in_list_length():
+    assert statement_shape("SELECT * FROM t\n WHERE id IN (?, ?, ?)") == statement_shape(
+        "SELECT * FROM t WHERE id IN (?,?)"
+    )
+    assert statement_shape("SELECT * FROM t WHERE id = ?") != statement_shape("SELECT * FROM t WHERE name = ?")
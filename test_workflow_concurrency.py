@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+审核并发测试：同一审核任务被并发提交时只有一个请求成功，其余返回409，不产生重复的审核记录
+"""
+
+import asyncio
+from collections import Counter, defaultdict
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import func, select
+
+from app.api import workflow_router
+from app.database import SessionLocal, database
+from app.models.workflow import AuditRecord, AuditWorkflow, AuditStatus, WorkflowStatus
+from app.services.audit_workflow import AuditWorkflowService, WorkflowConflictError
+from app.utils.auth import create_access_token
+from conftest import seed_pending
+
+# 不超过连接池大小，所有参与者都能同时持有连接
+CONTENDERS = 4
+
+
+def count_records() -> Counter:
+    db = SessionLocal()
+    try:
+        return Counter(db.scalars(select(AuditRecord.customer_id)))
+    finally:
+        db.close()
+
+
+async def race(workflow_id: int, auditor_id: int) -> list:
+    """所有参与者先读到同一版本的工作流，再同时提交"""
+    all_loaded = asyncio.Barrier(CONTENDERS)
+
+    async def contender(audit_result: AuditStatus):
+        async with database.async_session_factory() as db:
+            await db.get(AuditWorkflow, workflow_id)
+            await all_loaded.wait()
+            try:
+                processed = await AuditWorkflowService.process_audit(db, workflow_id, auditor_id, audit_result, "")
+                await db.commit()
+                return processed
+            except WorkflowConflictError:
+                await db.rollback()
+                return "conflict"
+
+    results = [AuditStatus.approved, AuditStatus.rejected, AuditStatus.need_review, AuditStatus.approved]
+    return await asyncio.gather(*(contender(result) for result in results))
+
+
+def test_concurrent_transitions_have_one_winner(auditor_id):
+    customers = seed_pending(auditor_id, 10)
+
+    async def run():
+        outcomes = []
+        for workflow_id in range(1, len(customers) + 1):
+            outcomes.append(await race(workflow_id, auditor_id))
+        return outcomes
+
+    for outcome in asyncio.run(run()):
+        assert sorted(outcome, key=str) == [True] + ["conflict"] * (CONTENDERS - 1)
+
+    assert count_records() == Counter({customer_id: 1 for customer_id in customers})
+    db = SessionLocal()
+    try:
+        assert set(db.scalars(select(AuditWorkflow.version))) == {2}
+    finally:
+        db.close()
+
+
+def test_concurrent_http_submissions(auditor_id):
+    customers = seed_pending(auditor_id, 5)
+    app = FastAPI()
+    app.include_router(workflow_router)
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'junior1'})}"}
+
+    async def submit_all():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            requests = [
+                (customer_id, client.post("/api/v1/workflow/audit", headers=headers, json={
+                    "customer_id": customer_id, "audit_status": "approved" if attempt % 2 else "rejected"
+                }))
+                for attempt in range(6) for customer_id in customers
+            ] + [
+                (None, client.post("/api/v1/workflow/audit/batch", headers=headers, json={
+                    "items": [{"customer_id": customer_id, "audit_status": "approved"} for customer_id in customers]
+                }))
+                for _ in range(3)
+            ]
+            responses = await asyncio.gather(*(request for _, request in requests))
+        return [(customer_id, response) for (customer_id, _), response in zip(requests, responses)]
+
+    statuses = defaultdict(list)
+    batch_successes = Counter()
+    for customer_id, response in asyncio.run(submit_all()):
+        assert response.status_code in (200, 404, 409), response.text
+        if customer_id is not None:
+            statuses[customer_id].append(response.status_code)
+        elif response.status_code == 200:
+            batch_successes.update(
+                result["customer_id"] for result in response.json()["data"]["results"] if result["success"]
+            )
+
+    # 每个任务只被处理一次：单个提交和批量提交中恰好一个成功
+    for customer_id in customers:
+        assert statuses[customer_id].count(200) + batch_successes[customer_id] == 1
+    assert count_records() == Counter({customer_id: 1 for customer_id in customers})
+
+    db = SessionLocal()
+    try:
+        finished = db.scalar(select(func.count()).select_from(AuditWorkflow).where(
+            AuditWorkflow.workflow_status.in_([WorkflowStatus.completed, WorkflowStatus.rejected])
+        ))
+        assert finished == len(customers)
+    finally:
+        db.close()
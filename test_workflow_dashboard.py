@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+审核工作台查询测试：每次请求的SQL语句数量不随待审核队列长度增长
+"""
+
+import asyncio
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import event, select
+
+from app.api import workflow_router
+from app.database import SessionLocal, async_engine
+from app.models.customer import Customer, RiskLevel
+from app.models.workflow import AuditLevel
+from app.utils.auth import create_access_token
+from conftest import seed_pending
+
+
+def seed_queue(auditor_id: int, start: int, count: int):
+    """为审核员添加中等风险、需要高级审核的待审核任务，投资金额依次递增100万（第二个起为高优先级）"""
+    seed_pending(
+        auditor_id, count, start,
+        risk_level=RiskLevel.moderate,
+        investment_amount=[500000 + i * 1000000 for i in range(start, start + count)],
+        next_level=AuditLevel.senior
+    )
+
+
+def fetch_dashboard():
+    """请求工作台接口，返回响应数据和执行的SQL语句数"""
+    app = FastAPI()
+    app.include_router(workflow_router)
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'junior1'})}"}
+    statements = []
+
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    async def request():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get("/api/v1/workflow/workflow", headers=headers)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", count_statement)
+    try:
+        response = asyncio.run(request())
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", count_statement)
+
+    assert response.status_code == 200
+    return response.json()["data"], len(statements)
+
+
+def test_dashboard_statement_count_is_constant(auditor_id):
+    seed_queue(auditor_id, 0, 1)
+    fetch_dashboard()  # 预热认证缓存
+    data, small_queue_statements = fetch_dashboard()
+    assert data["pending_count"] == 1
+    assert len(data["pending_list"]) == 1
+
+    seed_queue(auditor_id, 1, 50)
+    data, large_queue_statements = fetch_dashboard()
+    assert data["pending_count"] == 51
+    assert len(data["pending_list"]) == 51
+
+    assert small_queue_statements == large_queue_statements
+    # 聚合统计 + 待审核列表
+    assert large_queue_statements <= 2
+
+
+def test_dashboard_pending_list_fields(auditor_id):
+    seed_queue(auditor_id, 0, 2)
+    data, _ = fetch_dashboard()
+
+    assert data["approved_count"] == 0
+    assert data["need_review_count"] == 0
+    assert data["total_investment"] == 0.0
+    first, second = data["pending_list"]
+    db = SessionLocal()
+    try:
+        application_nos = dict(db.execute(select(Customer.id, Customer.application_no)).all())
+    finally:
+        db.close()
+    assert first["application_id"] == f"RA-{application_nos[first['customer_id']]}"
+    assert second["application_id"] == f"RA-{application_nos[second['customer_id']]}"
+    assert first["risk_level"] == "moderate"
+    assert first["priority"] == "normal"
+    assert second["priority"] == "high"